@@ -68,7 +68,7 @@ class Robot:
     # connect to modem
     self.modem = Modem()
     self.modem.connect(com)
-    self.modem.addRxCallback(self.__handlePkt)
+    self.modem.addRxCallback(self.__handlePkt, type=0x7F)
     self.modem.setTxEcho(True)
     self.modem.setRxEcho(True)
     self.modem.receive(True) # receive non-blocking (as thread)
@@ -45,6 +45,7 @@ import time
 import threading
 import os
 import argparse
+from concurrent.futures import Future
 
 try:
     import readline
@@ -714,7 +715,7 @@ def doRange(inp):
 
         # send ping and request pong (ranging ack)
         ret = myModem.send(type=0x52, dst=dst, src=0, dsn=(i%256), status=2, payload=data)
-        if ret != 0:
+        if not isinstance(ret, Future) and ret != 0:
             return -1
 
     sigInt_enable()
@@ -846,7 +847,7 @@ def doSendRep(inp):
         print("send-rep packet %3u of %u" % (i+1, rep))
         ret = myModem.send(src=0, dst=dst, type=pkttype, status=status, dsn=(i%256),
                            payload=data.encode('ascii', 'ignore'))
-        if ret != 0:
+        if not isinstance(ret, Future) and ret != 0:
             return -1
 
     sigInt_enable()
@@ -1080,7 +1081,8 @@ def __inputThread():
                         # (at least no crash)
                         print("ERROR: Could not parse one of the parameters")
 
-                    if ret != 0:
+                    # the modem commands return the future of their response
+                    if not isinstance(ret, Future) and ret != 0:
                         print("ERROR: improper parameter list!")
                         printUsage(inp[0])
 
@@ -45,6 +45,7 @@ import string
 
 # modem and serial connection
 from ahoi.modem.modem import Modem
+from ahoi.modem.profile import makeProfile
 
 # from packet import getBytes
 from ahoi.modem.packet import getHeaderBytes
@@ -73,25 +74,8 @@ def startTest(modem, role, pktcount, payload, rxg, sleepTime, pktType, txGain, s
     
     # set up modem
     modem.logOn(file_name=filename)
-    modem.id()
-    modem.getVersion()
-    modem.getConfig()
-    modem.bitSpread(spread)
     #modem.rangeDelay()
-    modem.txGain(txGain)
-    if rxg is None:
-        modem.agc(1)
-        modem.rxGain()
-    else:
-        modem.agc(0)
-        modem.rxGain(rxg)
-    modem.clearPacketStat()
-    modem.clearSyncStat()
-    modem.clearSfdStat()
-    # more stats
-    modem.getPowerLevel()
-    modem.rxThresh()
-    modem.rxLevel()
+    modem.configure(makeProfile(bitSpread=spread, txGain=txGain, agc=rxg is None, rxGain=rxg))
     
     # run experiment after user OK
     if role == "tx":
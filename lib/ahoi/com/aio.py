@@ -0,0 +1,200 @@
+#
+# Copyright 2016-2019
+# 
+# Bernd-Christian Renner, Jan Heitmann, and
+# Hamburg University of Technology (TUHH).
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# 
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+"""Module for asyncio modem com interfacing.
+
+The connections run on the event loop of the caller instead of a receive
+thread: the received bytes are decoded as they arrive and every packet is
+handed to the callback given to connect. The end of the connection is
+signalled to the callback given with it, and sending then raises
+ConnectionError.
+"""
+
+import asyncio
+
+import serial
+
+import ahoi.modem.packet
+from ahoi.com.streamer import Streamer
+
+
+class AsyncModemBaseCom:
+
+    def __init__(self, dev = None):
+        """Initialize com."""
+        self.dev = dev
+        self.rxCallback = None
+        self.lostCallback = None
+        self.streamer = Streamer()
+
+
+    async def connect(self, cb, lostCb = None):
+        """Open the connection, cb is called with each received packet, lostCb with the error once the connection ends."""
+        self.rxCallback = cb
+        self.lostCallback = lostCb
+
+
+    def close(self):
+        """Terminate."""
+        self.rxCallback = None
+
+
+    async def sendBytes(self, tx):
+        """Send an encoded packet."""
+        pass
+
+
+    async def send(self, pkt):
+        """Send a packet."""
+        await self.sendBytes(self.processTx(pkt))
+
+
+    def processRx(self, rx):
+        """handle received bytes and decode packet"""
+        for r in self.streamer.decode(rx):
+            if self.rxCallback is not None:
+                self.rxCallback(ahoi.modem.packet.byteArrayToPacket(r))
+
+
+    def processLost(self, exc):
+        """handle the end of the connection (exc None on close)"""
+        cb, self.lostCallback = self.lostCallback, None
+        if cb is not None:
+            cb(exc)
+
+
+    def processTx(self, pkt):
+        """handle pkt to send (prepare byte stream)"""
+        return self.streamer.enc(ahoi.modem.packet.getBytes(pkt))
+
+
+class AsyncModemSocketCom(AsyncModemBaseCom, asyncio.Protocol):
+
+    DFLT_PORT = 2464  # ahoi
+
+    def __init__(self, host, port = None):
+        """Initialize socket com."""
+        self.host = host
+        self.port = int(port) if port is not None and int(port) > 0 else AsyncModemSocketCom.DFLT_PORT
+        super().__init__("%s:%u" % (self.host, self.port))
+        self.transport = None
+
+
+    async def connect(self, cb, lostCb = None):
+        """Connect to the server (e.g. sfwd)."""
+        await super().connect(cb, lostCb)
+        loop = asyncio.get_running_loop()
+        await loop.create_connection(lambda: self, self.host, self.port)
+
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+
+    def data_received(self, data):
+        self.processRx(data)
+
+
+    def connection_lost(self, exc):
+        self.transport = None
+        self.processLost(exc)
+
+
+    def close(self):
+        """Terminate."""
+        if self.transport is not None:
+            self.transport.close()
+        super().close()
+
+
+    async def sendBytes(self, tx):
+        """Send an encoded packet, raise ConnectionError once disconnected."""
+        if self.transport is None:
+            raise ConnectionError("not connected to %s" % self.dev)
+        self.transport.write(tx)
+
+
+class AsyncModemSerialCom(AsyncModemBaseCom):
+
+    def __init__(self, dev):
+        """Initialize serial com."""
+        super().__init__(dev)
+        self.com = None
+        self.loop = None  # running loop reading the port
+
+
+    async def connect(self, cb, lostCb = None):
+        """Open the serial connection, the received bytes are read when the port is readable."""
+        await super().connect(cb, lostCb)
+        self.com = serial.Serial(
+            port = self.dev,
+            baudrate = 115200,
+            parity = serial.PARITY_NONE,
+            stopbits = serial.STOPBITS_ONE,
+            bytesize = serial.EIGHTBITS,
+            timeout = 0  # non-blocking read
+        )
+        self.loop = asyncio.get_running_loop()
+        self.loop.add_reader(self.com.fileno(), self.__read)
+
+
+    def __read(self):
+        try:
+            rx = self.com.read(self.com.in_waiting or 1)
+        except serial.SerialException as e:
+            # e.g. the device is unplugged
+            self.processLost(e)
+            self.close()
+            return
+        self.processRx(rx)
+
+
+    def close(self):
+        """Terminate."""
+        if self.com is not None:
+            self.loop.remove_reader(self.com.fileno())
+            self.com.close()
+            self.com = None
+        self.processLost(None)
+        super().close()
+
+
+    async def sendBytes(self, tx):
+        """Send an encoded packet, a frame is written to the UART buffer without waiting."""
+        if self.com is None:
+            raise ConnectionError("%s is not open" % self.dev)
+        self.com.write(tx)
+
+# eof
@@ -40,16 +40,23 @@ import os.path
 
 import ahoi.modem.packet
 from ahoi.com.streamer import Streamer
+from ahoi.com.logwriter import LogWriter
 
 
 class ModemBaseCom:
   
+    # durability window of the packet log (see LogWriter)
+    LOG_SYNC_INTERVAL = LogWriter.SYNC_INTERVAL
+    LOG_SYNC_BYTES = LogWriter.SYNC_BYTES
+  
     def __init__(self, dev = None, cb = None):
         """Initialize serial com."""
         self.dev = dev
         self.rxCallback = cb
         self.streamer = Streamer()
         self.logFile = None
+        self.logSyncInterval = self.LOG_SYNC_INTERVAL
+        self.logSyncBytes = self.LOG_SYNC_BYTES
     
     
     def __del__(self):
@@ -78,13 +85,27 @@ class ModemBaseCom:
     def send(self, pkt):
         """Send a packet."""
         pass
+
+
+    def sendBytes(self, tx):
+        """Send an encoded packet."""
+        pass
+
+
+    def prepareFrame(self, pkt):
+        """Encode a packet to send it later with sendFrame."""
+        return self.processTx(pkt)
+
+
+    def sendFrame(self, frame):
+        """Send a frame prepared by prepareFrame."""
+        return self.sendBytes(frame)
       
       
     def processRx(self, rx):
         """handle received bytes and decode packet"""
-        for b in rx:
-            r = self.streamer.dec(b)
-            if r is not None and self.rxCallback is not None:
+        for r in self.streamer.decode(rx):
+            if self.rxCallback is not None:
                 pkt = ahoi.modem.packet.byteArrayToPacket(r)
                 self.__log(pkt)
                 self.rxCallback(pkt)
@@ -104,10 +125,10 @@ class ModemBaseCom:
                         
     def __log(self, pkt):
         """Log packet"""
-        if self.logFile is not None and not self.logFile.closed:
-            self.logFile.write("{:.3f}".format(time.time()) + " " + ahoi.modem.packet.packet2HexString(pkt) + "\n")
-            self.logFile.flush()
-            os.fsync(self.logFile.fileno())
+        logFile = self.logFile
+        if logFile is not None:
+            # written and synced by the log writer thread
+            logFile.write("{:.3f}".format(time.time()) + " " + ahoi.modem.packet.packet2HexString(pkt) + "\n")
       
       
     def logOn(self, file_name=None):
@@ -125,19 +146,18 @@ class ModemBaseCom:
                     file_name2 = file_name + "." + str(i)
                 print("%s exists, logging to file %s" % (file_name, file_name2))
                 file_name = file_name2
-            self.logFile = open(file_name, 'w', buffering=1)
+            self.logFile = LogWriter(file_name, self.logSyncInterval, self.logSyncBytes)
         except OSError as e:
             print("Failed to open {}: {}".format(file_name, str(e)))
 
 
     def logOff(self):
         """Turn logging to file off."""
-        if self.logFile is not None and not self.logFile.closed:
-            self.logFile.flush()
-            os.fsync(self.logFile.fileno())
-            print("Closed logfile {}".format(self.logFile.name))
-            self.logFile.close()
+        logFile = self.logFile
+        if logFile is not None and not logFile.closed:
             self.logFile = None
+            logFile.close()
+            print("Closed logfile {}".format(logFile.name))
     
     
     def scan(self = None):
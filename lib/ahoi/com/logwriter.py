@@ -0,0 +1,149 @@
+#
+# Copyright 2016-2019
+# 
+# Bernd-Christian Renner, Jan Heitmann, and
+# Hamburg University of Technology (TUHH).
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# 
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+"""Module for the background packet log writer.
+
+The lines are queued by the receiving thread and written in batches by a
+writer thread, so logging does not stall the packet decoding. The file is
+synced to disk every syncInterval seconds or syncBytes octets, whichever
+comes first: this is the window of log lines lost on a power failure.
+The lines dropped on queue overflow are reported at each sync.
+"""
+
+import os
+import time
+import queue
+import threading
+
+
+class LogWriter:
+
+    QUEUE_SIZE = 4096  # max. lines waiting, further lines are dropped
+    SYNC_INTERVAL = 1.0  # [s]
+    SYNC_BYTES = 64 * 1024
+
+    def __init__(self, file_name, syncInterval = SYNC_INTERVAL, syncBytes = SYNC_BYTES, queueSize = QUEUE_SIZE):
+        """Open the log file (raises OSError) and start the writer."""
+        self.file = open(file_name, 'w')
+        self.name = file_name
+        self.syncInterval = syncInterval
+        self.syncBytes = syncBytes
+        self.dropped = 0  # lines lost on queue overflow
+        self.reported = 0  # dropped lines reported so far
+        self.error = None  # exception which stopped the writer thread
+        self.closed = False
+        self.queue = queue.Queue(queueSize)
+        self.thread = threading.Thread(target=self.__run, daemon=True)
+        self.thread.start()
+
+
+    def write(self, line):
+        """Queue a line, never blocks."""
+        if self.closed:
+            return
+        if not self.thread.is_alive():
+            # nothing would write the lines any more
+            self.closed = True
+            print("ERROR: log writer of {} stopped ({}), logging off".format(self.name, self.error))
+            return
+        try:
+            self.queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+
+    def close(self):
+        """Write the queued lines, sync and close the file, also after the writer died."""
+        if self.thread.is_alive() and not self.closed:
+            self.queue.put(None)
+            self.thread.join()
+        self.closed = True
+        self.file.close()
+        self.__reportDropped()
+
+
+    def __reportDropped(self):
+        dropped = self.dropped
+        if dropped > self.reported:
+            print("WARNING: {} log lines dropped in {}".format(dropped - self.reported, self.name))
+            self.reported = dropped
+
+
+    def __run(self):
+        try:
+            self.__writeLines()
+        except Exception as e:
+            self.error = e
+            raise
+        finally:
+            self.file.close()
+
+
+    def __writeLines(self):
+        unsynced = 0
+        syncTime = time.monotonic() + self.syncInterval
+        while True:
+            # wait for lines until the next sync is due
+            try:
+                lines = [self.queue.get(timeout = max(0, syncTime - time.monotonic()))]
+            except queue.Empty:
+                lines = []
+            # batch whatever else is queued
+            while True:
+                try:
+                    lines.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stop = None in lines
+            if stop:
+                lines = lines[:lines.index(None)]
+            if lines:
+                data = "".join(lines)
+                self.file.write(data)
+                unsynced += len(data)
+            
+            if stop or (unsynced > 0 and (unsynced >= self.syncBytes or time.monotonic() >= syncTime)):
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                unsynced = 0
+            if time.monotonic() >= syncTime:
+                syncTime = time.monotonic() + self.syncInterval
+                self.__reportDropped()
+            
+            if stop:
+                return
+
+# eof
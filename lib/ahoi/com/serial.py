@@ -37,20 +37,52 @@
 
 #import sys
 import time
+import queue
+import itertools
+import threading
+from collections import namedtuple
+from concurrent.futures import Future
 
 import serial
 from serial.tools.list_ports import comports
 
 from ahoi.com.base import ModemBaseCom
+from ahoi.com.streamer import Streamer
+from ahoi.modem.packet import isCmdType
+from ahoi.modem.packet import byteArrayToPacket
+from ahoi.modem.packet import HEADER_FORMAT
+
+
+# encoded packet with its TX priority and airtime (see ModemSerialCom.prepareFrame)
+TxFrame = namedtuple('TxFrame', ['tx', 'prio', 'airtime'])
 
 
 class ModemSerialCom(ModemBaseCom):
   
+    BAUDRATE = 115200
+    UART_BITS_PER_OCTET = 10  # start, 8 data and stop bit
+    
+    # modem airtime of a data packet: header bits and net bit rate of the
+    # default PHY (4 bits/symbol, 2.56 ms symbols, 3 repetitions, Hamming)
+    AIR_HEADER_BITS = 48
+    AIR_BITRATE = 4 / (3 * 0.00256) * 0.5
+    
+    # TX priorities, modem commands go ahead of the packets, the packets keep
+    # their order (a request must not overtake the data queued before it)
+    TX_PRIO_HIGH = 0
+    TX_PRIO_DATA = 1
+    
+    TX_QUEUE_SIZE = 64  # max. frames waiting, send blocks when full
+  
     def __init__(self, dev = None, cb = None):
         """Initialize serial com."""
         super().__init__(dev, cb)
         self.com = None
-        self.txDelay = 0.1
+        self.airBitrate = self.AIR_BITRATE  # None: no airtime pacing
+        self.txQueue = queue.PriorityQueue(self.TX_QUEUE_SIZE)
+        self.txSeq = itertools.count()  # FIFO order within a priority
+        self.txThread = None
+        self.txLock = threading.Lock()
     
     
     def __del__(self):
@@ -67,7 +99,7 @@ class ModemSerialCom(ModemBaseCom):
             print("Using serial connection at %s" % self.dev)
             self.com = serial.Serial(
                 port = self.dev,
-                baudrate = 115200,
+                baudrate = self.BAUDRATE,
                 parity = serial.PARITY_NONE,
                 stopbits = serial.STOPBITS_ONE,
                 bytesize = serial.EIGHTBITS,
@@ -92,6 +124,14 @@ class ModemSerialCom(ModemBaseCom):
 
     def close(self):
         """Terminate."""
+        with self.txLock:
+            if self.txThread is not None:
+                # stop the writer after the frames already queued
+                self.txQueue.put((self.TX_PRIO_DATA + 1, next(self.txSeq), None, 0, None))
+                if self.txThread is not threading.current_thread():
+                    self.txThread.join()
+                self.txThread = None
+        
         try:
             self.com.close()
         except:
@@ -122,16 +162,92 @@ class ModemSerialCom(ModemBaseCom):
 
 
     def send(self, pkt):
-        """Send a packet."""
-        if not self.com or not self.com.is_open:
-            print("ERROR: Cannot send packet, serial connection not open")
-            return
-    
-        # send encoded data
-        tx = super().processTx(pkt)
-        self.com.write(tx)
+        """Queue a packet, return a future completed when it is on the wire.
+        
+        The result of the future is the time the frame was written [ns, time.time_ns()].
+        """
+        return self.__enqueue(super().processTx(pkt), *self.__schedule([pkt]))
+
 
-        time.sleep(self.txDelay)
+    def sendBytes(self, tx, prio = None, airtime = None):
+        """Queue encoded packets, return a future completed when they are on the wire.
+        
+        Without priority and airtime, the frames are decoded to get them, as for
+        send. The frames prepared by prepareFrame carry them (see sendFrame).
+        """
+        if prio is None or airtime is None:
+            pkts = [byteArrayToPacket(frame) for frame in Streamer().decode(tx) if len(frame) >= len(HEADER_FORMAT)]
+            prio, airtime = self.__schedule(pkts)
+        return self.__enqueue(tx, prio, airtime)
+    
+    
+    def prepareFrame(self, pkt):
+        """Encode a packet with its priority and airtime, to send it later with sendFrame."""
+        return TxFrame(super().processTx(pkt), *self.__schedule([pkt]))
+    
+    
+    def sendFrame(self, frame):
+        """Queue a frame prepared by prepareFrame, without decoding it again."""
+        return self.sendBytes(frame.tx, frame.prio, frame.airtime)
+    
+    
+    def __schedule(self, pkts):
+        """TX priority and total airtime of packets."""
+        # modem commands are not transmitted
+        pkts = [pkt for pkt in pkts if not isCmdType(pkt)]
+        if not pkts:
+            return self.TX_PRIO_HIGH, 0
+        return self.TX_PRIO_DATA, sum(self.airtime(pkt) for pkt in pkts)
+    
+    
+    def airtime(self, pkt):
+        """Modem airtime of a packet [s]."""
+        if not self.airBitrate:
+            return 0
+        return (self.AIR_HEADER_BITS + 8 * len(pkt.payload)) / self.airBitrate
+    
+    
+    def uartTime(self, tx):
+        """Time to shift an encoded packet over the UART [s]."""
+        return len(tx) * self.UART_BITS_PER_OCTET / self.BAUDRATE
+    
+    
+    def __enqueue(self, tx, prio, airtime):
+        with self.txLock:
+            if self.txThread is None:
+                self.txThread = threading.Thread(target=self.__transmit, daemon=True)
+                self.txThread.start()
+        future = Future()
+        self.txQueue.put((prio, next(self.txSeq), tx, airtime, future))
+        return future
+    
+    
+    def __transmit(self):
+        """Write the queued frames, paced by their UART and modem airtime."""
+        while True:
+            prio, seq, tx, airtime, future = self.txQueue.get()
+            if tx is None:
+                return
+            
+            if not self.com or not self.com.is_open:
+                print("ERROR: Cannot send packet, serial connection not open")
+                future.set_exception(serial.SerialException("serial connection not open"))
+                continue
+            
+            startSec = time.monotonic()
+            try:
+                self.com.write(tx)
+                self.com.flush()
+            except Exception as e:
+                print("ERROR: Cannot send packet: %s" % str(e))
+                future.set_exception(e)
+                continue
+            future.set_result(time.time_ns())
+            
+            # the modem takes the next frame once this one is transmitted
+            waitSec = self.uartTime(tx) + airtime - (time.monotonic() - startSec)
+            if waitSec > 0:
+                time.sleep(waitSec)
     
 
     def scan():
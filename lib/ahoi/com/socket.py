@@ -50,6 +50,8 @@ class ModemSocketCom(ModemBaseCom):
     
     CLIENT_TIMEOUT = 1.0
     SERVER_TIMEOUT = 1.0
+    
+    RX_BUFSIZE = 4096  # max. octets per recv
   
     def __init__(self, host = '', port = None, cb = None):
         """Initialize socket com."""
@@ -178,8 +180,9 @@ class ModemSocketCom(ModemBaseCom):
             
             while self.conn and not self.__forceClose:
                 try:
-                    #rx = self.conn.recv(1, socket.MSG_CMSG_CLOEXEC)
-                    rx = self.conn.recv(1)
+                    # read whatever is available (up to RX_BUFSIZE), the
+                    # streamer decodes whole chunks
+                    rx = self.conn.recv(self.RX_BUFSIZE)
                     if not rx:
                         if not self.serverMode:
                             print("ERROR: socket probably disconnected")
@@ -202,7 +205,11 @@ class ModemSocketCom(ModemBaseCom):
         """Send a packet."""
         
         # send encoded data
-        tx = super().processTx(pkt)
+        self.sendBytes(super().processTx(pkt))
+
+
+    def sendBytes(self, tx):
+        """Send an encoded packet."""
         self.conn.sendall(tx)
         
         
@@ -85,6 +85,63 @@ class Streamer:
         return None
       
       
+    def decode(self, rx):
+        """Decode a chunk of received bytes, return the list of completed packets.
+
+        Same state machine as dec, but the bytes between two DLEs are
+        handled as whole slices (bytes.find), and the stuffed DLEs are
+        removed with a single replace per packet segment.
+        """
+        rx = bytes(rx)
+        frames = []
+        pos = 0
+        n = len(rx)
+        while pos < n:
+            if not self.flagInPacket:
+                if not self.flagDLE:
+                    # skip to the next DLE
+                    i = rx.find(self.DLE, pos)
+                    if i < 0:
+                        break
+                    self.flagDLE = True
+                    pos = i + 1
+                # after a DLE outside a packet, the next STX starts a packet
+                i = rx.find(self.STX, pos)
+                if i < 0:
+                    break
+                self.flagDLE = False
+                self.flagInPacket = True
+                pos = i + 1
+            elif self.flagDLE:
+                # DLE at the end of the previous chunk
+                b = rx[pos]
+                pos = pos + 1
+                self.flagDLE = False
+                if b == self.ETX:
+                    self.flagInPacket = False
+                    frames.append(copy.copy(self.res))
+                    del self.res[:]
+                elif b == self.DLE:
+                    self.res.append(b)
+                else:
+                    del self.res[:]
+                    self.flagInPacket = False
+            else:
+                # find the end of the packet, skipping the stuffed DLEs
+                start = pos
+                i = rx.find(self.DLE, pos)
+                while 0 <= i < n - 1 and rx[i + 1] == self.DLE:
+                    i = rx.find(self.DLE, i + 2)
+                if i < 0:
+                    self.res.extend(rx[start:].replace(b"\x10\x10", b"\x10"))
+                    break
+                self.res.extend(rx[start:i].replace(b"\x10\x10", b"\x10"))
+                # the DLE is either the last byte of the chunk or a control sequence
+                self.flagDLE = True
+                pos = i + 1
+        return frames
+      
+      
     def enc(self, pktbytes):
         res = bytearray([0x10, 0x02]) # start Packet
         for b in pktbytes:
@@ -47,6 +47,7 @@ from io import BytesIO
 
 # modem imports
 from ahoi.modem.modem import Modem
+from ahoi.modem.profile import makeProfile
 from ahoi.modem.packet import getHeaderBytes
 from ahoi.modem.packet import getFooterBytes
 
@@ -211,20 +212,7 @@ class ImageTx():
             filename += "_packets.log"
             self.myModem.logOn(file_name=filename)
         
-        self.myModem.id()
-        self.myModem.getVersion()
-        self.myModem.getConfig()
-        self.myModem.bitSpread(bitSpread)
-        self.myModem.txGain(txGain)
-        if agc:
-            self.myModem.agc(1)
-            self.myModem.rxGain()
-        else:
-            self.myModem.agc(0)
-            self.myModem.rxGain(rxGain)
-            
-        self._clearModemStats()
-        self._getModemStats()
+        self.myModem.configure(makeProfile(bitSpread=bitSpread, txGain=txGain, agc=agc, rxGain=rxGain))
         
         
     def _clearModemStats(self):
@@ -0,0 +1,225 @@
+#
+# Copyright 2016-2019
+# 
+# Bernd-Christian Renner, Jan Heitmann, and
+# Hamburg University of Technology (TUHH).
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# 
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+"""Module for the asyncio modem.
+
+Several modems and the protocol logic can run on a single event loop,
+without a receive thread per connection:
+
+    modem = AsyncModem()
+    await modem.connect("tcp@192.168.0.10")
+    version = await modem.getVersion()
+    await modem.send(src=0, dst=1, type=0x02, payload=b"data")
+    async for pkt in modem:
+        ...
+
+The iteration ends when the connection is lost (or closed), receive and the
+commands then raise ConnectionError.
+
+The commands are those of Modem (see commands.COMMANDS), a profile is
+applied with configure (see profile.py).
+"""
+
+import asyncio
+from collections import deque
+
+from ahoi.modem.packet import makePacket
+from ahoi.modem.packet import isCmdType
+from ahoi.modem.commands import COMMANDS
+from ahoi.modem.commands import makeCommand
+
+from ahoi.com.aio import AsyncModemBaseCom
+from ahoi.com.aio import AsyncModemSerialCom
+from ahoi.com.aio import AsyncModemSocketCom
+
+
+class AsyncModem():
+    """ahoi Acoustic Underwater Modem on an asyncio event loop."""
+
+    RX_QUEUE_SIZE = 256  # max. received packets waiting, the oldest are dropped
+
+    def __init__(self):
+        """Initialize modem."""
+        self.timeout = 1.0  # timeout for response to any command
+        self.seqNumber = 0
+        self.com = None
+        self.rxQueue = None  # received packets which are not command responses, None once the connection is lost
+        self.rxDropped = 0  # packets dropped because the queue was full
+        self.pendingCommands = {}  # command type -> futures waiting for the response, oldest first
+
+    async def connect(self, dev):
+        """Connect to a serial port, or to a TCP server with the "tcp@host[:port]" prefix."""
+        if isinstance(dev, AsyncModemBaseCom):
+            self.com = dev
+        elif dev.startswith("tcp@"):
+            tcpparts = dev[4:].split(':')
+            self.com = AsyncModemSocketCom(tcpparts[0], tcpparts[1] if len(tcpparts) > 1 else None)
+        else:
+            self.com = AsyncModemSerialCom(dev)
+        self.rxQueue = asyncio.Queue(self.RX_QUEUE_SIZE)
+        await self.com.connect(self.__receivePacket, self.__connectionLost)
+
+    def close(self):
+        """Terminate."""
+        if self.com:
+            self.com.close()
+        for pending in self.pendingCommands.values():
+            for future in pending:
+                future.cancel()
+        self.pendingCommands = {}
+
+    def __receivePacket(self, pkt):
+        # a command response completes the oldest command of its type
+        if isCmdType(pkt):
+            pending = self.pendingCommands.get(pkt.header.type)
+            while pending:
+                future = pending.popleft()
+                if not future.done():
+                    future.set_result(pkt)
+                    return
+        if self.rxQueue.full():
+            # nobody reads the packets, keep the latest ones
+            self.rxQueue.get_nowait()
+            self.rxDropped += 1
+        self.rxQueue.put_nowait(pkt)
+
+    def __connectionLost(self, exc):
+        # wake up the readers of the queue
+        if self.rxQueue.full():
+            self.rxQueue.get_nowait()
+            self.rxDropped += 1
+        self.rxQueue.put_nowait(None)
+        # no response will come
+        for pending in self.pendingCommands.values():
+            for future in pending:
+                if not future.done():
+                    future.set_exception(ConnectionError("connection to %s lost" % self.com.dev))
+
+    async def __nextPacket(self):
+        pkt = await self.rxQueue.get()
+        if pkt is None:
+            # keep the end of the connection for the other readers
+            self.rxQueue.put_nowait(None)
+        return pkt
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        """Next received packet, command responses excepted, until the connection is lost."""
+        pkt = await self.__nextPacket()
+        if pkt is None:
+            raise StopAsyncIteration
+        return pkt
+
+    async def receive(self):
+        """Wait for the next received packet, command responses excepted, raise ConnectionError once the connection is lost."""
+        pkt = await self.__nextPacket()
+        if pkt is None:
+            raise ConnectionError("connection to %s lost" % self.com.dev)
+        return pkt
+
+    async def send(self, src, dst, type, payload=bytearray(), status=0, dsn=None):
+        """Send a packet."""
+        if dsn is None or dsn > 255:
+            dsn = self.seqNumber
+        await self.com.send(makePacket(src, dst, type, status, dsn, payload))
+        self.seqNumber = (self.seqNumber + 1) % 256
+
+    async def command(self, type, payload=bytearray(), timeout=None):
+        """Send a command and wait for its response, raise asyncio.TimeoutError without response."""
+        future = asyncio.get_running_loop().create_future()
+        if type not in self.pendingCommands:
+            self.pendingCommands[type] = deque()
+        self.pendingCommands[type].append(future)
+        try:
+            await self.com.send(makePacket(type=type, payload=payload))
+            self.seqNumber = (self.seqNumber + 1) % 256
+            return await asyncio.wait_for(future, self.timeout if timeout is None else timeout)
+        finally:
+            # a command which timed out does not take the response of a later one
+            if future in self.pendingCommands.get(type, ()):
+                self.pendingCommands[type].remove(future)
+
+    async def configure(self, profile):
+        """Send all the commands of a profile at once and collect their responses.
+
+        Returns a dict: command name -> response packet, None if the modem did
+        not answer within the timeout (see Modem.configure).
+        """
+        for name, _ in profile:
+            if name not in COMMANDS:
+                raise ValueError("%s is not a modem command" % name)
+        loop = asyncio.get_running_loop()
+        commands = []
+        frames = []
+        for name, args in profile:
+            pkt = makeCommand(name, *args)
+            future = loop.create_future()
+            self.pendingCommands.setdefault(pkt.header.type, deque()).append(future)
+            commands.append((name, pkt.header.type, future))
+            frames.append(self.com.processTx(pkt))
+        try:
+            await self.com.sendBytes(b"".join(frames))
+            self.seqNumber = (self.seqNumber + len(frames)) % 256
+            await asyncio.wait([future for _, _, future in commands], timeout=self.timeout)
+        finally:
+            for _, type, future in commands:
+                if future in self.pendingCommands.get(type, ()):
+                    self.pendingCommands[type].remove(future)
+        return {name: future.result() if future.done() and not future.cancelled() else None
+                for name, _, future in commands}
+
+
+def _commandMethod(name):
+    """AsyncModem method sending a command of the table and waiting for its response."""
+    argNames = [argName for argName, _ in COMMANDS[name].args]
+
+    async def method(self, *args, timeout=None, **kwargs):
+        args = list(args) + [kwargs.pop(argName, None) for argName in argNames[len(args):]]
+        if kwargs:
+            raise TypeError("%s() got unexpected arguments %s" % (name, ", ".join(kwargs)))
+        pkt = makeCommand(name, *args)
+        return await self.command(pkt.header.type, pkt.payload, timeout)
+
+    method.__name__ = name
+    method.__doc__ = "Send the %s command (%s), return its response." % (name, ", ".join(argNames) or "no argument")
+    return method
+
+
+for _name in COMMANDS:
+    setattr(AsyncModem, _name, _commandMethod(_name))
+
+# eof
@@ -0,0 +1,100 @@
+#
+# Copyright 2016-2019
+# 
+# Bernd-Christian Renner, Jan Heitmann, and
+# Hamburg University of Technology (TUHH).
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# 
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+"""Module for the modem commands.
+
+The table of the commands, shared by Modem, AsyncModem and the profiles
+(see profile.py): command name -> type and arguments, each argument as
+(name, octets). A command is sent with all its arguments (set) or none (get).
+"""
+
+from collections import namedtuple
+
+from ahoi.modem.packet import makePacket
+
+
+Command = namedtuple('Command', ['type', 'args'])
+
+COMMANDS = {
+    "getVersion":      Command(0x80, ()),
+    "getConfig":       Command(0x83, ()),
+    "id":              Command(0x84, (("id", 1),)),
+    "getBatVoltage":   Command(0x85, ()),
+    "startBootloader": Command(0x86, ()),
+    "reset":           Command(0x87, ()),
+    "sleep":           Command(0x88, ()),
+    "pktPin":          Command(0x89, (("mode", 1),)),
+    "freqBandsNum":    Command(0x90, (("num", 1),)),
+    "freqBands":       Command(0x91, ()),
+    "freqCarrierNum":  Command(0x92, (("num", 1),)),
+    "freqCarriers":    Command(0x93, ()),
+    "rxThresh":        Command(0x94, (("thresh", 1),)),
+    "bitSpread":       Command(0x95, (("chips", 1),)),
+    "filterRaw":       Command(0x96, (("stage", 1), ("level", 1))),  # Modem.filterRaw takes the level in hex
+    "syncLen":         Command(0x97, (("txlen", 1), ("rxlen", 1))),
+    "agc":             Command(0x98, (("status", 1),)),
+    "rxGainRaw":       Command(0x99, (("stage", 1), ("level", 1))),
+    "txGain":          Command(0x9A, (("value", 1),)),
+    "peakWinLen":      Command(0x9B, (("winlen", 2),)),
+    "transducer":      Command(0x9C, (("t", 1),)),
+    "rxGain":          Command(0x9E, (("level", 1),)),
+    "sample":          Command(0xA0, (("trigger", 1), ("num", 2), ("post", 2))),
+    "sniffMode":       Command(0xA1, (("status", 1),)),
+    "rangeDelay":      Command(0xA8, (("delay", 4),)),
+    "testFreq":        Command(0xB1, (("freqIdx", 1), ("freqLvl", 1))),
+    "testSweep":       Command(0xB2, (("gc", 1), ("gap", 1))),
+    "testNoise":       Command(0xB3, (("gc", 1), ("step", 1), ("dur", 1))),
+    "testSound":       Command(0xB4, (("dur", 1),)),
+    "getPowerLevel":   Command(0xB8, ()),
+    "rxLevel":         Command(0xB9, ()),
+    "getPacketStat":   Command(0xC0, ()),
+    "clearPacketStat": Command(0xC1, ()),
+    "getSyncStat":     Command(0xC2, ()),
+    "clearSyncStat":   Command(0xC3, ()),
+    "getSfdStat":      Command(0xC4, ()),
+    "clearSfdStat":    Command(0xC5, ()),
+}
+
+
+def makeCommand(name, *args):
+    """Make the packet of a command, without payload if any argument is None."""
+    command = COMMANDS[name]
+    data = bytearray()
+    if len(args) == len(command.args) and None not in args:
+        for value, (_, octets) in zip(args, command.args):
+            data += int(value).to_bytes(octets, 'big')
+    return makePacket(type=command.type, payload=data)
+
+# eof
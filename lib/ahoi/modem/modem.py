@@ -40,10 +40,14 @@ import string
 import os.path
 import threading
 import subprocess
+from collections import deque
+from concurrent.futures import Future, TimeoutError, wait
 
 from ahoi.modem.packet import makePacket
 from ahoi.modem.packet import packet2HexString
 from ahoi.modem.packet import isCmdType
+from ahoi.modem.commands import COMMANDS
+from ahoi.modem.commands import makeCommand
 
 from ahoi.com.base import ModemBaseCom
 from ahoi.com.serial import ModemSerialCom
@@ -58,8 +62,15 @@ class Modem():
         self.timeout = 1.0  # timeout for response to any command
         self.blocking = False
         self.seqNumber = 0
-        self.rxCallbacks = []
-        self.rxHandlers = []
+        # rx dispatch table: (type, src) -> tuple of functions, None matches any type or source
+        # the table and its tuples are replaced on add/remove (copy-on-write),
+        # so a dispatch in progress keeps iterating over its own snapshot
+        self.rxSubscribers = {}
+        self.rxSubscribersLock = threading.Lock()
+        # futures of the commands waiting for their response: command type -> [deadline, future, timer], oldest first
+        self.pendingCommands = {}
+        self.pendingCommandsLock = threading.Lock()
+        self.__batch = None  # frames of the commands of a configuration, sent at once (see configure)
         #self.logFile = None
         self.rxThread = None
         self.echoTx = False
@@ -99,29 +110,45 @@ class Modem():
         
         self.com.connect(self.__receivePacket)
         
-    # activate blocking mode
+    # activate blocking mode: the commands wait for their response (or the timeout) before returning
     def setModeBlocking(self, block = True):
         #self.timeout = to
         self.blocking = block
 
-    def addRxCallback(self, cb):
-        """Add a function to be called on rx pkt."""
-        self.rxCallbacks.append(cb)
+    def addRxCallback(self, cb, type=None, src=None):
+        """Add a function to be called on rx pkt of a type and source (any if None)."""
+        self.__subscribe((type, src), cb)
 
-    def removeRxCallback(self, cb):
-        """Remove a function to be called on rx pkt."""
-        if cb in self.rxCallbacks:
-            self.rxCallbacks.remove(cb)
+    def removeRxCallback(self, cb, type=None, src=None):
+        """Remove a function to be called on rx pkt, with the type and source it was added with."""
+        self.__unsubscribe((type, src), cb)
         
-    def addRxHandler(self, cb, type=None):
-        """Add a handler (class) to be called on rx pkt."""
-        # add filter for packet types
-        self.rxHandlers.append(cb)
+    def addRxHandler(self, h, type=None, src=None):
+        """Add a handler (class) to be called on rx pkt of a type and source (any if None)."""
+        self.__subscribe((type, src), h.handlePkt)
         
-    def removeRxHandler(self, h, type=None):
-       """Remove a handler (class) to be called on rx pkt."""
-       if h in self.rxHandlers:
-           self.rxHandlers.remove(h)
+    def removeRxHandler(self, h, type=None, src=None):
+       """Remove a handler (class) to be called on rx pkt, with the type and source it was added with."""
+       self.__unsubscribe((type, src), h.handlePkt)
+
+    def __subscribe(self, key, f):
+        with self.rxSubscribersLock:
+            subscribers = dict(self.rxSubscribers)
+            subscribers[key] = subscribers.get(key, ()) + (f,)
+            self.rxSubscribers = subscribers
+
+    def __unsubscribe(self, key, f):
+        with self.rxSubscribersLock:
+            if f not in self.rxSubscribers.get(key, ()):
+                return
+            subscribers = dict(self.rxSubscribers)
+            functions = list(subscribers[key])
+            functions.remove(f)
+            if len(functions) > 0:
+                subscribers[key] = tuple(functions)
+            else:
+                del subscribers[key]
+            self.rxSubscribers = subscribers
 
     def close(self):
         """Terminate."""
@@ -146,13 +173,17 @@ class Modem():
 #            self.logFile.flush()
 #            os.fsync(self.logFile.fileno())
         
-        # FIXME right position?
-        self.__waitResp = False  # received packet, unblock
+        # a command response completes the oldest command of its type
+        if isCmdType(pkt):
+            self.__completeCommand(pkt)
         
-        for f in self.rxCallbacks:
-            f(pkt)
-        for h in self.rxHandlers:
-            h.handlePkt(pkt)
+        # only the matching subscribers are called: exact match first, then type only, source only and any
+        subscribers = self.rxSubscribers
+        type = pkt.header.type
+        src = pkt.header.src
+        for key in ((type, src), (type, None), (None, src), (None, None)):
+            for f in subscribers.get(key, ()):
+                f(pkt)
     
     
     def receive(self, thread = False):
@@ -171,8 +202,137 @@ class Modem():
         pkt = makePacket(src, dst, type, status, dsn, payload)
         return self.__sendPacket(pkt)
 
+    def prepareFrame(self, pkt):
+        """Encode a packet into the byte stream of the connection."""
+        return self.com.prepareFrame(pkt)
+
+    def sendFrame(self, frame):
+        """Send a frame prepared by prepareFrame, a single write on the connection.
+
+        Returns a future completed when the frame is on the wire (see __sendPacket).
+        """
+        txFuture = self.__written(self.com.sendFrame(frame))
+
+        # manage seqnos
+        self.seqNumber = (self.seqNumber + 1) % 256
+        return txFuture
+
+    def __written(self, txFuture):
+        """Future of a write on the connection, completed at once if the connection writes synchronously."""
+        if not isinstance(txFuture, Future):
+            txFuture = Future()
+            txFuture.set_result(time.time_ns())
+        return txFuture
+
+    def __addPendingCommand(self, type):
+        future = Future()
+        with self.pendingCommandsLock:
+            if type not in self.pendingCommands:
+                self.pendingCommands[type] = deque()
+            # the timeout starts once the frame is on the wire (see __startTimeout)
+            self.pendingCommands[type].append([float("inf"), future, None])
+        return future
+
+    def __startTimeout(self, txFuture, commands):
+        """Start the response timeout of the commands (type, future) when their frames are written.
+
+        A timer fails the future of a command with TimeoutError once its deadline
+        passes, so a command that never gets a response (e.g. reset) does not stay pending.
+        """
+        def onWritten(txFuture):
+            error = txFuture.exception()
+            if error is not None:
+                # never sent, no response will come
+                for type, future in commands:
+                    self.__expireCommand(type, future, error)
+                return
+            deadline = time.monotonic() + self.timeout
+            with self.pendingCommandsLock:
+                for type, future in commands:
+                    for entry in self.pendingCommands.get(type, ()):
+                        if entry[1] is future:
+                            entry[0] = deadline
+                            entry[2] = threading.Timer(self.timeout, self.__expireCommand, (type, future))
+                            entry[2].daemon = True
+                            entry[2].start()
+        txFuture.add_done_callback(onWritten)
+
+    def __completeCommand(self, pkt):
+        now = time.monotonic()
+        future = None
+        with self.pendingCommandsLock:
+            pending = self.pendingCommands.get(pkt.header.type, ())
+            while len(pending) > 0 and future is None:
+                deadline, f, timer = pending.popleft()
+                if timer is not None:
+                    timer.cancel()
+                if deadline >= now:
+                    future = f
+                else:
+                    # this command timed out, the response belongs to a later one
+                    f.set_exception(TimeoutError("no response to command 0x%02X" % pkt.header.type))
+        if future is not None:
+            future.set_result(pkt)
+
+    def __expireCommand(self, type, future, error=None):
+        expired = False
+        with self.pendingCommandsLock:
+            pending = self.pendingCommands.get(type, ())
+            for entry in list(pending):
+                if entry[1] is future:
+                    pending.remove(entry)
+                    if entry[2] is not None:
+                        entry[2].cancel()
+                    expired = True
+        # a command no longer pending is being completed by its response
+        if expired and not future.done():
+            future.set_exception(error or TimeoutError("no response to command 0x%02X" % type))
+
+    def configure(self, profile):
+        """Send all the commands of a profile at once and collect their responses.
+
+        The frames of the commands are written in a single send, so the commands
+        do not wait for each other (see profile.py for the profiles).
+
+        Returns a dict: command name -> response packet, None if the modem did
+        not answer within the timeout.
+        """
+        for name, _ in profile:
+            if name not in COMMANDS:
+                raise ValueError("%s is not a modem command" % name)
+        self.__batch = []
+        try:
+            commands = [(name, getattr(self, name)(*args)) for name, args in profile]
+        finally:
+            frames, self.__batch = self.__batch, None
+        pending = [(type, future) for _, type, future in frames if future is not None]
+        for name, future in commands:
+            if not isinstance(future, Future):
+                for type, f in pending:
+                    self.__expireCommand(type, f, ValueError("configuration not sent"))
+                raise ValueError("%s is not a modem command" % name)
+        txFuture = self.__written(self.com.sendBytes(b"".join(frame for frame, _, _ in frames)))
+        self.__startTimeout(txFuture, pending)
+
+        # the timeout starts once the frames are on the wire
+        txFuture.exception()
+        deadline = time.monotonic() + self.timeout
+        state = {}
+        for name, future in commands:
+            try:
+                state[name] = future.result(timeout=max(0, deadline - time.monotonic()))
+            except TimeoutError:
+                print("timeout: %s" % name)
+                state[name] = None
+        return state
+
     def __sendPacket(self, pkt):
-        """Send a packet."""
+        """Send a packet.
+
+        A command returns the future of its response, any other packet the future
+        of its transmission, completed with the time [ns, time.time_ns()] its frame
+        is on the wire.
+        """
         # output
         if self.echoTx:
             output = "TX@"
@@ -182,137 +342,107 @@ class Modem():
             print(output)
             # packet.printPacket(pkt)
         
-        # hand over to com
-        self.com.send(pkt)  # FIXME how to handle delays with different connections?
+        # register the command first, its response may arrive before com.send returns
+        future = self.__addPendingCommand(pkt.header.type) if isCmdType(pkt) else None
+
+        # hand over to com, or keep the frame for the batch of configure
+        if self.__batch is not None:
+            self.__batch.append((self.com.processTx(pkt), pkt.header.type, future))
+            txFuture = None
+        else:
+            txFuture = self.__written(self.com.send(pkt))
+            if future is not None:
+                self.__startTimeout(txFuture, [(pkt.header.type, future)])
 
         # manage seqnos
         self.seqNumber = (self.seqNumber + 1) % 256
         
-        # FIXME how to handle delays with different connections?
-        if self.blocking and isCmdType(pkt):
-            self.__waitResp = True
-            n = self.timeout / 10e-3
-            while n > 0 and self.__waitResp:
-                time.sleep(10e-3)
-                n = n - 1
-              
-            if n == 0 and self.__waitResp:
+        if future is None:
+            return txFuture
+
+        # the future completes with the response of the command or fails after the timeout
+        if self.blocking and self.__batch is None:
+            # the timeout starts once the frame is on the wire
+            txFuture.exception()
+            if not wait([future], timeout=self.timeout).done:
                 print("timeout")
-                # FIXME through exception or so, if not received?
-        #else:
-        #    time.sleep()
+                self.__expireCommand(pkt.header.type, future)
         
-        return 0 # HOTFIX to avoid mosh showing improper parameter use for commands
-        #return not self.__waitResp
+        return future
 
     def getVersion(self):
         """Get firmware version."""
-        pkt = makePacket(type=0x80)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("getVersion"))
 
     def getBatVoltage(self):
         """Get Battery Voltage."""
-        pkt = makePacket(type=0x85)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("getBatVoltage"))
 
     def getConfig(self):
         """Get modem config."""
-        pkt = makePacket(type=0x83)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("getConfig"))
 
     def getPowerLevel(self):
         """Get power level."""
-        pkt = makePacket(type=0xB8)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("getPowerLevel"))
 
     def getPacketStat(self):
         """Get packet statistics."""
-        pkt = makePacket(type=0xC0)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("getPacketStat"))
 
     def clearPacketStat(self):
         """Clear packet statistics."""
-        pkt = makePacket(type=0xC1)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("clearPacketStat"))
 
     def getSyncStat(self):
         """Get sync statistics."""
-        pkt = makePacket(type=0xC2)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("getSyncStat"))
 
     def clearSyncStat(self):
         """Clear sync statistics."""
-        pkt = makePacket(type=0xC3)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("clearSyncStat"))
 
     def getSfdStat(self):
         """Get sfd statistics."""
-        pkt = makePacket(type=0xC4)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("getSfdStat"))
 
     def clearSfdStat(self):
         """Clear sfd statistics."""
-        pkt = makePacket(type=0xC5)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("clearSfdStat"))
 
     def freqBandsNum(self, num=None):
         """Get or Set number of freq bands."""
-        data = bytearray()
-        if num is not None:
-            data = num.to_bytes(1, 'big')
-        pkt = makePacket(type=0x90, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("freqBandsNum", num))
 
     def freqBands(self):
         """Get or Set freq bands."""
         print("WARNING: No setter for freqBands implemented.")
-        data = bytearray()
-        pkt = makePacket(type=0x91, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("freqBands"))
 
     def freqCarrierNum(self, num=None):
         """Get or Set number of carriers."""
-        data = bytearray()
-        if num is not None:
-            data = num.to_bytes(1, 'big')
-        pkt = makePacket(type=0x92, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("freqCarrierNum", num))
 
     def freqCarriers(self):
         """Get or Set carriers."""
         print("WARNING: No setter for freqCarriers implemented.")
-        data = bytearray()
-        pkt = makePacket(type=0x93, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("freqCarriers"))
 
     def rangeDelay(self, delay=None):
         """Set delay for ranging answer."""
-        data = bytearray()
-        if delay is not None:
-            data = delay.to_bytes(4, 'big')
-        pkt = makePacket(type=0xA8, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("rangeDelay", delay))
 
     def rxThresh(self, thresh=None):
         """Get or Set rx threshold."""
-        data = bytearray()
-        if thresh is not None:
-            data = thresh.to_bytes(1, 'big')
-        pkt = makePacket(type=0x94, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("rxThresh", thresh))
 
     def rxLevel(self):
         """Get rx level."""
-        pkt = makePacket(type=0xB9)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("rxLevel"))
 
     def bitSpread(self, chips=None):
         """Get or Set bit spread (number of chips)."""
-        data = bytearray()
-        if chips is not None:
-            data = chips.to_bytes(1, 'big')
-        pkt = makePacket(type=0x95, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("bitSpread", chips))
 
     # DEPRECATED
     def spreadCode(self, length=None):
@@ -323,157 +453,89 @@ class Modem():
         data = bytearray()
         if stage is not None and level is not None:
             data += stage.to_bytes(1, 'big')
-            # data += level.to_bytes(1, 'big')
             data += bytearray.fromhex(level)
-        pkt = makePacket(type=0x96, payload=data)
+        pkt = makePacket(type=COMMANDS["filterRaw"].type, payload=data)
         return self.__sendPacket(pkt)
 
     def syncLen(self, txlen=None, rxlen=None):
         """Get or Set length of sync."""
-        data = bytearray()
-        if txlen is not None and rxlen is not None:
-            data += int(txlen).to_bytes(1, 'big')
-            data += int(rxlen).to_bytes(1, 'big')
-        pkt = makePacket(type=0x97, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("syncLen", txlen, rxlen))
 
     def startBootloader(self):
         """Restart uC and load bootloader."""
-        pkt = makePacket(type=0x86)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("startBootloader"))
 
     def agc(self, status=None):
         """Get AGC status, and turn on or off."""
-        data = bytearray()
-        if status is not None:
-            data += status.to_bytes(1, 'big')
-        pkt = makePacket(type=0x98, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("agc", status))
 
     def sniffMode(self, status=None):
        """Get/set status of sniff mode."""
-       data = bytearray()
-       if status is not None:
-           data += status.to_bytes(1,'big')
-       pkt = makePacket(type=0xA1, payload=data)
-       return self.__sendPacket(pkt)
+       return self.__sendPacket(makeCommand("sniffMode", status))
 
     def rxGain(self, level=None):
         """Get or Set gain level of RX board (as defined by AGC)."""
-        data = bytearray()
-        if level is not None:
-            data += level.to_bytes(1, 'big')
-        pkt = makePacket(type=0x9E, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("rxGain", level))
 
     def rxGainRaw(self, stage=None, level=None):
         """Get or Set gain level of RX board."""
-        data = bytearray()
-        if stage is not None and level is not None:
-            data += stage.to_bytes(1, 'big')
-            data += level.to_bytes(1, 'big')
-        pkt = makePacket(type=0x99, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("rxGainRaw", stage, level))
 
     def peakWinLen(self, winlen=None):
         """Get or Set window length for peak detection."""
-        data = bytearray()
-        if winlen is not None:
-            winlen = int(winlen)
-            if winlen > self.MAX_PEAKWINLEN:
-                return False
-            data += winlen.to_bytes(2, 'big')
-        pkt = makePacket(type=0x9B, payload=data)
-        return self.__sendPacket(pkt)
+        if winlen is not None and int(winlen) > self.MAX_PEAKWINLEN:
+            return False
+        return self.__sendPacket(makeCommand("peakWinLen", winlen))
     
     def pktPin(self, mode=None):
         """Get or Set pkt pin mode."""
-        data = bytearray()
-        if mode is not None:
-            data += mode.to_bytes(1, 'big')
-        pkt = makePacket(type=0x89, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("pktPin", mode))
     
     def transducer(self, t=None):
         """Get or Set transducer type."""
-        data = bytearray()
-        if t is not None:
-            data += t.to_bytes(1, 'big')
-        pkt = makePacket(type=0x9C, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("transducer", t))
 
     def id(self, id=None):
         """Get or Set id of the modem."""
-        data = bytearray()
-        if id is not None:
-            data = id.to_bytes(1, 'big')
-        pkt = makePacket(type=0x84, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("id", id))
 
     def testFreq(self, freqIdx=None, freqLvl=0):
         """Test freq."""
-        data = bytearray()
-        if freqIdx is not None:
-            data  = freqIdx.to_bytes(1, 'big')
-            data += freqLvl.to_bytes(1, 'big')
-        pkt = makePacket(type=0xB1, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("testFreq", freqIdx, freqLvl))
 
     def testSweep(self, gc=False, gap=0):
         """Test sweep."""
-        data = bytearray()
-        data += gc.to_bytes(1, 'big')
-        data += gap.to_bytes(1, 'big')
-        pkt = makePacket(type=0xB2, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("testSweep", gc, gap))
 
     def testNoise(self, gc=False, step=1, dur=1):
         """Test noise."""
-        data = bytearray()
         if step < 1 or dur < 1 :
             return -1
-        data += gc.to_bytes(1, 'big')
-        data += step.to_bytes(1, 'big')
-        data += dur.to_bytes(1, 'big')
-        pkt = makePacket(type=0xB3, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("testNoise", gc, step, dur))
 
     def testSound(self, dur=100):
         """Test sound (audible)."""
-        data = bytearray()
         if dur < 1 or dur > 250:
             return -1
-        data += dur.to_bytes(1, 'big')
-        pkt = makePacket(type=0xB4, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("testSound", dur))
 
     def txGain(self, value=None):
         """Get or Set TX gain."""
-        data = bytearray()
-        if value is not None:
-            data += value.to_bytes(1, 'big')
-        pkt = makePacket(type=0x9A, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("txGain", value))
 
     def reset(self):
         """Reset the MCU of the modem."""
-        pkt = makePacket(type=0x87)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("reset"))
       
     def sleep(self):
         """Put MCU/modem in sleep mode."""
-        pkt = makePacket(type=0x88)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("sleep"))
 
     def sample(self, trigger=None, num=None, post=None):
         """Get samples of oscilloscope."""
         if trigger is None or num is None or post is None:
             return -1
-        data = trigger.to_bytes(1, 'big')
-        data += num.to_bytes(2, 'big')
-        data += post.to_bytes(2, 'big')
-        pkt = makePacket(type=0xA0, payload=data)
-        return self.__sendPacket(pkt)
+        return self.__sendPacket(makeCommand("sample", trigger, num, post))
     
     def program(self, img='ahoi.hex', empty=False):
         # check if serially connected
@@ -0,0 +1,85 @@
+#
+# Copyright 2016-2019
+# 
+# Bernd-Christian Renner, Jan Heitmann, and
+# Hamburg University of Technology (TUHH).
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+# 
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+"""Module for modem configuration profiles.
+
+A profile is the list of commands configuring a modem, as (command, args)
+tuples where command is the name of a command of commands.COMMANDS, a
+method of Modem and AsyncModem. It is sent at once with configure.
+"""
+
+import configparser
+
+
+def makeProfile(bitSpread=None, txGain=None, agc=None, rxGain=None, transducer=None):
+    """Make the profile of the usual modem bring-up.
+
+    The id, version and config of the modem are queried, the given parameters
+    are set (None to keep the current value), then the statistics are cleared
+    and queried with the power and rx levels. With agc on, the rx gain is
+    queried instead of set.
+    """
+    profile = [("id", ()), ("getVersion", ()), ("getConfig", ())]
+    if transducer is not None:
+        profile.append(("transducer", (transducer,)))
+    if bitSpread is not None:
+        profile.append(("bitSpread", (bitSpread,)))
+    if txGain is not None:
+        profile.append(("txGain", (txGain,)))
+    if agc is not None:
+        profile.append(("agc", (1 if agc else 0,)))
+    if agc:
+        profile.append(("rxGain", ()))
+    elif rxGain is not None:
+        profile.append(("rxGain", (rxGain,)))
+    profile += [("clearPacketStat", ()), ("clearSyncStat", ()), ("clearSfdStat", ()),
+                ("getPacketStat", ()), ("getSyncStat", ()), ("getSfdStat", ()),
+                ("getPowerLevel", ()), ("rxThresh", ()), ("rxLevel", ())]
+    return profile
+
+
+def loadProfile(fileName, section="MODEM_PARAMETERS"):
+    """Load the profile of the modem parameters of an INI config (see apps/image/config)."""
+    config = configparser.ConfigParser()
+    if not config.read(fileName):
+        raise FileNotFoundError("cannot read config file '%s'" % fileName)
+    params = config[section]
+    return makeProfile(bitSpread=params.getint('bitSpread'),
+                       txGain=params.getint('txGain'),
+                       agc=params.getboolean('agc'),
+                       rxGain=params.getint('rxGain'),
+                       transducer=params.getint('transducer'))
+
+# eof
@@ -1,13 +1,25 @@
 from .i_modem import IModem
 import threading
 from typing import Dict
-from lib.ahoi.modem.packet import packet2HexString, printPacket
+from lib.ahoi.modem.packet import packet2HexString
 from src.modem import Modem
 from src.constantes import BROCAST_ADDRESS, GATEWAY_ID, ID_PAQUET_TDI, ID_PAQUET_REQ_DATA, ID_PAQUET_PING, FLAG_R, \
-    ID_PAQUET_DATA, PAQUET_SIZE
+    ID_PAQUET_DATA, PAQUET_SIZE, PERIOD_MODE_FIXED, PERIOD_MODE_BACK_TO_BACK, PERIOD_MODE_PIPELINED, \
+    DEMAND_STATUS_SHIFT, INTER_PACKET_GAP_US
 from src.ModemTransmissionCalculator import ModemTransmissionCalculator
+from src.TopologyCache import TopologyCache
+from src.ToFTracker import ToFTracker
+from src.GuardIntervalTuner import GuardIntervalTuner
+from src.RequestCycle import RequestCycle
+from src.i_scheduler import IScheduler
+from src.TDAMACScheduler import TDAMACScheduler
+from src.TransmitLatencyCalibrator import TransmitLatencyCalibrator
 import time
-from src.utils.Logger import Logger as L
+from concurrent.futures import Future
+import bisect
+import math
+from src.utils.Logger import Logger as L, LOGLEVELS
+from src.utils.retransmission import encodeRetransmitRequest
 from typing import List
 
 Logger = L("GATEWAY")
@@ -23,7 +35,17 @@ class GatewayTDAMAC:
                  dataPacketOctetSize: int = PAQUET_SIZE,
                  transmitTimeCalc: ModemTransmissionCalculator = ModemTransmissionCalculator(),
                  nbReqMax: int = -1,
-                 maxAttemps : int = 10
+                 maxAttemps : int = 10,
+                 broadcastRangingSlotUs: int = 0,
+                 topologyCache: TopologyCache = None,
+                 tofTracker: ToFTracker = None,
+                 guardIntervalTuner: GuardIntervalTuner = None,
+                 periodMode: str = PERIOD_MODE_FIXED,
+                 selectiveArq: bool = False,
+                 variableSlots: bool = False,
+                 maxPacketsPerSlot: int = 4,
+                 scheduler: IScheduler = None,
+                 latencyCalibrator: TransmitLatencyCalibrator = None
                  ):
         """Constructor of the GatewayTDAMAC class
 
@@ -32,6 +54,22 @@ class GatewayTDAMAC:
             transmitTimeCalc (ModemTransmissionCalculator): The modem transmission calculator
             the modem should be connected and receiving before creating the gateway
             topology ([]): The list of nodes in the network
+            broadcastRangingSlotUs (int): Ranging delay per node address configured on the nodes (see NodeTDAMAC),
+            0 disables the broadcast ranging and the nodes are pinged one by one
+            topologyCache (TopologyCache): Cache of the measured network state used for warm restarts, None to disable it
+            tofTracker (ToFTracker): Tracker updating the time of flight of the nodes from the arrival time
+            of their data packets, None to disable the closed-loop tracking
+            guardIntervalTuner (GuardIntervalTuner): Tuner adapting the guard interval to the measured jitter,
+            None to keep the guard interval fixed
+            periodMode (str): PERIOD_MODE_FIXED to send a request every `periodeSec`,
+            PERIOD_MODE_BACK_TO_BACK to send the next request as soon as the last slot can no longer collide,
+            PERIOD_MODE_PIPELINED to send the next request while the slots of the previous ones are still in flight
+            selectiveArq (bool): Ask the nodes whose data packet is missing to retransmit it with the next request
+            variableSlots (bool): Size the slot of each node from the demand advertised in its data packets
+            maxPacketsPerSlot (int): Maximum number of back-to-back data packets in the slot of a node
+            scheduler (IScheduler): The MAC scheduling policy, TDA-MAC if None
+            latencyCalibrator (TransmitLatencyCalibrator): Calibrator of the latency between the send of a request
+            and its emission, calibrated by `run` if needed. None to leave the latency uncompensated
         """
         self.assignedTransmitDelaysUs = {}  # Dictionary of assigned transmission delays
         self.modemGateway: IModem = modemGateway  # Modem used to communicate with the nodes
@@ -40,31 +78,62 @@ class GatewayTDAMAC:
         self.dataPacketOctetSize = dataPacketOctetSize  # Size of data packets in octets
         self.transmitTimeCalc = transmitTimeCalc  # Modem transmission calculator
         self.nodeDataPacketTransmitTimeUs = transmitTimeCalc.calculate_transmission_time(self.dataPacketOctetSize * 8)
+        self.requestPacketTransmitTimeUs = transmitTimeCalc.calculate_transmission_time(0)  # REQ packet without payload
+        self.requestPayloadOctetSize = 0  # Payload size of the last REQ packet
         self.guardIntervalUs = int(2 * 1e6)  # Guard interval in µs
         self.timeoutPingSec = 5  # Timeout for ping in seconds
-        self.receivedPaquetOfCurrentReq = {}  # Packets received for the current request
+        self.receivedPaquetOfCurrentReq = {}  # Packets received for the last request
         self.nbReqMax = nbReqMax  # Maximum number of requests
         self.receivedPaquets = []  # List of received packets
-        self.receivePacketTimeUs = {}  # Reception time of packets
-        self.ReceiveAllDataPacketEvent = threading.Event()  # Event to signal reception of all data packets
+        self.nbRetransmittedPaquets = 0  # Number of received packets which were retransmitted
+        self.receivePacketTimeUs = {}  # Reception time of packets of the last request
+        self.ReceiveAllDataPacketEvent = threading.Event()  # Event to signal reception of all data packets of the last request
+        self.inFlightCycles: Dict[int, RequestCycle] = {}  # Requests waiting for data packets by sequence number
+        self.inFlightCyclesLock = threading.Lock()
         self.timeoutDataRequestSec = 5  # Timeout for data request in seconds in addition to the last node delay
         self.jitterThresholdUs = 100 * 1e3  # Jitter threshold in µs
         self.periodeSec = int(20)  # Period in seconds
+        if periodMode not in (PERIOD_MODE_FIXED, PERIOD_MODE_BACK_TO_BACK, PERIOD_MODE_PIPELINED):
+            raise ValueError(f"Unknown period mode {periodMode}")
+        if periodMode == PERIOD_MODE_PIPELINED and selectiveArq:
+            raise ValueError("Selective ARQ is not supported with pipelined requests")
+        self.periodMode = periodMode  # Fixed period, back-to-back or pipelined requests
         self.running = False  # Flag to indicate if the gateway is running
         self.dataPaquetSequenceNumber = 0  # Sequence number for data packets
         self.gatewayId = GATEWAY_ID  # Gateway address
         self.maxAttemps = maxAttemps  # Maximum number of attempts for ping until the node is considered unreachable (not included)
+        self.broadcastRangingSlotUs = broadcastRangingSlotUs  # Ranging delay per node address, 0 to ping the nodes one by one
+        self.topologyCache = topologyCache  # Cache of the network state for warm restarts
+        self.tofTracker = tofTracker  # Closed-loop tracking of the time of flight of the nodes
+        self.guardIntervalTuner = guardIntervalTuner  # Adaptive guard interval from the measured jitter
+        self.nodeGuardIntervalsUs: Dict[int, int] = {}  # Guard interval before each node, guardIntervalUs if not set
+        self.nodeMissedRequestCount: Dict[int, int] = {}  # Number of consecutive requests without data packet per node
+        self.selectiveArq = selectiveArq  # Retransmission of the missing data packets with the next request
+        self.nodesToRetransmit: List = []  # Nodes to ask for a retransmission in the next request
+        self.pendingRetransmissions = set()  # Nodes expected to retransmit their previous packet in the current request
+        self.arqOffsetUs = 0  # Offset of the retransmissions of the current request after the assigned delays
+        self.variableSlots = variableSlots  # Slots sized from the demand of the nodes
+        self.maxPacketsPerSlot = maxPacketsPerSlot  # Maximum number of data packets per slot
+        self.nodeSlotPacketCount: Dict[int, int] = {}  # Number of data packets in the slot of each node, 1 if not set
+        self.nodePayloadOctetSize: Dict[int, int] = {}  # Payload size of each node, dataPacketOctetSize if not set
+        self.receivedSlotPaquetsOfCurrentReq: Dict[int, List] = {}  # Data packets of each slot for the last request
+        self.scheduler: IScheduler = scheduler if scheduler is not None else TDAMACScheduler()  # MAC scheduling policy
+        self.dataPacketLatenciesUs: List = []  # Time between a request and the reception of each first data packet
+        self.pendingNodes: List = []  # Nodes waiting to join the network (see admitNode)
+        self.pendingNodesLock = threading.Lock()
+        self.latencyCalibrator = latencyCalibrator  # Transmit latency of the link to the modem
 
         # temporary variables
         self.receivedTime = -1
         self.expectedNodeAdress = -1
 
     @classmethod
-    def fromSerialPort(cls, serialport: str, topology: List):
+    def fromSerialPort(cls, serialport: str, topology: List, cachePath: str = None):
         modem = Modem()
         modem.connect(serialport)
         modem.receive()
-        return cls(modem, topology)
+        topologyCache = TopologyCache(cachePath) if cachePath is not None else None
+        return cls(modem, topology, topologyCache=topologyCache)
 
     def run(self):
         """
@@ -75,26 +144,154 @@ class GatewayTDAMAC:
         3. Sends the assigned transmission delays to the nodes.
         4. Executes the main function of the GatewayTDAMAC.
 
+        Steps 1 to 3 are replaced by `warmStart` if the topology cache holds a usable schedule.
+        The transmit latency is calibrated before step 4 if a latency calibrator is set.
+
         Returns:
             None
         """
         if len(self.topology) == 0:
             raise ValueError("Topology is empty")
-        self.pingTopology()
+        if not self.warmStart():
+            self.pingTopology()
+            if len(self.topology) == 0:
+                raise ValueError("Topology is empty")
+            self.calculateNodesDelay()
+            self.sendAssignedTransmitDelaysToNodes()
+            self.saveTopologyCache()
+        if self.latencyCalibrator is not None and not self.latencyCalibrator.isCalibrated():
+            self.calibrateTransmitLatency()
+        self.main()
+
+    def warmStart(self) -> bool:
+        """
+        Restores the schedule from the topology cache and validates it with one data request cycle.
+
+        The nodes keep their assigned transmit delay across a restart of the gateway, so the cached
+        schedule is still in use by the nodes. Only the nodes whose data packet is missing or arrived
+        with an error above `jitterThresholdUs` (see `getArrivalErrorUs`, the airtime is part of the expected
+        arrival), and the nodes which are not in the cache, are pinged again.
+        The delays are then recalculated and sent only to the nodes whose delay changed.
+
+        Returns:
+            bool: True if the schedule was restored, False if the network must be set up from scratch
+        """
+        if self.topologyCache is None:
+            return False
+        cache = self.topologyCache.load()
+        if cache is None:
+            return False
+
+        cachedNodes = [node for node in cache["topology"] if node in self.topology]
+        if len(cachedNodes) == 0:
+            return False
+        uncachedNodes = [node for node in self.topology if node not in cachedNodes]
+        Logger.info(f"Warm start: validating the cached schedule of nodes {cachedNodes}")
+
+        self.nodeTwoWayTimeOfFlightUs = {node: cache["nodeTwoWayTimeOfFlightUs"][node] for node in cachedNodes}
+        self.assignedTransmitDelaysUs = {node: cache["assignedTransmitDelaysUs"][node] for node in cachedNodes}
+        self.topology = cachedNodes
+        if self.variableSlots:
+            # the nodes may still use the slot length of the previous run, reset it to one packet
+            self.sendAssignedTransmitDelaysToNodes(cachedNodes)
+
+        # validate the cached values with one data request cycle
+        self.modemGateway.addRxCallback(self.packetCallback, type=ID_PAQUET_DATA)
+        cycle = self.requestDataCycle()
+        self.modemGateway.removeRxCallback(self.packetCallback, type=ID_PAQUET_DATA)
+
+        staleNodes = []
+        for nodeId in cachedNodes:
+            if nodeId not in cycle.receivedPaquets:
+                Logger.warning(f"Warm start: no data packet from node {nodeId}")
+                staleNodes.append(nodeId)
+                continue
+            diff = abs(self.getArrivalErrorUs(nodeId, cycle))
+            if diff > self.jitterThresholdUs:
+                Logger.warning(f"Warm start: node {nodeId} gigue/jitter: {diff}")
+                staleNodes.append(nodeId)
+
+        if len(staleNodes) == 0 and len(uncachedNodes) == 0:
+            Logger.info("Warm start: cached schedule is valid")
+            self.saveTopologyCache()
+            return True
+
+        # ping again the nodes which do not match the cache
+        self.topology = cachedNodes + uncachedNodes
+        self.pingNodes(staleNodes + uncachedNodes)
         if len(self.topology) == 0:
             raise ValueError("Topology is empty")
-        self.calculateNodesDelay()
-        self.sendAssignedTransmitDelaysToNodes()
-        self.main()
+        self.rescheduleNodes([node for node in staleNodes if node in self.topology])
+        return True
+
+    def saveTopologyCache(self):
+        """Saves the topology, the time of flight and the assigned delays of the nodes to the topology cache"""
+        if self.topologyCache is None:
+            return
+        self.topologyCache.save(self.topology, self.nodeTwoWayTimeOfFlightUs, self.assignedTransmitDelaysUs)
 
     def pingTopology(self):
         """
         Pings all nodes in the topology to measure the two-way time of flight.
 
-        This function sends a ping packet to each node in the topology and waits for a response.
+        If broadcast ranging is enabled (`broadcastRangingSlotUs` > 0), a single broadcast ping
+        is sent first and every answer is collected in one window (see `pingTopologyBroadcast`).
+        The nodes that did not answer (or all nodes if broadcast ranging is disabled) are then
+        pinged one by one (see `pingNodes`).
+
+        Attributes:
+            nodeTwoWayTimeOfFlightUs (dict): Dictionary to store the two-way time of flight for each node.
+        """
+        self.nodeTwoWayTimeOfFlightUs = {}
+        if self.broadcastRangingSlotUs > 0:
+            self.pingTopologyBroadcast()
+        self.pingNodes([node for node in self.topology if node not in self.nodeTwoWayTimeOfFlightUs])
+
+    def pingTopologyBroadcast(self):
+        """
+        Pings all nodes of the topology at once with a single broadcast ping.
+
+        Each node answers after the ranging delay configured on its modem (`rangeDelay`, its address
+        times `broadcastRangingSlotUs`, see `NodeTDAMAC`), so the ranging acks do not collide.
+        All answers are collected in one window, the nodes that did not answer are left
+        out of `nodeTwoWayTimeOfFlightUs`.
+        """
+        pendingNodes = set(self.topology)
+        allAnsweredEvent = threading.Event()
+
+        def modemCallback(pkt):
+            # check if we have received a ranging ack of a node we are waiting for
+            if pkt.header.type == ID_PAQUET_PING and pkt.header.len > 0 \
+                    and pkt.header.src in pendingNodes:
+                tof = self.parseTimeOfFlightUs(pkt)
+                self.nodeTwoWayTimeOfFlightUs[pkt.header.src] = tof
+                pendingNodes.discard(pkt.header.src)
+                Logger.debug("Node %s two-way time of flight (PING PAQUET): %s µs", pkt.header.src, tof)
+                Logger.logRX(pkt, "gateway")
+                if len(pendingNodes) == 0:
+                    allAnsweredEvent.set()
+
+        self.modemGateway.addRxCallback(modemCallback, type=ID_PAQUET_PING)
+        Logger.info(f"Pinging {len(self.topology)} nodes with a broadcast ping")
+        self.modemGateway.send(src=self.gatewayId, dst=BROCAST_ADDRESS, type=ID_PAQUET_PING, payload=bytearray(),
+                               status=FLAG_R, dsn=0)
+        allAnsweredEvent.wait(timeout=self.getPingTimeoutSec(max(self.topology)))
+        self.modemGateway.removeRxCallback(modemCallback, type=ID_PAQUET_PING)
+
+        if len(pendingNodes) > 0:
+            Logger.warning(f"No answer to the broadcast ping from nodes {sorted(pendingNodes)}")
+
+    def pingNodes(self, nodes: List):
+        """
+        Pings the given nodes one by one to measure the two-way time of flight.
+
+        This function sends a ping packet to each node and waits for a response.
         If a response is received within the specified timeout, the two-way time of flight is recorded.
         If no response is received, the ping is retried until a response is received or the maximum number of attempts is reached.
 
+        Args:
+            nodes (List): The nodes to ping
+
         Attributes:
             event (threading.Event): Event to manage the synchronization of ping responses.
             nodeTwoWayTimeOfFlightUs (dict): Dictionary to store the two-way time of flight for each node.
@@ -104,16 +301,18 @@ class GatewayTDAMAC:
 
         Process:
             - Adds the modem callback to handle incoming packets.
-            - Iterates through each node in the topology.
+            - Iterates through each given node.
             - Sends a ping packet to the node and waits for a response.
             - If a response is received, records the time of flight and proceeds to the next node.
             - If no response is received, retries the ping until a response is received or the maximum number of attempts is reached.
+              The node is then removed from the topology.
             - Removes the modem callback after all nodes have been pinged.
         """
+        if len(nodes) == 0:
+            return
         self.event = threading.Event()
-        self.nodeTwoWayTimeOfFlightUs = {}
 
-        self.expectedNodeAdress = self.topology[0]
+        self.expectedNodeAdress = nodes[0]
         self.receivedTime = -1
 
         def modemCallback(pkt):
@@ -121,19 +320,16 @@ class GatewayTDAMAC:
             if pkt.header.type == ID_PAQUET_PING and pkt.header.len > 0 \
                     and pkt.header.src == self.expectedNodeAdress:
                 self.receivedTime = time.time_ns()
-                tof = 0
-                # Calcul the ToF value
-                for i in range(0, 4):
-                    tof = tof * 256 + pkt.payload[i]
+                tof = self.parseTimeOfFlightUs(pkt)
 
                 self.nodeTwoWayTimeOfFlightUs[pkt.header.src] = tof
                 self.event.set()  # liberate the event to get the next node time of flight
-                Logger.debug(f"Node {pkt.header.src} two-way time of flight (PING PAQUET): {tof} µs")
+                Logger.debug("Node %s two-way time of flight (PING PAQUET): %s µs", pkt.header.src, tof)
                 Logger.logRX(pkt, "gateway")
 
-        self.modemGateway.addRxCallback(modemCallback)
+        self.modemGateway.addRxCallback(modemCallback, type=ID_PAQUET_PING)
 
-        for node in self.topology:
+        for node in nodes:
             nb_attempts = 0
             self.expectedNodeAdress = node
             while True:
@@ -143,7 +339,7 @@ class GatewayTDAMAC:
                 self.receivedTime = -1
                 pingSendTimeNs = time.time_ns()
                 self.modemGateway.send(src=self.gatewayId, dst=node, type=ID_PAQUET_PING, payload=bytearray(), status=FLAG_R, dsn=0)
-                if self.event.wait(timeout=self.timeoutPingSec):
+                if self.event.wait(timeout=self.getPingTimeoutSec(node)):
                     self.event.clear()
                     # print(f"Succès de la réponse du nœud {node}")
                     if self.receivedTime == -1:
@@ -163,7 +359,42 @@ class GatewayTDAMAC:
                     else:
                         Logger.warning(f"Attempt nb: {nb_attempts} No response from node {node}. Resending the packet")
 
-        self.modemGateway.removeRxCallback(modemCallback)
+        self.modemGateway.removeRxCallback(modemCallback, type=ID_PAQUET_PING)
+
+    @staticmethod
+    def parseTimeOfFlightUs(pkt) -> int:
+        """Extract the time of flight in µs from the payload of a ranging ack"""
+        tof = 0
+        # Calcul the ToF value
+        for i in range(0, 4):
+            tof = tof * 256 + pkt.payload[i]
+        return tof
+
+    def calibrateTransmitLatency(self, node: int = None) -> bool:
+        """
+        Measure the transmit latency of the link to the modem with loopback ranging (see `TransmitLatencyCalibrator`).
+
+        Args:
+            node (int): The node answering the calibration pings, the closest node if None
+
+        Returns:
+            bool: True if the latency is calibrated
+        """
+        if node is None:
+            node = min(self.topology, key=lambda x: self.nodeTwoWayTimeOfFlightUs.get(x, 0))
+        Logger.info(f"Calibrating the transmit latency with node {node}")
+        return self.latencyCalibrator.calibrate(self.modemGateway, self.gatewayId, node,
+                                                node * self.broadcastRangingSlotUs)
+
+    def getTransmitLatencyUs(self, payloadOctetSize: int) -> float:
+        """Latency between the send of a packet and its emission in µs, 0 if not calibrated"""
+        if self.latencyCalibrator is None:
+            return 0
+        return self.latencyCalibrator.getLatencyUs(self.latencyCalibrator.getFrameOctetSize(payloadOctetSize))
+
+    def getPingTimeoutSec(self, node: int) -> float:
+        """Timeout for the ranging ack of a node, including its staggered ranging delay"""
+        return self.timeoutPingSec + node * self.broadcastRangingSlotUs * 1e-6
 
     def calculateNodesDelay(self):
         """
@@ -183,33 +414,222 @@ class GatewayTDAMAC:
         """
 
         self.assignedTransmitDelaysUs = {}
-        # transmit delay of the first node is 0
         self.topology.sort(key=lambda x: self.nodeTwoWayTimeOfFlightUs[x])
-        self.assignedTransmitDelaysUs[self.topology[0]] = 0
-        for i in range(1, len(self.topology)):
-            assignedTransmitDelayPrevious = self.assignedTransmitDelaysUs[self.topology[i - 1]]
-            transmitDelayToNode = self.nodeTwoWayTimeOfFlightUs[self.topology[i]] // 2
-            transmitDelayToPreviousNode = self.nodeTwoWayTimeOfFlightUs[self.topology[i - 1]] // 2
+        self.updateNodesDelay()
+
+    def updateNodesDelay(self) -> List:
+        """
+        Recalculate the transmission delays of the schedule and apply those which changed.
+
+        The delays are calculated by the scheduler for the whole topology, every changed delay is applied so the
+        expected arrivals of the gateway match the delays of the nodes. With TDA-MAC, the delay of a node only
+        depends on the delay and the time of flight of the previous node, so after a join or a leave only the
+        nodes scheduled after it change. The topology must be sorted by time of flight.
+
+        Returns:
+            List: The nodes whose delay changed
+        """
+        delaysUs = self.scheduler.calculateDelaysUs(self)
+        changedNodes = []
+        for node in self.topology:
+            if self.assignedTransmitDelaysUs.get(node) != delaysUs[node]:
+                self.assignedTransmitDelaysUs[node] = delaysUs[node]
+                changedNodes.append(node)
+        return changedNodes
+
+    def getSlotPacketCount(self, node: int) -> int:
+        """Number of data packets the node sends per request"""
+        if not self.variableSlots:
+            return 1
+        return self.nodeSlotPacketCount.get(node, 1)
+
+    def getDataSlotTransmitTimeUs(self, node: int) -> int:
+        """
+        Airtime of the slot of a node.
+
+        Without variable slots, the slot holds one data packet of `dataPacketOctetSize`. Otherwise the slot holds
+        `getSlotPacketCount` back-to-back packets of the largest payload of the last slot of the node,
+        separated by `INTER_PACKET_GAP_US`.
+        """
+        if not self.variableSlots:
+            return self.nodeDataPacketTransmitTimeUs
+        packetCount = self.getSlotPacketCount(node)
+        octetSize = self.nodePayloadOctetSize.get(node, self.dataPacketOctetSize)
+        return packetCount * self.transmitTimeCalc.calculate_transmission_time(octetSize * 8) + \
+            (packetCount - 1) * INTER_PACKET_GAP_US
+
+    def updateSlotsFromDemand(self, cycle: RequestCycle) -> List:
+        """
+        Resize the slots from the data packets of a request.
+
+        Every data packet advertises in the high nibble of its status the number of packets still waiting
+        on the node after it. The slot of a node holds the packets advertised by its last packet
+        (at least one, at most `maxPacketsPerSlot`), of the size of the largest payload it just sent.
+
+        Returns:
+            List: The nodes whose slot changed, they must receive their new slot length
+        """
+        changedNodes = []
+        for node, slot in cycle.slotPaquets.items():
+            if node not in self.topology:
+                continue
+            demand = slot[-1].header.status >> DEMAND_STATUS_SHIFT
+            packetCount = min(self.maxPacketsPerSlot, max(1, demand))
+            octetSize = max(pkt.header.len for pkt in slot)
+            if packetCount != self.getSlotPacketCount(node) or \
+                    octetSize != self.nodePayloadOctetSize.get(node, self.dataPacketOctetSize):
+                Logger.info(f"Node {node} slot resized to {packetCount} packets of {octetSize} octets")
+                self.nodeSlotPacketCount[node] = packetCount
+                self.nodePayloadOctetSize[node] = octetSize
+                changedNodes.append(node)
+        return changedNodes
+
+    def getGuardIntervalUs(self, node: int) -> int:
+        """Guard interval between the slot of the node and the slot of the previous node"""
+        return self.nodeGuardIntervalsUs.get(node, self.guardIntervalUs)
+
+    def tuneGuardInterval(self) -> bool:
+        """
+        Update the guard intervals from the jitter measured by the guard interval tuner.
+
+        The guard intervals are only updated when they changed by more than the hysteresis of the tuner.
+
+        Returns:
+            bool: True if the guard intervals changed and the nodes must be rescheduled
+        """
+        if self.guardIntervalTuner is None:
+            return False
+        guardIntervalsUs = self.guardIntervalTuner.computeGuardIntervalsUs(self.topology)
+        if guardIntervalsUs is None:
+            return False
+        currentUs = {node: self.getGuardIntervalUs(node) for node in self.topology}
+        if not self.guardIntervalTuner.mustUpdate(currentUs, guardIntervalsUs):
+            return False
+
+        Logger.info(f"Gateway: guard intervals updated to {guardIntervalsUs} µs")
+        self.nodeGuardIntervalsUs = guardIntervalsUs
+        if not self.guardIntervalTuner.perNode:
+            self.guardIntervalUs = guardIntervalsUs[self.topology[0]]
+        return True
+
+    def rescheduleNodes(self, forcedNodes: List = None) -> List:
+        """
+        Recalculate the transmission delays and send them only to the nodes whose delay changed.
+
+        Args:
+            forcedNodes (List): Nodes which must receive their delay even if it did not change
+
+        Returns:
+            List: The nodes the delay was sent to
+        """
+        forcedNodes = forcedNodes or []
+        self.topology.sort(key=lambda x: self.nodeTwoWayTimeOfFlightUs[x])
+        self.assignedTransmitDelaysUs = {node: delay for node, delay in self.assignedTransmitDelaysUs.items()
+                                         if node in self.topology}
+        changedNodes = self.updateNodesDelay()
+        changedNodes += [node for node in forcedNodes if node not in changedNodes]
+        self.sendAssignedTransmitDelaysToNodes(changedNodes)
+        self.saveTopologyCache()
+        return changedNodes
+
+    def removeNode(self, node: int) -> List:
+        """
+        Remove a node from the schedule and compact the slots of the nodes scheduled after it.
+
+        Args:
+            node (int): The node to remove
+
+        Returns:
+            List: The nodes the new delay was sent to
+        """
+        self.topology.remove(node)
+        self.assignedTransmitDelaysUs.pop(node, None)
+        self.nodeTwoWayTimeOfFlightUs.pop(node, None)
+        self.nodeMissedRequestCount.pop(node, None)
+        self.nodeGuardIntervalsUs.pop(node, None)
+        self.nodeSlotPacketCount.pop(node, None)
+        self.nodePayloadOctetSize.pop(node, None)
+        if self.tofTracker is not None:
+            self.tofTracker.remove(node)
+        if self.guardIntervalTuner is not None:
+            self.guardIntervalTuner.remove(node)
+
+        changedNodes = self.updateNodesDelay()
+        self.sendAssignedTransmitDelaysToNodes(changedNodes)
+        self.saveTopologyCache()
+        return changedNodes
+
+    def admitNode(self, node: int):
+        """
+        Request to add a node to the network while the gateway is running.
+
+        The node is pinged and inserted in the schedule by `main` between two requests.
+        Thread-safe.
+
+        Args:
+            node (int): The address of the node
+        """
+        with self.pendingNodesLock:
+            if node not in self.pendingNodes and node not in self.topology:
+                self.pendingNodes.append(node)
+
+    def admitPendingNodes(self) -> List:
+        """
+        Pings the nodes requested with `admitNode` and inserts the reachable ones in the schedule.
+
+        A new node is inserted at its position in the schedule (sorted by time of flight),
+        the nodes whose delay changed receive it (with TDA-MAC, the new node and the nodes scheduled after it).
+
+        Returns:
+            List: The nodes the new delay was sent to
+        """
+        with self.pendingNodesLock:
+            nodes = self.pendingNodes
+            self.pendingNodes = []
+
+        changedNodes = []
+        for node in nodes:
+            self.topology.append(node)
+            self.pingNodes([node])
+            if node not in self.topology:
+                continue  # unreachable, removed by pingNodes
+            self.topology.remove(node)
+
+            index = bisect.bisect_right([self.nodeTwoWayTimeOfFlightUs[n] for n in self.topology],
+                                        self.nodeTwoWayTimeOfFlightUs[node])
+            self.topology.insert(index, node)
+            if self.tofTracker is not None:
+                self.tofTracker.update(node, self.nodeTwoWayTimeOfFlightUs[node])
+            Logger.info(f"Node {node} joined the network at position {index}")
+            changedNodes += [n for n in self.updateNodesDelay() if n not in changedNodes]
 
-            self.assignedTransmitDelaysUs[self.topology[i]] = \
-                assignedTransmitDelayPrevious + \
-                self.nodeDataPacketTransmitTimeUs + \
-                self.guardIntervalUs + \
-                - 2 * (transmitDelayToNode - transmitDelayToPreviousNode)
+        self.sendAssignedTransmitDelaysToNodes(changedNodes)
+        if len(changedNodes) > 0:
+            self.saveTopologyCache()
+        return changedNodes
 
-    def sendAssignedTransmitDelaysToNodes(self):
+    def sendAssignedTransmitDelaysToNodes(self, nodes: List = None):
         """
-        Send assigned transmit delays to all nodes in the topology.
+        Send assigned transmit delays to the nodes.
 
-        This method iterates over each node in the topology and sends a message
+        This method iterates over each node and sends a message
         containing the assigned transmit delay to each node using the modem gateway.
+
+        Args:
+            nodes (List): The nodes to send the delay to, all nodes in the topology if None
         """
-        for node in self.topology:
+        if nodes is None:
+            nodes = self.topology
+        for node in nodes:
+            payload = self.assignedTransmitDelaysUs[node].to_bytes(4, 'big')
+            if self.variableSlots:
+                # number of data packets of the slot of the node
+                payload += bytes([self.getSlotPacketCount(node)])
             self.modemGateway.send(
                 src=self.gatewayId,
                 dst=node,
                 type=ID_PAQUET_TDI,
-                payload=self.assignedTransmitDelaysUs[node].to_bytes(4, 'big'),
+                payload=payload,
                 status=0,
                 dsn=0
             )
@@ -224,74 +644,105 @@ class GatewayTDAMAC:
         This function sets up the modem gateway to receive data packets, waits for all data packets to be received,
         handles timeouts, checks for jitter, and retransmits delays if necessary. It runs in a loop until the
         `self.running` flag is set to False.
+
+        Nodes without data packet for `maxAttemps` consecutive requests are removed from the schedule,
+        nodes requested with `admitNode` are added between two requests.
         """
 
-        self.modemGateway.addRxCallback(self.packetCallback)
+        self.modemGateway.addRxCallback(self.packetCallback, type=ID_PAQUET_DATA)
         self.running = True
+        if self.tofTracker is not None:
+            self.tofTracker.reset(self.nodeTwoWayTimeOfFlightUs)
+        if len(self.topology) > 0:
+            self.logPeriod()
+        if self.periodMode == PERIOD_MODE_PIPELINED and len(self.scheduler.getRequestGroups(self.topology)) > 1:
+            raise ValueError("Pipelined requests need a scheduler with a single request per cycle")
+        with self.inFlightCyclesLock:
+            self.inFlightCycles = {}
         nbReq = 0
         while self.running:
             if self.nbReqMax != -1 and nbReq >= self.nbReqMax:
                 break
             nbReq += 1
-            self.receivedPaquetOfCurrentReq = {}
-            self.receivePacketTimeUs = {}
-            self.ReceiveAllDataPacketEvent.clear()
-            transmitTimeUs = time.time_ns() * 1e-3 # to convert to µs
-            self.RequestDataPacket()
-            # print("Gateway: Waiting for all data packets...")
-            # print("Gateway: Waiting for " + str(len(self.topology)) + " nodes")
-            # print("Gateway: Timeout set to " + str(self.getTimeoutDataRequestSec()) + " seconds")
-
-            Logger.debug("Gateway: Waiting for all data packets...")
-            Logger.debug(f"Gateway: Waiting for {len(self.topology)} nodes")
-            Logger.debug(f"Gateway: Timeout set to {self.getTimeoutDataRequestSec()} seconds")
-            if self.ReceiveAllDataPacketEvent.wait(timeout=self.getTimeoutDataRequestSec()):
-                # print("All data packets received")
-                Logger.debug("All data packets received")
-                # TODO: handle data packets
+            if len(self.pendingNodes) > 0:
+                if self.periodMode == PERIOD_MODE_PIPELINED:
+                    # the new delays must not be sent while data packets are in flight
+                    self.removeLostNodes(self.processRequestCycles(self.collectCompletedCycles(drain=True)))
+                self.modemGateway.removeRxCallback(self.packetCallback, type=ID_PAQUET_DATA)
+                changedNodes = self.admitPendingNodes()
+                Logger.info(f"Gateway: sent new delays to nodes {changedNodes}")
+                self.modemGateway.addRxCallback(self.packetCallback, type=ID_PAQUET_DATA)
+            if len(self.topology) == 0:
+                Logger.error("Topology is empty")
+                break
+            if self.periodMode == PERIOD_MODE_PIPELINED:
+                cycle = self.startRequestCycle()
+                # wait for the next period, the slots of the request are still in flight
+                waitTimeSec = max(0, cycle.transmitTimeUs * 1e-6 + self.getPeriodSec() - time.time())
+                Logger.debug("Gateway: Waiting for %s seconds before the next request", waitTimeSec)
+                time.sleep(waitTimeSec)
+                completedCycles = self.collectCompletedCycles()
             else:
-                # print("Timeout on data packets reception")
-                Logger.error("Timeout on data packets reception")
-                # TODO: handle timeout
+                completedCycles = self.requestDataRound()
+                cycle = completedCycles[0]
+
+            lostNodes = self.processRequestCycles(completedCycles)
 
             mustRestransmitDelays = False
-            for nodeId in self.topology:
-                if nodeId not in self.receivedPaquetOfCurrentReq:
-                    # TODO:  if it's the first time we don't receive the data packet of node x
-                    # retranmist the tdi packet to node x
-                    # else
-                    # do nothing
-                    # or determine if we should increase the guard interval or timeout
-                    continue
+            driftedNodes = []
+            if self.tofTracker is not None:
+                driftedNodes = [node for node in self.tofTracker.getDriftedNodes() if node in self.topology]
+                for nodeId in driftedNodes:
+                    Logger.warning(f"Node {nodeId} time of flight drifted by {self.tofTracker.getDriftUs(nodeId)} µs")
+                    self.nodeTwoWayTimeOfFlightUs[nodeId] = self.tofTracker.getEstimateUs(nodeId)
+                    if self.scheduler.handleToFEstimate(nodeId, self.nodeTwoWayTimeOfFlightUs[nodeId]):
+                        mustRestransmitDelays = True
+                if not mustRestransmitDelays:
+                    # the schedule still holds with the new time of flight
+                    self.tofTracker.markScheduled(driftedNodes)
+            if self.tuneGuardInterval():
+                mustRestransmitDelays = True
+            resizedNodes = []
+            if self.variableSlots:
+                for completedCycle in completedCycles:
+                    resizedNodes += [node for node in self.updateSlotsFromDemand(completedCycle)
+                                     if node not in resizedNodes]
+                if len(resizedNodes) > 0:
+                    mustRestransmitDelays = True
 
-                # check if the packet arrived at the expected time
-                expectedArrivalTime = transmitTimeUs + \
-                                      self.nodeTwoWayTimeOfFlightUs[nodeId] + \
-                                      self.assignedTransmitDelaysUs[nodeId]
-                actualArrivalTime = self.receivePacketTimeUs[nodeId]
-                diff = abs(actualArrivalTime - expectedArrivalTime)
-                if diff > self.jitterThresholdUs:
-                    # print(f"Node {nodeId} gigue/jitter: {diff}")
-                    Logger.warning(f"Node {nodeId} gigue/jitter: {diff}")
-                    # TODO: Adjust transmit delays
-                    #mustRestransmitDelays = True
+            if self.periodMode == PERIOD_MODE_PIPELINED and (len(lostNodes) > 0 or mustRestransmitDelays):
+                # the new delays must not be sent while data packets are in flight
+                lostNodes += self.processRequestCycles(self.collectCompletedCycles(drain=True))
+            self.removeLostNodes(lostNodes)
 
             if mustRestransmitDelays:
-                self.modemGateway.removeRxCallback(self.packetCallback)
-                self.calculateNodesDelay()
-                self.sendAssignedTransmitDelaysToNodes()
-                self.modemGateway.addRxCallback(self.packetCallback)
+                self.modemGateway.removeRxCallback(self.packetCallback, type=ID_PAQUET_DATA)
+                changedNodes = self.rescheduleNodes([node for node in resizedNodes if node in self.topology])
+                Logger.info(f"Gateway: sent new delays to nodes {changedNodes}")
+                if self.tofTracker is not None:
+                    self.tofTracker.markScheduled(driftedNodes)
+                self.logPeriod()
+                self.modemGateway.addRxCallback(self.packetCallback, type=ID_PAQUET_DATA)
 
             if not self.running:
                 break
+            if self.periodMode == PERIOD_MODE_PIPELINED:
+                continue
             # wait for the next period
-            elpasedTimeSec = time.time() - (transmitTimeUs * 1e-6)
-            waitTimeSec = max(0, self.periodeSec - elpasedTimeSec)
+            elpasedTimeSec = time.time() - (cycle.transmitTimeUs * 1e-6)
+            waitTimeSec = max(0, self.getPeriodSec() - elpasedTimeSec)
             # print(f"Gateway: Waiting for {waitTimeSec} seconds before the next period")
-            Logger.debug(f"Gateway: Waiting for {waitTimeSec} seconds before the next period")
+            Logger.debug("Gateway: Waiting for %s seconds before the next period", waitTimeSec)
             time.sleep(waitTimeSec)
-        self.modemGateway.removeRxCallback(self.packetCallback)
+        if self.periodMode == PERIOD_MODE_PIPELINED:
+            # receive the slots of the last requests
+            self.processRequestCycles(self.collectCompletedCycles(drain=True))
+        self.modemGateway.removeRxCallback(self.packetCallback, type=ID_PAQUET_DATA)
+        if len(self.topology) > 0:
+            self.logPeriod()
         print("Gateway: nb data packet received" + str(len(self.receivedPaquets)))
+        if self.selectiveArq:
+            print(f"Gateway: nb data packet retransmitted {self.nbRetransmittedPaquets}")
         for i in range(len(self.topology)):
             # filter the received packets by node
             nbPacket = 0
@@ -300,44 +751,423 @@ class GatewayTDAMAC:
                     nbPacket += 1
             print(f"Node {self.topology[i]} received {nbPacket} packets")
 
+    def processRequestCycles(self, cycles: List) -> List:
+        """
+        Check the data packets of completed requests.
+
+        The nodes without data packet are counted as missed (and asked for a retransmission with selective ARQ),
+        a miss does not change the guard interval nor the timeout.
+        The arrival error of the received packets is checked and fed to the time of flight tracker
+        and the guard interval tuner.
+
+        Args:
+            cycles (List): The completed requests, oldest first
+
+        Returns:
+            List: The nodes without data packet for `maxAttemps` consecutive requests
+        """
+        lostNodes = []
+        for cycle in cycles:
+            for nodeId in cycle.nodes:
+                if nodeId not in self.topology:
+                    continue
+                if nodeId not in cycle.receivedPaquets:
+                    # a missing packet gives no timing information (lost or late), so the guard interval
+                    # and the timeout are left unchanged: they follow the arrival errors of the received
+                    # packets (see GuardIntervalTuner), the miss is only retransmitted and counted
+                    if self.selectiveArq:
+                        self.nodesToRetransmit.append(nodeId)
+                    self.nodeMissedRequestCount[nodeId] = self.nodeMissedRequestCount.get(nodeId, 0) + 1
+                    if self.nodeMissedRequestCount[nodeId] >= self.maxAttemps and nodeId not in lostNodes:
+                        lostNodes.append(nodeId)
+                    continue
+                self.nodeMissedRequestCount[nodeId] = 0
+                if nodeId in lostNodes:
+                    lostNodes.remove(nodeId)
+
+                self.dataPacketLatenciesUs.append(cycle.receivePacketTimeUs[nodeId] - cycle.transmitTimeUs)
+                # check if the packet arrived at the expected time
+                arrivalErrorUs = self.getArrivalErrorUs(nodeId, cycle)
+                diff = abs(arrivalErrorUs)
+                if diff > self.jitterThresholdUs:
+                    # print(f"Node {nodeId} gigue/jitter: {diff}")
+                    Logger.warning(f"Node {nodeId} gigue/jitter: {diff}")
+                if self.tofTracker is not None:
+                    # the packet arrival gives an observation of the time of flight of the node
+                    self.tofTracker.update(nodeId, self.nodeTwoWayTimeOfFlightUs[nodeId] + arrivalErrorUs)
+                if self.guardIntervalTuner is not None:
+                    self.guardIntervalTuner.addSample(nodeId, arrivalErrorUs)
+        return lostNodes
+
+    def removeLostNodes(self, lostNodes: List):
+        for nodeId in lostNodes:
+            if nodeId not in self.topology:
+                continue
+            Logger.error(f"No data packet from node {nodeId} for {self.maxAttemps} requests. "
+                         f"Removing node from topology")
+            self.modemGateway.removeRxCallback(self.packetCallback, type=ID_PAQUET_DATA)
+            changedNodes = self.removeNode(nodeId)
+            Logger.info(f"Gateway: sent new delays to nodes {changedNodes}")
+            self.modemGateway.addRxCallback(self.packetCallback, type=ID_PAQUET_DATA)
+
+    def requestDataRound(self) -> List:
+        """
+        Sends the data requests of one cycle of the scheduler, one after the other.
+
+        The nodes without data packet are requested again as long as the scheduler asks for it (see `IScheduler.handleMiss`).
+
+        Returns:
+            List: The requests of the cycle, in order
+        """
+        cycles = []
+        for nodes in self.scheduler.getRequestGroups(self.topology):
+            cycle = self.requestDataCycle(nodes)
+            cycles.append(cycle)
+            missingNodes = [node for node in nodes if node not in cycle.receivedPaquets]
+            attempt = 1
+            while len(missingNodes) > 0:
+                missingNodes = [node for node in missingNodes
+                                if self.scheduler.handleMiss(node, self.nodeMissedRequestCount.get(node, 0) + attempt)]
+                if len(missingNodes) == 0:
+                    break
+                cycle = self.requestDataCycle(missingNodes)
+                cycles.append(cycle)
+                missingNodes = [node for node in missingNodes if node not in cycle.receivedPaquets]
+                attempt += 1
+        return cycles
+
+    def startRequestCycle(self, nodes: List = None) -> RequestCycle:
+        """
+        Sends one data request to the nodes without waiting for the data packets.
+
+        The request is kept in `inFlightCycles` until `collectCompletedCycles` returns it. Without pipelined
+        requests, only the last request is in flight. The packet callback must be registered on the modem.
+
+        Args:
+            nodes (List): The nodes to request, all nodes in the topology if None
+
+        Returns:
+            RequestCycle: The request in flight
+        """
+        if nodes is None:
+            nodes = list(self.topology)
+        dsn = (self.dataPaquetSequenceNumber + 1) % 256
+        cycle = RequestCycle(dsn, time.time_ns() * 1e-3, self.getTimeoutDataRequestSec(nodes), nodes)  # to convert to µs
+        with self.inFlightCyclesLock:
+            if self.periodMode != PERIOD_MODE_PIPELINED:
+                self.inFlightCycles = {}
+            self.inFlightCycles[dsn] = cycle
+        self.receivedPaquetOfCurrentReq = cycle.receivedPaquets
+        self.receivedSlotPaquetsOfCurrentReq = cycle.slotPaquets
+        self.receivePacketTimeUs = cycle.receivePacketTimeUs
+        self.ReceiveAllDataPacketEvent = cycle.allReceivedEvent
+        txFuture = self.RequestDataPacket(nodes)
+        cycle.requestTransmitTimeUs = self.requestPacketTransmitTimeUs
+        # the request is emitted after the transmit latency of the link, the delays of the nodes start then
+        latencyUs = self.getTransmitLatencyUs(self.requestPayloadOctetSize)
+        cycle.setTransmitTimeUs(cycle.transmitTimeUs + latencyUs)
+        if isinstance(txFuture, Future):
+            # the frame may wait behind the frames queued before it, restamp the cycle once it is written
+            def onWritten(future: Future):
+                if not future.cancelled() and future.exception() is None:
+                    cycle.setTransmitTimeUs(future.result() * 1e-3 + latencyUs)
+            txFuture.add_done_callback(onWritten)
+        return cycle
+
+    def collectCompletedCycles(self, drain: bool = False) -> List:
+        """
+        Removes the completed requests from the requests in flight.
+
+        Args:
+            drain (bool): Wait until all the requests in flight are completed
+
+        Returns:
+            List: The completed requests, oldest first
+        """
+        if drain:
+            for cycle in list(self.inFlightCycles.values()):
+                cycle.allReceivedEvent.wait(timeout=max(0, cycle.deadlineSec - time.time()))
+        completedCycles = []
+        with self.inFlightCyclesLock:
+            for dsn, cycle in list(self.inFlightCycles.items()):
+                if cycle.isOver(time.time()):
+                    if not cycle.allReceivedEvent.is_set():
+                        Logger.error(f"Timeout on data packets reception of request {dsn}")
+                    completedCycles.append(self.inFlightCycles.pop(dsn))
+        completedCycles.sort(key=lambda cycle: cycle.transmitTimeUs)
+        return completedCycles
+
+    def requestDataCycle(self, nodes: List = None) -> RequestCycle:
+        """
+        Sends one data request to the nodes and waits until all data packets are received or the timeout expires.
+
+        The received packets are stored in `receivedPaquetOfCurrentReq` and their reception time in
+        `receivePacketTimeUs`. The packet callback must be registered on the modem.
+
+        Args:
+            nodes (List): The nodes to request, all nodes in the topology if None
+
+        Returns:
+            RequestCycle: The request, with its transmit time and received packets
+        """
+        cycle = self.startRequestCycle(nodes)
+        # print("Gateway: Waiting for all data packets...")
+        # print("Gateway: Waiting for " + str(len(self.topology)) + " nodes")
+        # print("Gateway: Timeout set to " + str(self.getTimeoutDataRequestSec()) + " seconds")
+
+        Logger.debug("Gateway: Waiting for all data packets...")
+        Logger.debug("Gateway: Waiting for %s nodes", len(cycle.nodes))
+        if Logger.isEnabledFor(LOGLEVELS.DEBUG):
+            Logger.debug("Gateway: Timeout set to %s seconds", self.getTimeoutDataRequestSec(cycle.nodes))
+        if cycle.allReceivedEvent.wait(timeout=self.getTimeoutDataRequestSec(cycle.nodes)):
+            # print("All data packets received")
+            Logger.debug("All data packets received")
+            # TODO: handle data packets
+        else:
+            # print("Timeout on data packets reception")
+            Logger.error("Timeout on data packets reception")
+            # TODO: handle timeout
+        return cycle
+
+    def getArrivalErrorUs(self, nodeId: int, cycle: RequestCycle) -> float:
+        """
+        Difference between the actual and the expected arrival time of the data packet of a node.
+
+        The node starts its delay once it received the whole request, the gateway receives the data packet
+        once its last bit arrived: the airtime of the request and of the data packet are part of the arrival.
+
+        Args:
+            nodeId (int): The node, its data packet must have been received in the request
+            cycle (RequestCycle): The request
+
+        Returns:
+            float: The arrival error in µs, positive if the packet arrived late
+        """
+        packetTransmitTimeUs = self.transmitTimeCalc.calculate_transmission_time(
+            cycle.receivedPaquets[nodeId].header.len * 8)
+        expectedArrivalTime = cycle.transmitTimeUs + \
+                              cycle.requestTransmitTimeUs + \
+                              self.nodeTwoWayTimeOfFlightUs[nodeId] + \
+                              self.assignedTransmitDelaysUs[nodeId] + \
+                              packetTransmitTimeUs
+        actualArrivalTime = cycle.receivePacketTimeUs[nodeId]
+        return actualArrivalTime - expectedArrivalTime
+
     def packetCallback(self, pkt):
         if pkt.header.src == self.gatewayId:
             return
-        printPacket(pkt)
+        if Logger.isEnabledFor(LOGLEVELS.DEBUG):
+            Logger.debug("Gateway: received packet %s", packet2HexString(pkt))
         # check if we have received a data packet
-        if pkt.header.type == ID_PAQUET_DATA and pkt.header.dsn == self.dataPaquetSequenceNumber:
-            self.receivedPaquetOfCurrentReq[pkt.header.src] = pkt
-            self.receivePacketTimeUs[pkt.header.src] = time.time() * 1e6 # to convert to µs
+        cycle = self.inFlightCycles.get(pkt.header.dsn) if pkt.header.type == ID_PAQUET_DATA else None
+        if cycle is not None:
+            slot = cycle.slotPaquets.setdefault(pkt.header.src, [])
+            if len(slot) == 0:
+                # the first packet of the slot gives the arrival time of the node
+                cycle.receivedPaquets[pkt.header.src] = pkt
+                cycle.receivePacketTimeUs[pkt.header.src] = time.time() * 1e6 # to convert to µs
+            slot.append(pkt)
             self.receivedPaquets.append(pkt)
-
-            # check if we have received all data packets of the topology
-            if len(self.receivedPaquetOfCurrentReq) == len(self.topology):
-                self.ReceiveAllDataPacketEvent.set()
+            self.checkAllDataPacketReceived(cycle)
+        elif pkt.header.type == ID_PAQUET_DATA and pkt.header.src in self.pendingRetransmissions \
+                and pkt.header.dsn == (self.dataPaquetSequenceNumber - 1) % 256:
+            # retransmission of the packet of the previous request
+            self.pendingRetransmissions.discard(pkt.header.src)
+            self.receivedPaquets.append(pkt)
+            self.nbRetransmittedPaquets += 1
+            Logger.info(f"Received retransmitted packet {pkt.header.dsn} of node {pkt.header.src}")
+            cycle = self.inFlightCycles.get(self.dataPaquetSequenceNumber)
+            if cycle is not None:
+                self.checkAllDataPacketReceived(cycle)
         elif pkt.header.type == ID_PAQUET_DATA:
             # print("Received packet with wrong data sequence number")
             Logger.error("Received packet with wrong data sequence number")
         else:
             # print("Received packet with unknown type")
-            Logger.warning("Received packet with unknown type")
-            printPacket(pkt)
+            Logger.warning("Received packet with unknown type: %s", packet2HexString(pkt))
         pass
 
-    def RequestDataPacket(self):
+    def isSlotComplete(self, node: int, cycle: RequestCycle) -> bool:
+        """True if the node sent all the data packets of its slot, or announced that its queue is empty"""
+        slot = cycle.slotPaquets.get(node)
+        if not slot:
+            return False
+        return len(slot) >= self.getSlotPacketCount(node) or slot[-1].header.status >> DEMAND_STATUS_SHIFT == 0
+
+    def checkAllDataPacketReceived(self, cycle: RequestCycle):
+        # check if we have received all data packets of the topology and all retransmissions
+        if all(self.isSlotComplete(node, cycle) for node in cycle.nodes if node in self.topology) and \
+                len(self.pendingRetransmissions) == 0:
+            cycle.allReceivedEvent.set()
+
+    def RequestDataPacket(self, nodes: List = None):
+        """
+        Broadcast a data request, or send it to the node if only one node of the topology is requested.
+
+        If nodes are waiting for a retransmission (selective ARQ), the request carries the bitmap of these nodes
+        and the offset at which they retransmit the packet of the previous request (see `calculateArqOffsetUs`).
+
+        Args:
+            nodes (List): The nodes to request, all nodes in the topology if None
+
+        Returns:
+            The future of the transmission returned by the modem (see `IModem.send`)
+        """
+        if nodes is None:
+            nodes = self.topology
+        dst = nodes[0] if len(nodes) == 1 and len(self.topology) > 1 else BROCAST_ADDRESS
         self.dataPaquetSequenceNumber = (self.dataPaquetSequenceNumber + 1) % 256
-        self.modemGateway.send(
+        retransmitNodes = [node for node in self.nodesToRetransmit if node in nodes]
+        self.nodesToRetransmit = [node for node in self.nodesToRetransmit
+                                  if node not in retransmitNodes and node in self.topology]
+        self.arqOffsetUs = self.calculateArqOffsetUs(retransmitNodes) if len(retransmitNodes) > 0 else 0
+        self.pendingRetransmissions = set(retransmitNodes)
+        payload = encodeRetransmitRequest(self.arqOffsetUs, retransmitNodes)
+        self.requestPayloadOctetSize = len(payload)
+        self.requestPacketTransmitTimeUs = self.transmitTimeCalc.calculate_transmission_time(len(payload) * 8)
+        if len(retransmitNodes) > 0:
+            Logger.info(f"Gateway: asking nodes {retransmitNodes} to retransmit, offset {self.arqOffsetUs} µs")
+        return self.modemGateway.send(
             src=self.gatewayId,
-            dst=BROCAST_ADDRESS,
+            dst=dst,
             type=ID_PAQUET_REQ_DATA,
-            payload=bytearray(),
+            payload=payload,
             status=0,
             dsn=self.dataPaquetSequenceNumber
         )
 
+    def calculateArqOffsetUs(self, retransmitNodes: List) -> int:
+        """
+        Offset added to the assigned delay of the nodes retransmitting a packet.
+
+        All retransmissions are shifted by the same offset, so they keep the collision-free spacing of the schedule.
+        The offset places the first retransmission one guard interval after the last data packet of the request.
+
+        Args:
+            retransmitNodes (List): The nodes which retransmit a packet
+
+        Returns:
+            int: The offset in µs
+        """
+        arrivalsUs = {node: self.assignedTransmitDelaysUs[node] + self.nodeTwoWayTimeOfFlightUs[node]
+                      for node in self.topology}
+        return int(max(arrivalsUs[node] + self.getDataSlotTransmitTimeUs(node) for node in self.topology) +
+                   self.guardIntervalUs -
+                   min(arrivalsUs[node] for node in retransmitNodes))
+
     def setDataPaquetSize(self, size: int):
         self.dataPacketOctetSize = size
         self.nodeDataPacketTransmitTimeUs = self.transmitTimeCalc.calculate_transmission_time(self.dataPacketOctetSize * 8)
 
-    def getTimeoutDataRequestSec(self):
+    def getTimeoutDataRequestSec(self, nodes: List = None):
+        if self.periodMode in (PERIOD_MODE_BACK_TO_BACK, PERIOD_MODE_PIPELINED):
+            # the last packet must have arrived before the slots of the request end
+            return self.calculateMinimalPeriodUs() * 1e-6 + self.jitterThresholdUs * 1e-6
+        # the last slot of the requested nodes
+        lastNode = max(nodes if nodes else self.topology, key=lambda node: self.assignedTransmitDelaysUs[node])
         return self.timeoutDataRequestSec + \
-            (self.assignedTransmitDelaysUs[self.topology[-1]] * 1e-6) + \
-            (self.guardIntervalUs * 1e-6)
+            (self.assignedTransmitDelaysUs[lastNode] * 1e-6) + \
+            (self.guardIntervalUs * 1e-6) + \
+            (self.arqOffsetUs * 1e-6) + \
+            (self.getDataSlotTransmitTimeUs(lastNode) - self.nodeDataPacketTransmitTimeUs) * 1e-6
+
+    def calculateMinimalPeriodUs(self) -> int:
+        """
+        Calculate the shortest period which guarantees that the slots of two requests do not collide.
+
+        The last slot of a request ends at the gateway after the request airtime, the assigned
+        delay and the two-way time of flight of its node, and the airtime of the slot.
+        The next request can be sent one guard interval later.
+        The retransmissions of the current request (selective ARQ) extend the period by their offset.
+
+        Returns:
+            int: The minimal period in µs
+        """
+        lastSlotEndUs = max(
+            self.assignedTransmitDelaysUs[node] + self.nodeTwoWayTimeOfFlightUs[node] +
+            self.getDataSlotTransmitTimeUs(node)
+            for node in self.topology
+        )
+        return int(self.requestPacketTransmitTimeUs +
+                   lastSlotEndUs +
+                   self.guardIntervalUs +
+                   self.arqOffsetUs)
+
+    def calculatePipelinedPeriodUs(self) -> int:
+        """
+        Calculate the shortest period of overlapping requests which keeps the schedule collision-free.
+
+        A request keeps the gateway busy while it sends the request and receives the slots, and every node
+        while it receives the request and sends its slot, with these busy intervals relative to the request.
+        With a period P, the busy intervals of the request k later are shifted by k * P: the period is valid
+        if no shifted busy interval overlaps a busy interval of the same modem, guard interval included.
+        Every pair of intervals forbids the shifts of an open interval; the sweep starts at the smallest
+        candidate and jumps to the end of the first forbidden interval containing a multiple of the period.
+        The minimal period of serial requests is always valid, so the sweep ends there at the latest.
+
+        Returns:
+            int: The pipelined period in µs
+        """
+        guardUs = max([self.guardIntervalUs] + [self.getGuardIntervalUs(node) for node in self.topology])
+        requestUs = self.requestPacketTransmitTimeUs
+        gatewayBusyUs = [(0, requestUs)]
+        modemsBusyUs = [gatewayBusyUs]
+        for node in self.topology:
+            delayUs = self.assignedTransmitDelaysUs[node]
+            tofUs = self.nodeTwoWayTimeOfFlightUs[node]
+            slotUs = self.getDataSlotTransmitTimeUs(node)
+            arrivalUs = requestUs + delayUs + tofUs
+            gatewayBusyUs.append((arrivalUs, arrivalUs + slotUs))
+            # the node receives the request, waits for its delay and sends its slot
+            transmitUs = requestUs + tofUs // 2 + delayUs
+            modemsBusyUs.append([(tofUs // 2, requestUs + tofUs // 2), (transmitUs, transmitUs + slotUs)])
+
+        # shifts of a busy interval which overlap another busy interval of the same modem
+        forbiddenUs = []
+        for busyUs in modemsBusyUs:
+            for start, end in busyUs:
+                for otherStart, otherEnd in busyUs:
+                    lowUs, highUs = otherStart - end - guardUs, otherEnd - start + guardUs
+                    if highUs > 0:
+                        forbiddenUs.append((lowUs, highUs))
+
+        serialPeriodUs = self.calculateMinimalPeriodUs()
+        periodUs = 1
+        shifted = True
+        while shifted and periodUs < serialPeriodUs:
+            shifted = False
+            k = 1
+            while not shifted and k * periodUs < serialPeriodUs:
+                for lowUs, highUs in forbiddenUs:
+                    if lowUs < k * periodUs < highUs:
+                        periodUs = math.ceil(highUs / k)
+                        shifted = True
+                        break
+                k += 1
+        return int(min(periodUs, serialPeriodUs))
+
+    def getPeriodSec(self) -> float:
+        """Period between two requests in seconds, depending on the period mode"""
+        if self.periodMode == PERIOD_MODE_BACK_TO_BACK:
+            return self.calculateMinimalPeriodUs() * 1e-6
+        if self.periodMode == PERIOD_MODE_PIPELINED:
+            return self.calculatePipelinedPeriodUs() * 1e-6
+        return self.periodeSec
+
+    def getChannelUtilisation(self) -> float:
+        """Fraction of the period during which the channel carries data packets"""
+        # a request cycle cannot be shorter than the minimal period, unless the requests are pipelined
+        periodSec = self.getPeriodSec()
+        if self.periodMode != PERIOD_MODE_PIPELINED:
+            periodSec = max(periodSec, self.calculateMinimalPeriodUs() * 1e-6)
+        return sum(self.getDataSlotTransmitTimeUs(node) for node in self.topology) * 1e-6 / periodSec
+
+    def logPeriod(self):
+        """Report the period and the resulting channel utilisation"""
+        minimalPeriodSec = self.calculateMinimalPeriodUs() * 1e-6
+        if self.periodMode == PERIOD_MODE_FIXED and self.periodeSec < minimalPeriodSec:
+            Logger.warning(f"Gateway: period {self.periodeSec} s is shorter than the minimal period "
+                           f"{minimalPeriodSec:.3f} s, the slots of two requests may collide")
+        Logger.info(f"Gateway: period {self.getPeriodSec():.3f} s ({self.periodMode}, "
+                    f"minimal {minimalPeriodSec:.3f} s), "
+                    f"channel utilisation {self.getChannelUtilisation() * 100:.1f} %")
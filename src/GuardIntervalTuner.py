@@ -0,0 +1,117 @@
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+
+class GuardIntervalTuner:
+    """Adaptive guard interval from the measured arrival jitter of the data packets
+
+    The tuner keeps a rolling window of the arrival errors of every node. The jitter of a node is the
+    deviation of its arrival error from its rolling median, so a constant offset (e.g. the packet airtime
+    not included in the expected arrival time) does not widen the guard interval.
+
+    Two consecutive slots collide when the previous packet arrives late and the next one early by more
+    than the guard interval between them. The guard interval before a node is the sum of the jitter
+    percentiles of the node and of the previous node, each exceeded with probability
+    `collisionProbability / 2`, plus a safety margin.
+    """
+
+    def __init__(self,
+                 collisionProbability: float = 0.01,
+                 windowSize: int = 50,
+                 minSamples: int = 10,
+                 marginUs: int = int(20 * 1e3),
+                 minGuardIntervalUs: int = int(50 * 1e3),
+                 maxGuardIntervalUs: int = int(2 * 1e6),
+                 hysteresis: float = 0.2,
+                 perNode: bool = False):
+        """Constructor of the GuardIntervalTuner class
+
+        Args:
+            collisionProbability (float): Target probability that two consecutive slots overlap
+            windowSize (int): Number of arrival errors kept per node
+            minSamples (int): Number of arrival errors of a node needed before tuning its guard interval
+            marginUs (int): Safety margin added to the guard interval in µs
+            minGuardIntervalUs (int): Lower bound of the guard interval in µs
+            maxGuardIntervalUs (int): Upper bound of the guard interval in µs
+            hysteresis (float): Relative change of a guard interval needed before a reschedule
+            perNode (bool): Tune the guard interval before every node instead of a single global one
+        """
+        if not 0 < collisionProbability < 1:
+            raise ValueError("collisionProbability must be in ]0, 1[")
+        self.collisionProbability = collisionProbability
+        self.windowSize = windowSize
+        self.minSamples = minSamples
+        self.marginUs = marginUs
+        self.minGuardIntervalUs = minGuardIntervalUs
+        self.maxGuardIntervalUs = maxGuardIntervalUs
+        self.hysteresis = hysteresis
+        self.perNode = perNode
+        self.arrivalErrorsUs: Dict[int, Deque[float]] = {}  # Rolling window of arrival errors per node
+
+    def addSample(self, node: int, arrivalErrorUs: float):
+        """Add the arrival error of a data packet of a node"""
+        if node not in self.arrivalErrorsUs:
+            self.arrivalErrorsUs[node] = deque(maxlen=self.windowSize)
+        self.arrivalErrorsUs[node].append(arrivalErrorUs)
+
+    def remove(self, node: int):
+        self.arrivalErrorsUs.pop(node, None)
+
+    def getJitterPercentileUs(self, node: int) -> Optional[float]:
+        """
+        Jitter of a node exceeded with probability `collisionProbability / 2`.
+
+        Returns:
+            Optional[float]: The jitter in µs, None if there are not enough samples
+        """
+        samples = self.arrivalErrorsUs.get(node)
+        if samples is None or len(samples) < self.minSamples:
+            return None
+        median = _percentile(sorted(samples), 0.5)
+        deviations = sorted(abs(sample - median) for sample in samples)
+        return _percentile(deviations, 1 - self.collisionProbability / 2)
+
+    def computeGuardIntervalsUs(self, topology: List) -> Optional[Dict[int, int]]:
+        """
+        Guard interval before each node of the schedule.
+
+        Args:
+            topology (List): The nodes in schedule order
+
+        Returns:
+            Optional[Dict[int, int]]: The guard interval in µs per node (the same for all nodes if not `perNode`),
+            None if a node does not have enough samples yet
+        """
+        jitters = [self.getJitterPercentileUs(node) for node in topology]
+        if len(topology) == 0 or any(jitter is None for jitter in jitters):
+            return None
+
+        if not self.perNode:
+            maxJitter = max(jitters)
+            guardIntervalUs = self._clamp(2 * maxJitter + self.marginUs)
+            return {node: guardIntervalUs for node in topology}
+
+        guardIntervalsUs = {}
+        for i, node in enumerate(topology):
+            previousJitter = jitters[i - 1] if i > 0 else 0
+            guardIntervalsUs[node] = self._clamp(previousJitter + jitters[i] + self.marginUs)
+        return guardIntervalsUs
+
+    def mustUpdate(self, currentUs: Dict[int, int], newUs: Dict[int, int]) -> bool:
+        """True if a guard interval changed by more than the hysteresis"""
+        for node, guardIntervalUs in newUs.items():
+            current = currentUs.get(node)
+            if current is None or abs(guardIntervalUs - current) > self.hysteresis * current:
+                return True
+        return False
+
+    def _clamp(self, guardIntervalUs: float) -> int:
+        return int(min(self.maxGuardIntervalUs, max(self.minGuardIntervalUs, guardIntervalUs)))
+
+
+def _percentile(sortedValues: List[float], q: float) -> float:
+    """Percentile of sorted values with linear interpolation, q in [0, 1]"""
+    position = q * (len(sortedValues) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(sortedValues) - 1)
+    return sortedValues[lower] + (sortedValues[upper] - sortedValues[lower]) * (position - lower)
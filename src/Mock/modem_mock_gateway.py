@@ -7,6 +7,7 @@ class ModemMockGateway(IModem):
         self.callbacks = []
         self.nodes: {} = {}
         self.isReceiving = False
+        self.rangeDelayUs = 0
 
     def connect(self, connection):
         self.connected = True
@@ -16,30 +17,44 @@ class ModemMockGateway(IModem):
         self.isReceiving = True
         pass
 
-    def addRxCallback(self, callback):
-        self.callbacks.append(callback)
+    def addRxCallback(self, callback, type=None, src=None):
+        # the list is replaced, so a callback can be added or removed while the packets are dispatched
+        self.callbacks = self.callbacks + [(callback, type, src)]
 
-    def removeRxCallback(self, cb):
+    def removeRxCallback(self, cb, type=None, src=None):
         """Remove a function to be called on rx pkt."""
-        if cb in self.callbacks:
-            self.callbacks.remove(cb)
+        if (cb, type, src) in self.callbacks:
+            callbacks = list(self.callbacks)
+            callbacks.remove((cb, type, src))
+            self.callbacks = callbacks
 
     def send(self, src, dst, type, payload=bytearray(), status=None, dsn=None):
-        pkt = makePacket(src, dst, type, status, dsn, payload)
+        self.sendFrame(self.prepareFrame(makePacket(src, dst, type, status, dsn, payload)))
+
+    def prepareFrame(self, pkt):
+        """The mock modems exchange the packets, the frame is the packet itself"""
+        return pkt
+
+    def sendFrame(self, frame):
         if not self.connected:
             raise Exception("Modem not connected")
-        print(f"Mock: Sending packet to {dst} with payload {payload}")
-        if dst == BROCAST_ADDRESS:
+        print(f"Mock: Sending packet to {frame.header.dst} with payload {frame.payload}")
+        if frame.header.dst == BROCAST_ADDRESS:
             for node in self.nodes.values():
-                node.receive(pkt)
+                node.receive(frame)
         else:
-            self.nodes[dst].receive(pkt)
+            self.nodes[frame.header.dst].receive(frame)
+
+    def rangeDelay(self, delay=None):
+        if delay is not None:
+            self.rangeDelayUs = delay
 
     def simulateRx(self, packet):
         if not self.isReceiving:
             raise Exception("Modem not receiving")
-        for callback in self.callbacks:
-            callback(packet)
+        for callback, type, src in self.callbacks:
+            if (type is None or type == packet.header.type) and (src is None or src == packet.header.src):
+                callback(packet)
 
     def addNode(self, node):
         self.nodes[node.adress] = node
\ No newline at end of file
@@ -11,6 +11,7 @@ class ModemMockNode(IModem):
         self.receptionDelay = 0
         self.address = address
         self.isReceiving = False
+        self.rangeDelayUs = 0
 
         # Create a mock gateway if none is provided
         if gatewayModem is None:
@@ -35,25 +36,44 @@ class ModemMockNode(IModem):
         pass
 
 
-    def addRxCallback(self, callback):
-        self.callbacks.append(callback)
+    def addRxCallback(self, callback, type=None, src=None):
+        # the list is replaced, so a callback can be added or removed while the packets are dispatched
+        self.callbacks = self.callbacks + [(callback, type, src)]
 
-    def removeRxCallback(self, cb):
+    def removeRxCallback(self, cb, type=None, src=None):
         """Remove a function to be called on rx pkt."""
-        if cb in self.callbacks:
-            self.callbacks.remove(cb)
+        if (cb, type, src) in self.callbacks:
+            callbacks = list(self.callbacks)
+            callbacks.remove((cb, type, src))
+            self.callbacks = callbacks
 
     def send(self, src, dst, type, payload=bytearray(), status=None, dsn=None):
         if dst != GATEWAY_ID:
             raise Exception("Mock: Destination must be the gateway")
-        pkt = makePacket(src, dst, type, status, dsn, payload)
+        self.sendFrame(self.prepareFrame(makePacket(src, dst, type, status, dsn, payload)))
+
+    def prepareFrame(self, pkt):
+        """The mock modems exchange the packets, the frame is the packet itself"""
+        return pkt
+
+    def sendFrame(self, frame):
         if not self.connected:
             raise Exception("Modem not connected")
-        print(f"Mock: Send packet to {dst} with payload {payload}")
-        self.gatewayModem.nodes[src].transmit(pkt)
+        print(f"Mock: Send packet to {frame.header.dst} with payload {frame.payload}")
+        self.gatewayModem.nodes[frame.header.src].transmit(frame)
+
+    def rangeDelay(self, delay=None):
+        """The ranging ack is simulated by the NodeMockGateway, forward the delay to it"""
+        if delay is None:
+            return
+        self.rangeDelayUs = delay
+        node = self.gatewayModem.nodes.get(self.address)
+        if node is not None:
+            node.rangeDelayUs = delay
 
     def simulateRx(self, packet):
         if not self.isReceiving:
             raise Exception("Modem not receiving")
-        for callback in self.callbacks:
-            callback(packet)
+        for callback, type, src in self.callbacks:
+            if (type is None or type == packet.header.type) and (src is None or src == packet.header.src):
+                callback(packet)
@@ -9,6 +9,8 @@ def ResponseWithAckForDelay(node, delay):
     """payload is the full time of flight because ModemMock does not simulate time of flight"""
     tof = int((node.receptionDelay + node.transmitDelay) * 1e6)
     tof_payload = tof.to_bytes(4, 'big')
+    # the modem delays the ranging answer (staggered ranging), the reported ToF is compensated
+    time.sleep(node.rangeDelayUs * 1e-6)
     ack_packet = makePacket(
         src=node.adress,
         dst=0,
@@ -25,11 +27,19 @@ class NodeMockGateway:
         self.receivePackets = []
         self.transmitDelay = 0
         self.receptionDelay = 0
+        self.rangeDelayUs = 0
+        self.transmitTimeCalc = None  # Airtime of the packets (ModemTransmissionCalculator), not simulated if None
         self.looseReceivePacket = False
         self.looseTransmitPacket = False
         self.looseNbReceivePacket = 0
         self.looseNbTransmitPacket = 0
 
+    def getAirtimeSec(self, packet):
+        """The packet is delivered once its last bit arrived"""
+        if self.transmitTimeCalc is None:
+            return 0
+        return self.transmitTimeCalc.calculate_transmission_time(len(packet.payload) * 8) * 1e-6
+
     def transmit(self, packet):
         if(self.looseNbTransmitPacket > 0):
             self.looseNbTransmitPacket -= 1
@@ -40,7 +50,7 @@ class NodeMockGateway:
             return
         def asyncTransmit():
             print(f"Mock: Node {self.adress} is transmitting packet")
-            time.sleep(self.transmitDelay)
+            time.sleep(self.transmitDelay + self.getAirtimeSec(packet))
             print(f"Mock: Node {self.adress} transmitted packet")
             self.modem.simulateRx(packet)
 
@@ -56,7 +66,7 @@ class NodeMockGateway:
             return
         def asyncReceive():
             print(f"Mock: Node {self.adress} is receiving packet")
-            time.sleep(self.receptionDelay)
+            time.sleep(self.receptionDelay + self.getAirtimeSec(packet))
             self.receivePackets.append(packet)
             print(f"Mock: Node {self.adress} received packet")
             if (packet.header.status & FLAG_R) > 0:
@@ -1,13 +1,19 @@
 import time
 from src.i_modem import IModem
 import threading
-from src.constantes import ID_PAQUET_TDI, ID_PAQUET_DATA, ID_PAQUET_REQ_DATA, PAQUET_SIZE
+from src.constantes import ID_PAQUET_TDI, ID_PAQUET_DATA, ID_PAQUET_REQ_DATA, PAQUET_SIZE, DEMAND_STATUS_SHIFT, \
+    DEMAND_MAX, INTER_PACKET_GAP_US
 from src.modem import Modem
 from src.ModemTransmissionCalculator import ModemTransmissionCalculator
+from src.TransmitScheduler import TransmitScheduler
+from src.TransmitLatencyCalibrator import TransmitLatencyCalibrator
+from src.SampleQueue import SampleQueue
 from lib.ahoi.modem.packet import makePacket, printPacket
 import threading
+from collections import OrderedDict, deque
 from typing import List
-from src.utils.Logger import Logger as L
+from src.utils.Logger import Logger as L, LOGLEVELS
+from src.utils.retransmission import decodeRetransmitRequest
 
 Logger = L("NODE")
 
@@ -23,7 +29,12 @@ class NodeTDAMAC:
                  gatewayAddress: int = 0,
                  dataPacketOctetSize: int = PAQUET_SIZE,
                  transmitTimeCalc: ModemTransmissionCalculator = ModemTransmissionCalculator(),
-                 responsePayload: bytearray = bytearray("no payload", 'utf-8')
+                 responsePayload: bytearray = bytearray("no payload", 'utf-8'),
+                 rangeSlotUs: int = 0,
+                 retransmitBufferSize: int = 4,
+                 transmitScheduler: TransmitScheduler = None,
+                 latencyCalibrator: TransmitLatencyCalibrator = None,
+                 sampleQueue: SampleQueue = None
                  ):
         """Constructor of the NodeTDAMAC class
 
@@ -32,6 +43,15 @@ class NodeTDAMAC:
             transmitTimeCalc (ModemTransmissionCalculator): The modem transmission calculator
             the modem should be connected and receiving before creating the node
             address (int): The address of the node
+            rangeSlotUs (int): Ranging delay per node address, the modem answers pings after address * rangeSlotUs
+            so the answers to a broadcast ping do not collide (0 to answer immediately)
+            retransmitBufferSize (int): Number of sent payloads kept for a retransmission requested by the gateway
+            transmitScheduler (TransmitScheduler): The thread sending the data packets at their deadline,
+            a new one if None
+            latencyCalibrator (TransmitLatencyCalibrator): Calibrator of the latency between the send of a data packet
+            and its emission, subtracted from the deadlines once calibrated. None to leave it uncompensated
+            sampleQueue (SampleQueue): Queue of the sensor samples packed into the data packets at each request,
+            None to send the payloads set by the application
         """
         # Todo: assert the modem is connected and receiving
         # Initialize the node address
@@ -45,9 +65,24 @@ class NodeTDAMAC:
         self.transmitTimeCalc = transmitTimeCalc
         self.nodeDataPacketTransmitTimeUs = transmitTimeCalc.calculate_transmission_time(self.dataPacketOctetSize * 8)
         self.responsePayload = responsePayload
+        self.rangeSlotUs = rangeSlotUs
+        self.retransmitBufferSize = retransmitBufferSize
+        self.sentPayloads: OrderedDict = OrderedDict()  # Last sent payloads by data sequence number
+        self.payloadQueue: deque = deque()  # Payloads waiting to be sent, responsePayload is sent when empty
+        self.slotPacketCount = 1  # Number of data packets the gateway assigned to the slot of the node
+        # Sends the data packets at their deadline, its wake-up error tells how much the slot timing drifts
+        self.ownsTransmitScheduler = transmitScheduler is None  # The node stops the scheduler it created on close
+        self.transmitScheduler = transmitScheduler if transmitScheduler is not None else TransmitScheduler()
+        self.latencyCalibrator = latencyCalibrator  # Transmit latency of the link to the modem
+        self.sampleQueue = sampleQueue  # Sensor samples waiting to be packed into data packets
 
-        # Register the callback function for received packets
-        self.modem.addRxCallback(self.NodeCallBack)
+        # Stagger the ranging ack of the node for the broadcast ranging of the gateway
+        if self.rangeSlotUs > 0:
+            self.modem.rangeDelay(self.address * self.rangeSlotUs)
+
+        # Register the callback function for the packets of the gateway handled by the node
+        self.modem.addRxCallback(self.NodeCallBack, type=ID_PAQUET_TDI)
+        self.modem.addRxCallback(self.NodeCallBack, type=ID_PAQUET_REQ_DATA)
 
     @classmethod
     def fromSerialPort(cls, serialport: str, topology: List):
@@ -63,6 +98,29 @@ class NodeTDAMAC:
     def setReponsePayload(self, payload: bytearray):
         self.responsePayload = payload
 
+    def enqueuePayload(self, payload: bytearray):
+        """Queue a payload, the queue depth is advertised to the gateway which sizes the slot of the node"""
+        self.payloadQueue.append(payload)
+
+    def calibrateTransmitLatency(self, rangeDelayUs: int = 0) -> bool:
+        """
+        Measure the transmit latency of the link to the modem with loopback ranging to the gateway
+        (see `TransmitLatencyCalibrator`).
+
+        Args:
+            rangeDelayUs (int): The ranging delay configured on the modem of the gateway
+
+        Returns:
+            bool: True if the latency is calibrated
+        """
+        return self.latencyCalibrator.calibrate(self.modem, self.address, self.gatewayId, rangeDelayUs)
+
+    def getTransmitLatencyUs(self, payloadOctetSize: int) -> float:
+        """Latency between the send of a packet and its emission in µs, 0 if not calibrated"""
+        if self.latencyCalibrator is None:
+            return 0
+        return self.latencyCalibrator.getLatencyUs(self.latencyCalibrator.getFrameOctetSize(payloadOctetSize))
+
     def waitForTDIPacket(self):
         # Wait for the TDI packet if the transmit delay is not assigned
         if self.assignedTransmitDelaysUs >= 0:
@@ -75,17 +133,22 @@ class NodeTDAMAC:
         # Handle the received packet based on its type
         if packet.header.type == ID_PAQUET_TDI:
             # print("node: Received TDI packet")
-            Logger.debug(f"Received TDI packet")
+            Logger.debug("Received TDI packet")
             
             # Assign the transmit delay from the packet payload
-            self.assignedTransmitDelaysUs = int.from_bytes(packet.payload, 'big')
-            Logger.info(f"Transmit delay is assigned to {self.assignedTransmitDelaysUs}µs")
+            self.assignedTransmitDelaysUs = int.from_bytes(packet.payload[:4], 'big')
+            # the gateway sizes the slot with variable slots, one packet otherwise
+            self.slotPacketCount = packet.payload[4] if len(packet.payload) > 4 else 1
+            Logger.info(f"Transmit delay is assigned to {self.assignedTransmitDelaysUs}µs "
+                        f"for {self.slotPacketCount} packets")
             if self.tdiPacketEvent is not None:
                 self.tdiPacketEvent.set()
 
         if packet.header.type == ID_PAQUET_REQ_DATA:
+            # the assigned delay starts at the reception of the request
+            requestTimeSec = time.monotonic()
             # print("node: Received request for data")
-            Logger.debug(f"Received request for data")
+            Logger.debug("Received request for data")
             
             if (self.assignedTransmitDelaysUs is None): 
                 # print("node: Transmit delay is not assigned")
@@ -95,29 +158,110 @@ class NodeTDAMAC:
             # print("node: Sending data..")
             Logger.info(f"Sending data..")
 
-            def sendAsync():
-                # Wait for the assigned transmit delay before sending data
-                time.sleep(max(self.assignedTransmitDelaysUs * 1e-6, 0))
-                pkt = makePacket(
-                    src=self.address,
-                    dst=self.gatewayId,
-                    type=ID_PAQUET_DATA,
-                    payload=self.responsePayload,
-                    dsn=packet.header.dsn
-                )
-                printPacket(pkt)
-                Logger.debug(f"Sent packet [{ID_PAQUET_DATA}] to {self.address}", pkt)
-                Logger.logTX(pkt, f"node{self.address}")
-                
-
-
-                self.modem.send(
-                    src=self.address,
-                    dst=self.gatewayId,
-                    type=ID_PAQUET_DATA,
-                    payload=self.responsePayload,
-                    status=0,
-                    dsn=packet.header.dsn
-                )
             # Send data asynchronously
-            threading.Thread(target=sendAsync).start()
\ No newline at end of file
+            if self.sampleQueue is not None:
+                self.packSamples()
+            if len(self.payloadQueue) == 0:
+                self.scheduleDataPacket(requestTimeSec, self.assignedTransmitDelaysUs, packet.header.dsn)
+            else:
+                self.sendQueuedPayloads(requestTimeSec, packet.header.dsn)
+
+            # Retransmit the packet of the previous request if the gateway missed it
+            offsetUs, retransmitNodes = decodeRetransmitRequest(packet.payload)
+            if self.address in retransmitNodes:
+                previousDsn = (packet.header.dsn - 1) % 256
+                payload = self.sentPayloads.get(previousDsn)
+                if payload is None:
+                    Logger.warning(f"Packet {previousDsn} is no longer buffered, cannot retransmit it")
+                    return
+                Logger.info(f"Retransmitting packet {previousDsn}")
+                self.scheduleDataPacket(requestTimeSec, self.assignedTransmitDelaysUs + offsetUs, previousDsn, payload)
+
+    def packSamples(self):
+        """Pack the pending samples into the payloads of the slot of the node"""
+        while len(self.payloadQueue) < self.slotPacketCount and len(self.sampleQueue) > 0:
+            self.payloadQueue.append(self.sampleQueue.pack(self.dataPacketOctetSize))
+        if len(self.payloadQueue) == 0:
+            # an empty payload tells the gateway that no sample is pending
+            self.payloadQueue.append(bytearray())
+
+    def getPendingPacketCount(self) -> int:
+        """Number of data packets waiting to be sent, queued payloads and samples not packed yet"""
+        pendingSamplePackets = self.sampleQueue.getPacketCount(self.dataPacketOctetSize) \
+            if self.sampleQueue is not None else 0
+        return len(self.payloadQueue) + pendingSamplePackets
+
+    def sendQueuedPayloads(self, requestTimeSec: float, dsn: int):
+        """
+        Send the queued payloads which fit in the slot of the node, back-to-back.
+
+        The status of each packet advertises in its high nibble the number of packets still waiting after it,
+        the gateway sizes the next slot from it. Only the first packet of the slot can be retransmitted.
+        """
+        payloads = [self.payloadQueue.popleft() for _ in range(min(self.slotPacketCount, len(self.payloadQueue)))]
+        self.storeSentPayload(dsn, payloads[0])
+        delayUs = self.assignedTransmitDelaysUs
+        for i, payload in enumerate(payloads):
+            demand = min(DEMAND_MAX, len(payloads) - 1 - i + self.getPendingPacketCount())
+            self.scheduleDataPacket(requestTimeSec, delayUs, dsn, payload, demand << DEMAND_STATUS_SHIFT)
+            delayUs += self.transmitTimeCalc.calculate_transmission_time(len(payload) * 8) + INTER_PACKET_GAP_US
+
+    def storeSentPayload(self, dsn: int, payload: bytearray):
+        # keep the payload for a retransmission requested by the gateway
+        self.sentPayloads[dsn] = payload
+        while len(self.sentPayloads) > self.retransmitBufferSize:
+            self.sentPayloads.popitem(last=False)
+
+    def scheduleDataPacket(self, requestTimeSec: float, delayUs: int, dsn: int, payload: bytearray = None,
+                           status: int = 0):
+        """
+        Send a data packet to the gateway a delay after the reception of a request.
+
+        The frame is built and encoded now, so only its write to the modem is left at the deadline.
+        The deadline is advanced by the transmit latency of the frame, so the packet is emitted after the delay.
+
+        Args:
+            requestTimeSec (float): The reception time of the request on the `time.monotonic` clock
+            delayUs (int): The delay before sending in µs
+            dsn (int): The data sequence number of the request
+            payload (bytearray): The payload to send, None to send the current response payload
+            status (int): The status of the packet, carries the demand of the node
+        """
+        if payload is None:
+            payload = self.responsePayload
+            self.storeSentPayload(dsn, payload)
+        pkt = makePacket(
+            src=self.address,
+            dst=self.gatewayId,
+            type=ID_PAQUET_DATA,
+            ack=status,
+            payload=payload,
+            dsn=dsn
+        )
+        frame = self.modem.prepareFrame(pkt)
+        if Logger.isEnabledFor(LOGLEVELS.DEBUG):
+            printPacket(pkt)
+        Logger.debug("Prepared packet [%s] of %s in %sµs %s", ID_PAQUET_DATA, self.address, delayUs, pkt)
+        delayUs -= self.getTransmitLatencyUs(len(payload))
+        self.transmitScheduler.schedule(requestTimeSec + max(delayUs * 1e-6, 0), self.sendDataPacket, pkt, frame)
+
+    def close(self):
+        """Stop the transmissions of the node, the scheduler thread is stopped if the node created it"""
+        if self.ownsTransmitScheduler:
+            self.transmitScheduler.stop()
+
+    def getWakeUpErrorStatsUs(self):
+        """Wake-up error of the transmissions of the node in µs (see `TransmitScheduler.getWakeUpErrorStatsUs`)"""
+        return self.transmitScheduler.getWakeUpErrorStatsUs()
+
+    def sendDataPacket(self, pkt, frame):
+        """
+        Send a data packet to the gateway.
+
+        Args:
+            pkt: The data packet, logged once sent
+            frame: The frame of the packet prepared by the modem
+        """
+        self.modem.sendFrame(frame)
+        # log after the write, the file access does not delay the transmission
+        Logger.logTX(pkt, f"node{self.address}")
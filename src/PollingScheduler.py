@@ -0,0 +1,32 @@
+from typing import Dict, List
+from src.i_scheduler import IScheduler
+
+
+class PollingScheduler(IScheduler):
+    """Round-robin polling baseline: the nodes are requested one by one and answer immediately
+
+    A cycle sends one unicast request per node and waits for its data packet before polling the next node,
+    so the channel is idle during every round trip. A node without answer is polled again up to
+    `maxRetries` times in the same cycle.
+    """
+
+    def __init__(self, maxRetries: int = 1):
+        """Constructor of the PollingScheduler class
+
+        Args:
+            maxRetries (int): Number of times a node without answer is polled again in the same cycle
+        """
+        self.maxRetries = maxRetries
+
+    def calculateDelaysUs(self, gateway) -> Dict[int, int]:
+        return {node: 0 for node in gateway.topology}
+
+    def getRequestGroups(self, topology: List) -> List[List]:
+        return [[node] for node in topology]
+
+    def handleMiss(self, node: int, missedCount: int) -> bool:
+        return missedCount <= self.maxRetries
+
+    def handleToFEstimate(self, node: int, twoWayTimeOfFlightUs: int) -> bool:
+        # the nodes answer immediately, the time of flight only changes the reception time
+        return False
@@ -0,0 +1,38 @@
+import threading
+from typing import Dict, List
+
+
+class RequestCycle:
+    """State of a data request in flight
+
+    The gateway keeps one cycle per data sequence number, so the packets of overlapping
+    requests (pipelined mode) are stored with the request they answer.
+    """
+
+    def __init__(self, dsn: int, transmitTimeUs: float, timeoutSec: float, nodes: List):
+        """Constructor of the RequestCycle class
+
+        Args:
+            dsn (int): The data sequence number of the request
+            transmitTimeUs (float): The transmit time of the request in µs
+            timeoutSec (float): Time after the transmit time after which the missing packets are considered lost
+            nodes (List): The nodes requested
+        """
+        self.dsn = dsn
+        self.nodes = nodes
+        self.timeoutSec = timeoutSec
+        self.requestTransmitTimeUs = 0  # Airtime of the request, set once it is sent
+        self.setTransmitTimeUs(transmitTimeUs)
+        self.receivedPaquets: Dict[int, object] = {}  # First data packet of each node
+        self.receivePacketTimeUs: Dict[int, float] = {}  # Reception time of the first data packet of each node
+        self.slotPaquets: Dict[int, List] = {}  # Data packets of the slot of each node
+        self.allReceivedEvent = threading.Event()  # Set when the slots of all requested nodes are complete
+
+    def setTransmitTimeUs(self, transmitTimeUs: float):
+        """Moves the request to its actual transmit time in µs, the timeout follows"""
+        self.transmitTimeUs = transmitTimeUs
+        self.deadlineSec = transmitTimeUs * 1e-6 + self.timeoutSec
+
+    def isOver(self, nowSec: float) -> bool:
+        """True if all the data packets were received or the timeout expired"""
+        return self.allReceivedEvent.is_set() or nowSec >= self.deadlineSec
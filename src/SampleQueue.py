@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Tuple
+from src.utils.samples import encodeSamples, encodeVarint
+
+
+class SampleQueue:
+    """Bounded thread-safe queue of the sensor samples of a node, packed into the data packets
+
+    The application pushes its readings at any rate, the node packs the oldest pending readings into
+    each data packet when a request arrives, so the readings taken between two requests are delivered
+    instead of overwritten. Each sample carries a compact timestamp (see `src.utils.samples`).
+    When the queue is full, the oldest sample is dropped.
+    """
+
+    def __init__(self, sampleOctetSize: int, maxSamples: int = 256, timeUnitSec: float = 0.1):
+        """Constructor of the SampleQueue class
+
+        Args:
+            sampleOctetSize (int): Size of each sample
+            maxSamples (int): Maximum number of pending samples
+            timeUnitSec (float): Resolution of the timestamps of the samples
+        """
+        self.sampleOctetSize = sampleOctetSize
+        self.timeUnitSec = timeUnitSec
+        self.samples: Deque[Tuple[float, bytes]] = deque(maxlen=maxSamples)  # Pending (time, octets), oldest first
+        self.nbDroppedSamples = 0  # Number of samples dropped because the queue was full
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.samples)
+
+    def push(self, sample: bytes, timeSec: float = None):
+        """
+        Add a sample.
+
+        Args:
+            sample (bytes): The sample, of `sampleOctetSize` octets
+            timeSec (float): The time of the sample on the `time.time` clock, now if None
+        """
+        if len(sample) != self.sampleOctetSize:
+            raise ValueError(f"A sample must be {self.sampleOctetSize} octets, not {len(sample)}")
+        with self.lock:
+            if len(self.samples) == self.samples.maxlen:
+                self.nbDroppedSamples += 1
+            self.samples.append((time.time() if timeSec is None else timeSec, bytes(sample)))
+
+    def pack(self, maxOctetSize: int, nowSec: float = None) -> bytearray:
+        """
+        Remove the oldest samples which fit in a payload and encode them.
+
+        Args:
+            maxOctetSize (int): Size of the payload
+            nowSec (float): The packing time on the `time.time` clock, now if None
+
+        Returns:
+            bytearray: The payload, empty if no sample is pending
+        """
+        nowUnits = round((time.time() if nowSec is None else nowSec) / self.timeUnitSec)
+        packed = []
+        octetSize = 0
+        with self.lock:
+            previousUnits = nowUnits
+            while len(self.samples) > 0:
+                sampleUnits = round(self.samples[0][0] / self.timeUnitSec)
+                # the first sample carries its age, the next ones the time since the previous sample
+                delta = max(0, previousUnits - sampleUnits if len(packed) == 0 else sampleUnits - previousUnits)
+                sampleOctetSize = len(encodeVarint(delta)) + self.sampleOctetSize
+                if octetSize + sampleOctetSize > maxOctetSize:
+                    break
+                packed.append((delta, self.samples.popleft()[1]))
+                octetSize += sampleOctetSize
+                previousUnits = sampleUnits
+        if len(packed) == 0 and len(self.samples) > 0:
+            raise ValueError(f"A sample does not fit in a payload of {maxOctetSize} octets")
+        return encodeSamples(packed)
+
+    def getPacketCount(self, maxOctetSize: int) -> int:
+        """Number of payloads needed to send the pending samples, assuming one octet of timestamp per sample"""
+        samplesPerPacket = max(1, maxOctetSize // (self.sampleOctetSize + 1))
+        return -(-len(self.samples) // samplesPerPacket)
@@ -0,0 +1,42 @@
+from typing import Dict, List
+from src.i_scheduler import IScheduler
+
+
+class TDAMACScheduler(IScheduler):
+    """TDA-MAC scheduling: one broadcast request, the delays compensate the time of flight of the nodes
+
+    The slots are packed at the gateway: each slot arrives one guard interval after the previous one,
+    so the delay of a node is the delay of the previous node, plus the previous slot and the guard interval,
+    minus the extra two-way time of flight of the node.
+    A node too far behind the previous one cannot transmit earlier than the request: its delay is 0 and its slot
+    arrives later than packed, the next slots follow its actual arrival.
+    """
+
+    def calculateDelaysUs(self, gateway) -> Dict[int, int]:
+        delaysUs = {}
+        for i, node in enumerate(gateway.topology):
+            if i == 0:
+                # transmit delay of the first node is 0
+                delaysUs[node] = 0
+                continue
+            previousNode = gateway.topology[i - 1]
+            transmitDelayToNode = gateway.nodeTwoWayTimeOfFlightUs[node] // 2
+            transmitDelayToPreviousNode = gateway.nodeTwoWayTimeOfFlightUs[previousNode] // 2
+
+            delaysUs[node] = max(0,
+                delaysUs[previousNode] +
+                gateway.getDataSlotTransmitTimeUs(previousNode) +
+                gateway.getGuardIntervalUs(node) +
+                - 2 * (transmitDelayToNode - transmitDelayToPreviousNode))
+        return delaysUs
+
+    def getRequestGroups(self, topology: List) -> List[List]:
+        return [list(topology)]
+
+    def handleMiss(self, node: int, missedCount: int) -> bool:
+        # the next request (or the selective ARQ) gives the node another chance
+        return False
+
+    def handleToFEstimate(self, node: int, twoWayTimeOfFlightUs: int) -> bool:
+        # the delays depend on the time of flight of every node
+        return True
@@ -0,0 +1,46 @@
+from typing import Dict, List
+from src.i_scheduler import IScheduler
+
+
+class TDMAScheduler(IScheduler):
+    """Fixed-slot TDMA baseline: one broadcast request, slots of the same length in schedule order
+
+    Every slot lasts the largest slot airtime, the guard interval and the largest two-way time of flight,
+    so the node of slot i transmits i slots after the request whatever its distance. The largest time of flight
+    is `maxTwoWayTimeOfFlightUs`, or the largest measured one if not set; the slots grow when a node moves further.
+    """
+
+    def __init__(self, maxTwoWayTimeOfFlightUs: int = None):
+        """Constructor of the TDMAScheduler class
+
+        Args:
+            maxTwoWayTimeOfFlightUs (int): Largest two-way time of flight covered by a slot in µs,
+            None to take the largest measured time of flight
+        """
+        self.maxTwoWayTimeOfFlightUs = maxTwoWayTimeOfFlightUs
+
+    def getSlotUs(self, gateway) -> int:
+        """Length of a slot in µs"""
+        if self.maxTwoWayTimeOfFlightUs is None:
+            self.maxTwoWayTimeOfFlightUs = max(gateway.nodeTwoWayTimeOfFlightUs[node] for node in gateway.topology)
+        return max(gateway.getDataSlotTransmitTimeUs(node) + gateway.getGuardIntervalUs(node)
+                   for node in gateway.topology) + self.maxTwoWayTimeOfFlightUs
+
+    def calculateDelaysUs(self, gateway) -> Dict[int, int]:
+        if len(gateway.topology) == 0:
+            return {}
+        slotUs = self.getSlotUs(gateway)
+        return {node: i * slotUs for i, node in enumerate(gateway.topology)}
+
+    def getRequestGroups(self, topology: List) -> List[List]:
+        return [list(topology)]
+
+    def handleMiss(self, node: int, missedCount: int) -> bool:
+        return False
+
+    def handleToFEstimate(self, node: int, twoWayTimeOfFlightUs: int) -> bool:
+        # the slots only change when they no longer cover the time of flight of the node
+        if self.maxTwoWayTimeOfFlightUs is not None and twoWayTimeOfFlightUs <= self.maxTwoWayTimeOfFlightUs:
+            return False
+        self.maxTwoWayTimeOfFlightUs = twoWayTimeOfFlightUs
+        return True
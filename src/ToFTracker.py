@@ -0,0 +1,63 @@
+from typing import Dict, List
+
+
+class ToFTracker:
+    """Per-node tracking of the two-way time of flight from the arrival time of the data packets
+
+    Each data packet gives an observation of the two-way time of flight of its node:
+    the reception time minus the transmit time of the request and the assigned transmit delay.
+    The observations are smoothed with an exponential filter. A node has drifted when its estimate
+    is further than `driftThresholdUs` from the time of flight its transmit delay was calculated with.
+    """
+
+    def __init__(self, alpha: float = 0.3, driftThresholdUs: float = 50 * 1e3):
+        """Constructor of the ToFTracker class
+
+        Args:
+            alpha (float): Weight of a new observation in the exponential filter (0 < alpha <= 1)
+            driftThresholdUs (float): Drift of the estimate in µs after which the node must be rescheduled
+        """
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in ]0, 1]")
+        self.alpha = alpha
+        self.driftThresholdUs = driftThresholdUs
+        self.estimatesUs: Dict[int, float] = {}  # Filtered two-way time of flight of the nodes
+        self.scheduledUs: Dict[int, float] = {}  # Two-way time of flight used to calculate the transmit delays
+
+    def reset(self, nodeTwoWayTimeOfFlightUs: Dict[int, int]):
+        """Restart the tracking from the measured two-way time of flight of the nodes"""
+        self.estimatesUs = {node: float(tof) for node, tof in nodeTwoWayTimeOfFlightUs.items()}
+        self.scheduledUs = dict(self.estimatesUs)
+
+    def update(self, node: int, observedTwoWayTimeOfFlightUs: float) -> float:
+        """
+        Add an observation of the two-way time of flight of a node.
+
+        Returns:
+            float: The new estimate in µs
+        """
+        if node not in self.estimatesUs:
+            self.estimatesUs[node] = float(observedTwoWayTimeOfFlightUs)
+            self.scheduledUs[node] = self.estimatesUs[node]
+        else:
+            self.estimatesUs[node] += self.alpha * (observedTwoWayTimeOfFlightUs - self.estimatesUs[node])
+        return self.estimatesUs[node]
+
+    def getEstimateUs(self, node: int) -> int:
+        return int(round(self.estimatesUs[node]))
+
+    def getDriftUs(self, node: int) -> float:
+        return self.estimatesUs[node] - self.scheduledUs[node]
+
+    def getDriftedNodes(self) -> List:
+        """Nodes whose estimate drifted past the threshold since their delay was calculated"""
+        return [node for node in self.estimatesUs if abs(self.getDriftUs(node)) > self.driftThresholdUs]
+
+    def markScheduled(self, nodes: List):
+        """The transmit delays of the nodes have been recalculated with their current estimate"""
+        for node in nodes:
+            self.scheduledUs[node] = self.estimatesUs[node]
+
+    def remove(self, node: int):
+        self.estimatesUs.pop(node, None)
+        self.scheduledUs.pop(node, None)
@@ -0,0 +1,93 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+
+class TopologyCache:
+    """On-disk cache of the network state measured by the gateway
+
+    The cache holds the topology, the two-way time of flight and the assigned transmit
+    delay of every node, with the time they were last measured or validated.
+    It lets a restarted gateway reuse the schedule instead of pinging every node again.
+    """
+
+    def __init__(self, path: str, maxAgeSec: float = 3600):
+        """Constructor of the TopologyCache class
+
+        Args:
+            path (str): Path of the cache file
+            maxAgeSec (float): Age after which a cached node is not trusted anymore
+        """
+        self.path = path
+        self.maxAgeSec = maxAgeSec
+
+    def save(self, topology: List, nodeTwoWayTimeOfFlightUs: Dict[int, int], assignedTransmitDelaysUs: Dict[int, int]):
+        """
+        Write the network state to the cache file.
+
+        The file is written to a temporary file first and then renamed,
+        so a crash during the write does not corrupt the previous cache.
+
+        Args:
+            topology (List): The scheduled nodes, in schedule order
+            nodeTwoWayTimeOfFlightUs (Dict[int, int]): Two-way time of flight of the nodes
+            assignedTransmitDelaysUs (Dict[int, int]): Assigned transmit delay of the nodes
+        """
+        now = time.time()
+        nodes = {}
+        for node in topology:
+            if node not in nodeTwoWayTimeOfFlightUs or node not in assignedTransmitDelaysUs:
+                continue
+            nodes[str(node)] = {
+                "twoWayTimeOfFlightUs": nodeTwoWayTimeOfFlightUs[node],
+                "assignedTransmitDelayUs": assignedTransmitDelaysUs[node],
+                "updatedAt": now
+            }
+        content = {
+            "savedAt": now,
+            "topology": [node for node in topology if str(node) in nodes],
+            "nodes": nodes
+        }
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmpPath = self.path + ".tmp"
+        with open(tmpPath, "w") as f:
+            json.dump(content, f, indent=2)
+        os.replace(tmpPath, self.path)
+
+    def load(self) -> Optional[dict]:
+        """
+        Read the network state from the cache file.
+
+        Nodes older than `maxAgeSec` are discarded.
+
+        Returns:
+            Optional[dict]: None if there is no usable cache, otherwise a dictionary with
+            the keys "topology" (List), "nodeTwoWayTimeOfFlightUs" (Dict[int, int])
+            and "assignedTransmitDelaysUs" (Dict[int, int])
+        """
+        try:
+            with open(self.path, "r") as f:
+                content = json.load(f)
+            now = time.time()
+            nodes = {int(node): values for node, values in content["nodes"].items()
+                     if now - values["updatedAt"] <= self.maxAgeSec}
+            topology = [node for node in content["topology"] if node in nodes]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+        if len(topology) == 0:
+            return None
+        return {
+            "topology": topology,
+            "nodeTwoWayTimeOfFlightUs": {node: nodes[node]["twoWayTimeOfFlightUs"] for node in topology},
+            "assignedTransmitDelaysUs": {node: nodes[node]["assignedTransmitDelayUs"] for node in topology}
+        }
+
+    def clear(self):
+        """Remove the cache file"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,128 @@
+import threading
+import time
+from typing import List, Optional, Tuple
+from lib.ahoi.modem.packet import HEADER_FORMAT
+from src.constantes import ID_PAQUET_PING, FLAG_R
+from src.i_modem import IModem
+from src.ModemTransmissionCalculator import ModemTransmissionCalculator
+from src.utils.Logger import Logger as L
+
+Logger = L("CALIBRATION")
+
+
+class TransmitLatencyCalibrator:
+    """Latency between the send of a frame by the host and its acoustic emission, as a function of the frame length
+
+    The latency is measured with loopback ranging: a ping is sent to a remote modem, which answers with a
+    ranging ack carrying the acoustic two-way time of flight. The end-to-end time measured by the host minus
+    the time of flight, the ranging delay of the remote modem and the acoustic airtime of the ping and of the ack
+    is the transmit latency of the ping (UART or TCP forwarding, firmware queueing) plus the receive latency
+    of the ack. The pings are padded to several
+    lengths and a line is fitted: latency = interceptUs + perOctetUs * frame length.
+
+    A node starts its assigned delay when the host receives the request, so the sum of the transmit and
+    receive latencies is exactly the offset to subtract from its deadline.
+    """
+
+    def __init__(self,
+                 payloadOctetSizes: Tuple = (0, 16, 32, 64),
+                 nbPingsPerSize: int = 3,
+                 timeoutSec: float = 5,
+                 transmitTimeCalc: ModemTransmissionCalculator = ModemTransmissionCalculator()):
+        """Constructor of the TransmitLatencyCalibrator class
+
+        Args:
+            payloadOctetSizes (Tuple): Payload sizes of the calibration pings, at least two different sizes
+            nbPingsPerSize (int): Number of pings per payload size
+            timeoutSec (float): Timeout for the ranging ack of a ping
+            transmitTimeCalc (ModemTransmissionCalculator): Airtime of the pings and acks, removed from the samples
+        """
+        if len(set(payloadOctetSizes)) < 2:
+            raise ValueError("At least two different payload sizes are needed to fit the latency")
+        self.payloadOctetSizes = payloadOctetSizes
+        self.nbPingsPerSize = nbPingsPerSize
+        self.timeoutSec = timeoutSec
+        self.transmitTimeCalc = transmitTimeCalc
+        self.samples: List[Tuple[int, float]] = []  # Measured (frame length in octets, latency in µs)
+        self.interceptUs: Optional[float] = None  # Latency of an empty frame, None if not calibrated
+        self.perOctetUs: Optional[float] = None  # Latency of each octet of the frame, None if not calibrated
+
+    @staticmethod
+    def getFrameOctetSize(payloadOctetSize: int) -> int:
+        """Length of the frame of a packet, header included"""
+        return len(HEADER_FORMAT) + payloadOctetSize
+
+    def isCalibrated(self) -> bool:
+        return self.interceptUs is not None
+
+    def addSample(self, frameOctetSize: int, latencyUs: float):
+        """Add a measured latency of a frame"""
+        self.samples.append((frameOctetSize, latencyUs))
+
+    def fit(self) -> bool:
+        """
+        Fit the latency line to the samples with the least squares.
+
+        Returns:
+            bool: True if the samples cover at least two frame lengths and the latency is calibrated
+        """
+        if len(set(size for size, _ in self.samples)) < 2:
+            return False
+        n = len(self.samples)
+        meanSize = sum(size for size, _ in self.samples) / n
+        meanLatencyUs = sum(latencyUs for _, latencyUs in self.samples) / n
+        covariance = sum((size - meanSize) * (latencyUs - meanLatencyUs) for size, latencyUs in self.samples)
+        variance = sum((size - meanSize) ** 2 for size, _ in self.samples)
+        self.perOctetUs = covariance / variance
+        self.interceptUs = meanLatencyUs - self.perOctetUs * meanSize
+        Logger.info(f"Transmit latency: {self.interceptUs:.0f} µs + {self.perOctetUs:.1f} µs per octet")
+        return True
+
+    def getLatencyUs(self, frameOctetSize: int) -> float:
+        """Latency of a frame in µs, 0 if not calibrated"""
+        if not self.isCalibrated():
+            return 0
+        return max(0, self.interceptUs + self.perOctetUs * frameOctetSize)
+
+    def calibrate(self, modem: IModem, src: int, dst: int, rangeDelayUs: int = 0) -> bool:
+        """
+        Measure the latency with pings of every payload size to a remote modem, then fit it.
+
+        The pings without answer are skipped.
+
+        Args:
+            modem (IModem): The modem of the host, connected and receiving
+            src (int): The address of the host
+            dst (int): The address of the remote modem
+            rangeDelayUs (int): The ranging delay configured on the remote modem
+
+        Returns:
+            bool: True if the latency is calibrated
+        """
+        ackEvent = threading.Event()
+        ack = {}
+
+        def modemCallback(pkt):
+            # the modem only calls back the pings of the remote modem, the ranging acks carry a payload
+            if pkt.header.len > 0:
+                ack["timeNs"] = time.monotonic_ns()
+                ack["tofUs"] = int.from_bytes(pkt.payload[:4], 'big')
+                ack["octetSize"] = pkt.header.len
+                ackEvent.set()
+
+        modem.addRxCallback(modemCallback, type=ID_PAQUET_PING, src=dst)
+        for payloadOctetSize in self.payloadOctetSizes:
+            for _ in range(self.nbPingsPerSize):
+                ackEvent.clear()
+                sendTimeNs = time.monotonic_ns()
+                modem.send(src=src, dst=dst, type=ID_PAQUET_PING, payload=bytearray(payloadOctetSize),
+                           status=FLAG_R, dsn=0)
+                if not ackEvent.wait(timeout=self.timeoutSec + rangeDelayUs * 1e-6):
+                    Logger.warning(f"No ranging ack from {dst} for a calibration ping of {payloadOctetSize} octets")
+                    continue
+                airtimeUs = self.transmitTimeCalc.calculate_transmission_time(payloadOctetSize * 8) + \
+                    self.transmitTimeCalc.calculate_transmission_time(ack["octetSize"] * 8)
+                latencyUs = (ack["timeNs"] - sendTimeNs) * 1e-3 - ack["tofUs"] - rangeDelayUs - airtimeUs
+                self.addSample(self.getFrameOctetSize(payloadOctetSize), latencyUs)
+        modem.removeRxCallback(modemCallback, type=ID_PAQUET_PING, src=dst)
+        return self.fit()
@@ -0,0 +1,87 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Tuple
+from src.utils.Logger import Logger as L
+
+Logger = L("SCHEDULER")
+
+
+class TransmitScheduler:
+    """Single thread running the transmissions of a node at precise deadlines
+
+    The deadlines are on the monotonic clock. The thread sleeps until `spinSec` before the
+    earliest deadline, then spins until the deadline, so the OS sleep jitter and the start-up
+    cost of a thread per transmission do not shift the slots. The wake-up error (actual start
+    of the transmission minus its deadline) is recorded for every transmission.
+    """
+
+    def __init__(self, spinSec: float = 2e-3, errorWindowSize: int = 100):
+        """Constructor of the TransmitScheduler class
+
+        Args:
+            spinSec (float): Time before a deadline spent spinning instead of sleeping
+            errorWindowSize (int): Number of wake-up errors kept
+        """
+        self.spinSec = spinSec
+        self.wakeUpErrorsUs: Deque[float] = deque(maxlen=errorWindowSize)  # Last wake-up errors in µs
+        self.queue: List[Tuple[float, int, Callable, tuple]] = []  # Heap of (deadline, order, callback, args)
+        self.order = itertools.count()  # Keeps the order of the transmissions with the same deadline
+        self.condition = threading.Condition()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def schedule(self, deadlineSec: float, callback: Callable, *args):
+        """
+        Run `callback(*args)` at a deadline.
+
+        Args:
+            deadlineSec (float): The deadline on the `time.monotonic` clock
+            callback (Callable): The transmission to run
+        """
+        with self.condition:
+            heapq.heappush(self.queue, (deadlineSec, next(self.order), callback, args))
+            self.condition.notify()
+
+    def stop(self):
+        """Stop the thread, the pending transmissions are dropped"""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and (len(self.queue) == 0 or
+                                        self.queue[0][0] - time.monotonic() > self.spinSec):
+                    # coarse sleep until the spin window of the earliest deadline, or a new deadline
+                    timeoutSec = None if len(self.queue) == 0 else self.queue[0][0] - time.monotonic() - self.spinSec
+                    self.condition.wait(timeoutSec)
+                if not self.running:
+                    return
+                deadlineSec, _, callback, args = heapq.heappop(self.queue)
+
+            while time.monotonic() < deadlineSec:
+                pass
+            self.wakeUpErrorsUs.append((time.monotonic() - deadlineSec) * 1e6)
+            try:
+                callback(*args)
+            except Exception as e:
+                # a failed transmission (e.g. closed connection) must not stop the next ones
+                Logger.error("Scheduled transmission failed: %r", e)
+
+    def getWakeUpErrorStatsUs(self) -> Dict[str, float]:
+        """Mean, maximum and 99th percentile of the last wake-up errors in µs, empty if nothing was sent"""
+        if len(self.wakeUpErrorsUs) == 0:
+            return {}
+        errorsUs = sorted(self.wakeUpErrorsUs)
+        return {
+            "mean": sum(errorsUs) / len(errorsUs),
+            "max": errorsUs[-1],
+            "p99": errorsUs[min(len(errorsUs) - 1, int(0.99 * len(errorsUs)))],
+        }
@@ -14,3 +14,13 @@ FLAG_E = 0x04
 GATEWAY_ID = 0x00
 BROCAST_ADDRESS = 0xFF
 
+# Mode de période de la gateway
+PERIOD_MODE_FIXED = "fixed"  # période fixe (periodeSec), cycle de service
+PERIOD_MODE_BACK_TO_BACK = "back-to-back"  # requête suivante dès que le dernier slot ne peut plus entrer en collision
+PERIOD_MODE_PIPELINED = "pipelined"  # requêtes superposées, les slots de plusieurs requêtes sont en vol
+
+
+# Slots de longueur variable : demande des nœuds dans les 4 bits de poids fort du statut des paquets de données
+DEMAND_STATUS_SHIFT = 4
+DEMAND_MAX = 0x0F  # nombre maximal de paquets en attente annoncé par un nœud
+INTER_PACKET_GAP_US = 50 * 1000  # intervalle entre deux paquets consécutifs d'un même slot
@@ -20,11 +20,13 @@ class IModem(ABC):
         """
 
     @abstractmethod
-    def addRxCallback(self, callback):
+    def addRxCallback(self, callback, type=None, src=None):
         """Ajoute une fonction à appeler lors de la réception d'un paquet.
 
         Args:
             callback: Fonction à appeler lors de la réception d'un paquet.
+            type: Type des paquets transmis à la fonction, tous les types si None.
+            src: Adresse source des paquets transmis à la fonction, toutes les sources si None.
         """
         pass
 
@@ -38,14 +40,53 @@ class IModem(ABC):
             payload: Données à envoyer.
             status: flag de status du paquet.
             dsn: Numéro de séquence du paquet.
+
+        Returns:
+            Un Future complété avec l'heure (time.time_ns()) à laquelle la trame est écrite sur la connexion,
+            ou None si le modem n'en fournit pas.
         """
         pass
 
     @abstractmethod
-    def removeRxCallback(self, cb):
+    def prepareFrame(self, pkt):
+        """Prépare la trame d'un paquet pour l'envoyer plus tard avec `sendFrame`.
+
+        Args:
+            pkt: Paquet à encoder.
+
+        Returns:
+            La trame prête à être écrite sur la connexion du modem.
+        """
+        pass
+
+    @abstractmethod
+    def sendFrame(self, frame):
+        """Envoie une trame préparée par `prepareFrame`, sans l'encoder de nouveau.
+
+        Args:
+            frame: Trame retournée par `prepareFrame`.
+
+        Returns:
+            Comme `send`.
+        """
+        pass
+
+    @abstractmethod
+    def removeRxCallback(self, cb, type=None, src=None):
         """Supprime une fonction à appeler lors de la réception d'un paquet.
 
         Args:
             cb: Fonction à supprimer.
+            type: Type donné lors de l'ajout de la fonction.
+            src: Adresse source donnée lors de l'ajout de la fonction.
+        """
+        pass
+
+    @abstractmethod
+    def rangeDelay(self, delay=None):
+        """Configure le délai de réponse aux demandes de ranging.
+
+        Args:
+            delay: Délai en µs appliqué par le modem avant d'émettre l'ACK de ranging.
         """
         pass
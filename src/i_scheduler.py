@@ -0,0 +1,57 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+
+class IScheduler(ABC):
+    """Interface pour les politiques d'ordonnancement MAC de la gateway."""
+    @abstractmethod
+    def calculateDelaysUs(self, gateway) -> Dict[int, int]:
+        """Calcule le délai de transmission de chaque nœud après la réception de la requête.
+
+        Args:
+            gateway: La gateway, fournit la topologie triée par temps de vol, le temps de vol aller-retour,
+            la durée du slot et l'intervalle de garde de chaque nœud.
+
+        Returns:
+            Le délai de transmission en µs de chaque nœud de la topologie.
+        """
+        pass
+
+    @abstractmethod
+    def getRequestGroups(self, topology: List) -> List[List]:
+        """Découpe un cycle en requêtes de données.
+
+        Args:
+            topology: Les nœuds du réseau.
+
+        Returns:
+            Les groupes de nœuds interrogés par une même requête, dans l'ordre du cycle.
+            Un groupe d'un seul nœud est interrogé en unicast.
+        """
+        pass
+
+    @abstractmethod
+    def handleMiss(self, node: int, missedCount: int) -> bool:
+        """Traite l'absence du paquet de données d'un nœud.
+
+        Args:
+            node: Le nœud.
+            missedCount: Nombre de requêtes consécutives sans paquet de données du nœud.
+
+        Returns:
+            Vrai si le nœud doit être interrogé à nouveau dans le cycle courant.
+        """
+        pass
+
+    @abstractmethod
+    def handleToFEstimate(self, node: int, twoWayTimeOfFlightUs: int) -> bool:
+        """Traite une nouvelle estimation du temps de vol d'un nœud.
+
+        Args:
+            node: Le nœud.
+            twoWayTimeOfFlightUs: Nouveau temps de vol aller-retour en µs.
+
+        Returns:
+            Vrai si les délais de transmission doivent être recalculés.
+        """
+        pass
@@ -14,16 +14,25 @@ class Modem(AHOIModem, IModem):
         
 
     def send(self, src, dst, type, payload=bytearray(), status=None, dsn=None):
-        super().send(src, dst, type, payload, status, dsn)
+        return super().send(src, dst, type, payload, status, dsn)
 
-    def addRxCallback(self, callback):
-        super().addRxCallback(callback)
+    def prepareFrame(self, pkt):
+        return super().prepareFrame(pkt)
+
+    def sendFrame(self, frame):
+        return super().sendFrame(frame)
+
+    def addRxCallback(self, callback, type=None, src=None):
+        super().addRxCallback(callback, type, src)
 
     def receive(self, thread=False):
         super().receive(thread)
 
-    def removeRxCallback(self, cb):
-        super().removeRxCallback(cb)
+    def removeRxCallback(self, cb, type=None, src=None):
+        super().removeRxCallback(cb, type, src)
+
+    def rangeDelay(self, delay=None):
+        return super().rangeDelay(delay)
 
     def getVersion(self):
         return super().getVersion()
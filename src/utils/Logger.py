@@ -1,9 +1,11 @@
 from datetime import datetime
 from enum import Enum
 from lib.ahoi.modem.packet import packet2HexString
+import atexit
+import queue
 import string
-import os 
-from datetime import datetime
+import os
+import threading
 import time
 
 class bcolors:
@@ -20,16 +22,144 @@ class bcolors:
 
 LOGLEVELS = Enum('LOGLEVELS', [('DEBUG', bcolors.OKCYAN), ('INFO',bcolors.OKBLUE), ('WARNING', bcolors.WARNING), ('ERROR', bcolors.FAIL)])
 
+# severity of the levels, in declaration order
+SEVERITY = {level: severity for severity, level in enumerate(LOGLEVELS)}
+
+PRINTABLE = set(string.digits + string.ascii_letters + string.punctuation)
+
+
+class FlushRequest:
+    """Record set once the records queued before it are written, the packet logs are closed if `closeFiles`"""
+
+    def __init__(self, closeFiles: bool = False):
+        self.closeFiles = closeFiles
+        self.done = threading.Event()
+
+
+class LogQueue:
+    """
+    Background writer of the console messages and of the packet logs.
+
+    The callers only queue their records, a single thread prints the messages and writes the lines to the packet
+    logs, keeping one open file per log.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.files = {}
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def put(self, record):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+        self.queue.put(record)
+
+    def run(self):
+        while True:
+            record = self.queue.get()
+            touched = set()
+            # write the whole backlog before flushing
+            while record is not None:
+                if isinstance(record, FlushRequest):
+                    self.flushFiles(touched)
+                    touched = set()
+                    if record.closeFiles:
+                        self.closeFiles()
+                    record.done.set()
+                else:
+                    path, line = record
+                    if path is None:
+                        print(line, end="")
+                    else:
+                        self.getFile(path).write(line + "\n")
+                        touched.add(path)
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    record = None
+            self.flushFiles(touched)
+
+    def getFile(self, path: str):
+        f = self.files.get(path)
+        if f is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            f = open(path, "a")
+            self.files[path] = f
+        return f
+
+    def flushFiles(self, paths):
+        for path in paths:
+            self.files[path].flush()
+
+    def closeFiles(self):
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+
+    def flush(self, timeoutSec: float = 5.0, closeFiles: bool = False):
+        """Wait until the records queued so far are written, then close the packet logs if `closeFiles`"""
+        if self.thread is None:
+            return
+        request = FlushRequest(closeFiles)
+        self.queue.put(request)
+        request.done.wait(timeoutSec)
+
+
+logQueue = LogQueue()
+atexit.register(logQueue.flush)
+
 
 class Logger:
+    # messages below this level are dropped before being formatted (see setLevel)
+    level = LOGLEVELS.DEBUG
+    # directory of the packet logs (see setLogDir)
+    logDir = "logs"
+
     def __init__(self, title: str):
         self.title = title
         self.logname = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 
+    @staticmethod
+    def setLevel(level: LOGLEVELS):
+        """Set the lowest level printed, for all the loggers"""
+        Logger.level = level
+
+    @staticmethod
+    def setLogDir(logDir: str):
+        """Write the next packet logs to this directory, the logs written so far are closed"""
+        logQueue.flush(closeFiles=True)
+        Logger.logDir = logDir
+
+    @staticmethod
+    def isEnabledFor(level: LOGLEVELS) -> bool:
+        return SEVERITY[level] >= SEVERITY[Logger.level]
+
+    @staticmethod
+    def flush():
+        """Wait until the queued messages and packet logs are written"""
+        logQueue.flush()
+
     def __print(self, level: LOGLEVELS, text: str, *args, **kwargs):
+        """
+        Queue a message, formatted as `text % args` (like the logging module) only if its level is enabled.
+        The keyword arguments `sep` and `end` are those of print.
+        """
+        if SEVERITY[level] < SEVERITY[Logger.level]:
+            return
+        if args:
+            text = text % args
         now = datetime.now()
+        sep = kwargs.get("sep", " ")
+        end = kwargs.get("end", "\n")
 
-        print(f"{level.value}{now.strftime('%Y-%m-%d %H:%M:%S')} [{self.title}] {level.name}:{bcolors.ENDC} {text}", *args, **kwargs)
+        logQueue.put((None, f"{level.value}{now.strftime('%Y-%m-%d %H:%M:%S')} [{self.title}] {level.name}:{bcolors.ENDC}"
+                            f"{sep}{text}{end}"))
+
+    def __logPacket(self, output: str, name: str):
+        logQueue.put((os.path.join(Logger.logDir, f"{name}-{self.logname}.log"), output))
 
     def logTX(self, pkt, name: str = ""):
         output = "TX@"
@@ -37,9 +167,7 @@ class Logger:
         output += " "
         output += packet2HexString(pkt)
 
-        os.makedirs("logs", exist_ok=True)
-        with open(f"logs/{name}-{self.logname}.log", "a") as f:
-            f.write(output + "\n")
+        self.__logPacket(output, name)
 
     def logRX(self, pkt, name: str = ""):
         output = "RX@"
@@ -47,30 +175,22 @@ class Logger:
         output += " "
         output += packet2HexString(pkt)
         output += "("
-        output += "".join(
-            filter(
-                lambda x: x
-                in string.digits + string.ascii_letters + string.punctuation,
-                pkt.payload.decode("ascii", "ignore"),
-            )
-        )
+        output += "".join(c for c in pkt.payload.decode("ascii", "ignore") if c in PRINTABLE)
         output += ")"
 
-        os.makedirs("logs", exist_ok=True)
-        with open(f"logs/{name}-{self.logname}.log", "a") as f:
-            f.write(output + "\n")
+        self.__logPacket(output, name)
 
     def debug(self, text: str, *args, **kwargs):
         self.__print(LOGLEVELS.DEBUG, text, *args, **kwargs)
 
     def info(self, text: str, *args, **kwargs):
         self.__print(LOGLEVELS.INFO, text, *args, **kwargs)
-    
+
     def warning(self, text: str, *args, **kwargs):
         self.__print(LOGLEVELS.WARNING, text, *args, **kwargs)
-    
+
     def error(self, text: str, *args, **kwargs):
         self.__print(LOGLEVELS.ERROR, text, *args, **kwargs)
 
     def log(self, level: LOGLEVELS, text: str, *args, **kwargs):
-        self.__print(level, text, *args, **kwargs)
\ No newline at end of file
+        self.__print(level, text, *args, **kwargs)
@@ -0,0 +1,305 @@
+import os
+from multiprocessing import Pool
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+from src.utils.trace import TraceReader, MAGIC, RX, TX
+
+# Packet statistics of the RX/TX logs, computed on NumPy columns:
+# the logs (hex text or binary traces, see `src.utils.trace`) are parsed into one structured array per file,
+# the statistics of each link (source, destination) are computed per file then merged, so the files can be
+# processed in parallel.
+PACKET_DTYPE = np.dtype([
+    ('timestamp', 'f8'),  # s
+    ('direction', 'u1'),  # RX or TX
+    ('src', 'u1'),
+    ('dst', 'u1'),
+    ('type', 'u1'),
+    ('status', 'u1'),
+    ('dsn', 'u1'),
+    ('len', 'u1'),
+    ('hasFooter', '?'),
+    ('power', 'u1'),
+    ('rssi', 'u1'),
+    ('biterrors', 'u1'),
+    ('agcMean', 'u1'),
+    ('agcMin', 'u1'),
+    ('agcMax', 'u1'),
+])
+HEADER_COLUMNS = ['src', 'dst', 'type', 'status', 'dsn', 'len']
+FOOTER_COLUMNS = ['power', 'rssi', 'biterrors', 'agcMean', 'agcMin', 'agcMax']
+HEADER_OCTET_SIZE = len(HEADER_COLUMNS)
+FOOTER_OCTET_SIZE = len(FOOTER_COLUMNS)
+DSN_MODULO = 256
+
+LOG_EXTENSIONS = ('.log', '.txt', '.trace')
+# value of the hex digits, 255 for the other characters
+HEX_DIGITS = np.full(256, 255, dtype=np.uint8)
+HEX_DIGITS[list(b"0123456789ABCDEF")] = np.arange(16)
+HEX_DIGITS[list(b"abcdef")] = np.arange(10, 16)
+
+
+def isTrace(fileName: str) -> bool:
+    with open(fileName, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def readFrames(fileName: str) -> Iterable[Tuple[float, int, bytes]]:
+    """(timestamp in s, direction, octets) of each packet of a log"""
+    if isTrace(fileName):
+        with TraceReader(fileName) as reader:
+            for record in reader:
+                yield record.timestampNs * 1e-9, record.direction, record.frame
+        return
+
+    timestamps, directions, octets, lengths = readHexLog(fileName)
+    ends = np.cumsum(lengths)
+    for timestamp, direction, start, end in zip(timestamps, directions, ends - lengths, ends):
+        yield float(timestamp), int(direction), octets[start:end].tobytes()
+
+
+def spanPositions(starts: np.ndarray, lengths: np.ndarray, step: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """(line, position in the text) of the items at starts + step * k, k < lengths, of each line"""
+    lines = np.repeat(np.arange(len(starts)), lengths)
+    offsets = np.arange(len(lines)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return lines, starts[lines] + step * offsets
+
+
+def readHexLog(fileName: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(timestamps in s, directions, octets of all the frames, octet count of each frame) of a hex text log
+
+    The lines are `RX@<ts> XX XX ... (printable)` or `<ts> XX XX ...` (com log), the other lines (prompt,
+    empty line, ...) are skipped. The whole file is parsed at once on a NumPy array of its characters.
+    """
+    with open(fileName, "rb") as f:
+        text = np.frombuffer(f.read() + b"\n", dtype=np.uint8)
+    ends = np.flatnonzero(text == ord("\n"))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    nbLines = len(starts)
+    # `RX@` or `TX@` prefix
+    prefixed = text[np.minimum(starts + 2, ends)] == ord("@")
+    directions = np.where(prefixed & (text[starts] == ord("T")), TX, RX).astype(np.uint8)
+    stampStarts = starts + 3 * prefixed
+    # the time stamp ends at the first space, the octets at the printable payload or the end of the line
+    spaces = np.append(np.flatnonzero(text == ord(" ")), len(text))
+    stampEnds = spaces[np.searchsorted(spaces, stampStarts)]
+    hexStarts = np.minimum(stampEnds + 1, ends)
+    parens = np.append(np.flatnonzero(text == ord("(")), len(text))
+    hexEnds = np.minimum(parens[np.searchsorted(parens, hexStarts)], ends)
+    hexEnds -= (hexEnds > hexStarts) & (text[hexEnds - 1] == ord("\r"))
+
+    # the time stamp is made of digits and one dot at most
+    stampLengths = np.where(stampEnds < ends, stampEnds - stampStarts, 0)
+    stampLines, stampPositions = spanPositions(stampStarts, stampLengths)
+    stampCharacters = text[stampPositions]
+    isDigit = HEX_DIGITS[stampCharacters] < 10
+    isDot = stampCharacters == ord(".")
+    isPacket = (np.bincount(stampLines, weights=isDigit, minlength=nbLines) > 0) & \
+        (np.bincount(stampLines, weights=isDot, minlength=nbLines) <= 1) & \
+        (np.bincount(stampLines, weights=~(isDigit | isDot), minlength=nbLines) == 0)
+
+    # `XX XX ... XX` with an optional trailing space: octet k at hexStarts + 3 k
+    hexLengths = hexEnds - hexStarts
+    lengths = (hexLengths + 1) // 3
+    isPacket &= (hexLengths % 3 != 1) & (lengths > 0)
+    octetLines, octetPositions = spanPositions(hexStarts, lengths, 3)
+    high = HEX_DIGITS[text[octetPositions]]
+    low = HEX_DIGITS[text[octetPositions + 1]]
+    badOctets = (high == 255) | (low == 255) | \
+        ((text[octetPositions + 2] != ord(" ")) & (octetPositions + 2 < hexEnds[octetLines]))
+    isPacket &= np.bincount(octetLines, weights=badOctets, minlength=nbLines) == 0
+
+    # the time stamps of the packets, separated by spaces
+    isStamp = isPacket[stampLines]
+    stampText = np.full(np.count_nonzero(isStamp) + np.count_nonzero(isPacket), ord(" "), dtype=np.uint8)
+    stampText[np.arange(np.count_nonzero(isStamp)) + (np.cumsum(isPacket) - 1)[stampLines[isStamp]]] = \
+        stampCharacters[isStamp]
+    timestamps = np.fromstring(stampText.tobytes(), sep=" ")
+    octets = (high * 16 + low)[isPacket[octetLines]].astype(np.uint8)
+    return timestamps, directions[isPacket], octets, lengths[isPacket]
+
+
+def readTraceLog(fileName: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(timestamps in s, directions, octets of all the frames, octet count of each frame) of a binary trace"""
+    timestamps, directions, frames = [], bytearray(), []
+    for timestamp, direction, frame in readFrames(fileName):
+        timestamps.append(timestamp)
+        directions.append(direction)
+        frames.append(frame)
+    return np.array(timestamps, dtype=np.float64), np.frombuffer(directions, dtype=np.uint8), \
+        np.frombuffer(b"".join(frames), dtype=np.uint8), np.fromiter(map(len, frames), np.int64, len(frames))
+
+
+def readLog(fileName: str) -> np.ndarray:
+    """Packets of a log, as a structured array of PACKET_DTYPE"""
+    timestamps, directions, octets, lengths = (readTraceLog if isTrace(fileName) else readHexLog)(fileName)
+    starts = np.cumsum(lengths) - lengths
+    isPacket = lengths >= HEADER_OCTET_SIZE
+    timestamps, directions, starts, lengths = \
+        timestamps[isPacket], directions[isPacket], starts[isPacket], lengths[isPacket]
+
+    headerColumns = octets[starts[:, None] + np.arange(HEADER_OCTET_SIZE)]
+    # data packets received by the modem end with the footer (see `ahoi.modem.packet.byteArrayToPacket`)
+    footerStarts = starts + HEADER_OCTET_SIZE + headerColumns[:, HEADER_OCTET_SIZE - 1]
+    hasFooter = (headerColumns[:, 2] < 0x80) & (starts + lengths - footerStarts == FOOTER_OCTET_SIZE)
+    footerColumns = np.zeros((len(starts), FOOTER_OCTET_SIZE), dtype=np.uint8)
+    footerColumns[hasFooter] = octets[footerStarts[hasFooter, None] + np.arange(FOOTER_OCTET_SIZE)]
+
+    packets = np.zeros(len(starts), dtype=PACKET_DTYPE)
+    packets['timestamp'] = timestamps
+    packets['direction'] = directions
+    packets['hasFooter'] = hasFooter
+    for i, column in enumerate(HEADER_COLUMNS):
+        packets[column] = headerColumns[:, i]
+    for i, column in enumerate(FOOTER_COLUMNS):
+        packets[column] = footerColumns[:, i]
+    return packets
+
+
+class LinkStats:
+    """Statistics of the data packets received on a link, mergeable across logs
+
+    The packet reception ratio counts the data sequence numbers skipped between consecutive packets
+    (modulo 256, so more than 255 consecutive losses are not detected), repeated numbers are duplicates.
+    The jitter is the mean absolute change between consecutive inter-arrival times.
+    """
+
+    def __init__(self):
+        self.nbReceived = 0
+        self.nbExpected = 0
+        self.nbDuplicates = 0
+        self.nbIntervals = 0
+        self.intervalSumSec = 0.0
+        self.intervalSquareSumSec = 0.0
+        self.nbIntervalChanges = 0
+        self.intervalChangeSumSec = 0.0
+        self.rssiHistogram = np.zeros(256, dtype=np.int64)  # Number of packets per RSSI value
+
+    def merge(self, other: 'LinkStats'):
+        self.nbReceived += other.nbReceived
+        self.nbExpected += other.nbExpected
+        self.nbDuplicates += other.nbDuplicates
+        self.nbIntervals += other.nbIntervals
+        self.intervalSumSec += other.intervalSumSec
+        self.intervalSquareSumSec += other.intervalSquareSumSec
+        self.nbIntervalChanges += other.nbIntervalChanges
+        self.intervalChangeSumSec += other.intervalChangeSumSec
+        self.rssiHistogram += other.rssiHistogram
+
+    def getPrr(self) -> float:
+        return self.nbReceived / self.nbExpected if self.nbExpected else float('nan')
+
+    def getMeanIntervalSec(self) -> float:
+        return self.intervalSumSec / self.nbIntervals if self.nbIntervals else float('nan')
+
+    def getIntervalStdSec(self) -> float:
+        if not self.nbIntervals:
+            return float('nan')
+        mean = self.getMeanIntervalSec()
+        return float(np.sqrt(max(self.intervalSquareSumSec / self.nbIntervals - mean * mean, 0.0)))
+
+    def getJitterSec(self) -> float:
+        return self.intervalChangeSumSec / self.nbIntervalChanges if self.nbIntervalChanges else float('nan')
+
+    def getRssiPercentile(self, percent: float) -> float:
+        """RSSI value below which the given percentage of the packets fall"""
+        total = self.rssiHistogram.sum()
+        if not total:
+            return float('nan')
+        return float(np.searchsorted(np.cumsum(self.rssiHistogram), total * percent / 100.0))
+
+    def getRssiMean(self) -> float:
+        total = self.rssiHistogram.sum()
+        return float(self.rssiHistogram @ np.arange(256) / total) if total else float('nan')
+
+
+def computeLinkStats(packets: np.ndarray) -> Dict[Tuple[int, int], LinkStats]:
+    """Statistics of each link (source, destination) from the data packets received in a log"""
+    rx = packets[(packets['direction'] == RX) & (packets['type'] < 0x80)]
+    if len(rx) == 0:
+        return {}
+    link = rx['src'].astype(np.int64) * 256 + rx['dst']
+    order = np.lexsort((rx['timestamp'], link))
+    rx = rx[order]
+    link = link[order]
+    links, groups = np.unique(link, return_inverse=True)
+    nbLinks = len(links)
+    # packet following a packet of the same link
+    sameLink = np.zeros(len(rx), dtype=bool)
+    sameLink[1:] = link[1:] == link[:-1]
+
+    dsnStep = np.diff(rx['dsn'].astype(np.int64), prepend=0) % DSN_MODULO
+    dsnStep[~sameLink] = 1  # first packet of the link
+    received = np.bincount(groups, weights=dsnStep != 0, minlength=nbLinks)
+    expected = np.bincount(groups, weights=dsnStep, minlength=nbLinks)
+    duplicates = np.bincount(groups, weights=dsnStep == 0, minlength=nbLinks)
+
+    interval = np.diff(rx['timestamp'], prepend=0.0)
+    interval[~sameLink] = 0.0
+    nbIntervals = np.bincount(groups, weights=sameLink, minlength=nbLinks)
+    intervalSum = np.bincount(groups, weights=interval, minlength=nbLinks)
+    intervalSquareSum = np.bincount(groups, weights=interval * interval, minlength=nbLinks)
+
+    # change between the interval of a packet and the previous one, both on the same link
+    sameChange = np.zeros(len(rx), dtype=bool)
+    sameChange[1:] = sameLink[1:] & sameLink[:-1]
+    change = np.abs(np.diff(interval, prepend=0.0))
+    change[~sameChange] = 0.0
+    nbChanges = np.bincount(groups, weights=sameChange, minlength=nbLinks)
+    changeSum = np.bincount(groups, weights=change, minlength=nbLinks)
+
+    withFooter = rx['hasFooter']
+    rssiHistograms = np.bincount(groups[withFooter] * 256 + rx['rssi'][withFooter],
+                                 minlength=nbLinks * 256).reshape(nbLinks, 256)
+
+    stats = {}
+    for i, key in enumerate(links):
+        linkStats = LinkStats()
+        linkStats.nbReceived = int(received[i])
+        linkStats.nbExpected = int(expected[i])
+        linkStats.nbDuplicates = int(duplicates[i])
+        linkStats.nbIntervals = int(nbIntervals[i])
+        linkStats.intervalSumSec = float(intervalSum[i])
+        linkStats.intervalSquareSumSec = float(intervalSquareSum[i])
+        linkStats.nbIntervalChanges = int(nbChanges[i])
+        linkStats.intervalChangeSumSec = float(changeSum[i])
+        linkStats.rssiHistogram = rssiHistograms[i].astype(np.int64)
+        stats[(int(key) // 256, int(key) % 256)] = linkStats
+    return stats
+
+
+def analyzeLog(fileName: str) -> Dict[Tuple[int, int], LinkStats]:
+    return computeLinkStats(readLog(fileName))
+
+
+def listLogs(paths: Iterable[str]) -> List[str]:
+    """Log files of the given files and directories (searched recursively)"""
+    fileNames = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                fileNames += [os.path.join(root, name) for name in sorted(names) if name.endswith(LOG_EXTENSIONS)]
+        else:
+            fileNames.append(path)
+    return fileNames
+
+
+def analyzeLogs(fileNames: List[str], processes: int = None) -> Dict[Tuple[int, int], LinkStats]:
+    """Statistics of each link over all the logs, one log per process (all the cores by default)"""
+    stats = {}
+    if processes == 1 or len(fileNames) <= 1:
+        results = map(analyzeLog, fileNames)
+        pool = None
+    else:
+        pool = Pool(processes)
+        results = pool.imap_unordered(analyzeLog, fileNames)
+    try:
+        for logStats in results:
+            for key, linkStats in logStats.items():
+                if key not in stats:
+                    stats[key] = LinkStats()
+                stats[key].merge(linkStats)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return stats
@@ -0,0 +1,31 @@
+from typing import Iterable, Set, Tuple
+
+# Payload of a data request asking for retransmissions:
+# 4 octets: offset in µs added to the assigned delay of the retransmitted packets
+# n octets: bitmap of the nodes which must retransmit the packet of the previous request,
+#           bit (address % 8) of octet (address // 8)
+OFFSET_OCTET_SIZE = 4
+
+
+def encodeRetransmitRequest(offsetUs: int, nodes: Iterable[int]) -> bytearray:
+    """Payload of a data request asking the given nodes to retransmit their previous packet"""
+    nodes = list(nodes)
+    if len(nodes) == 0:
+        return bytearray()
+    bitmap = bytearray(max(nodes) // 8 + 1)
+    for node in nodes:
+        bitmap[node // 8] |= 1 << (node % 8)
+    return bytearray(int(offsetUs).to_bytes(OFFSET_OCTET_SIZE, 'big')) + bitmap
+
+
+def decodeRetransmitRequest(payload) -> Tuple[int, Set[int]]:
+    """Offset in µs and nodes which must retransmit, from the payload of a data request"""
+    if len(payload) <= OFFSET_OCTET_SIZE:
+        return 0, set()
+    offsetUs = int.from_bytes(payload[:OFFSET_OCTET_SIZE], 'big')
+    nodes = set()
+    for i, octet in enumerate(payload[OFFSET_OCTET_SIZE:]):
+        for bit in range(8):
+            if octet & (1 << bit):
+                nodes.add(i * 8 + bit)
+    return offsetUs, nodes
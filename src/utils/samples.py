@@ -0,0 +1,66 @@
+from typing import List, Tuple
+
+# Payload of a data packet carrying sensor samples, oldest sample first:
+# for each sample, its age as an unsigned LEB128 varint in time units, then the sample octets.
+# The age of the first sample is counted from the packing time, the age of the next samples
+# from the previous sample, so a regular sampling costs one octet of timestamp per sample.
+
+
+def encodeVarint(value: int) -> bytearray:
+    """Unsigned LEB128 encoding, 7 bits per octet, least significant group first"""
+    octets = bytearray()
+    while True:
+        octet = value & 0x7F
+        value >>= 7
+        if value == 0:
+            octets.append(octet)
+            return octets
+        octets.append(octet | 0x80)
+
+
+def decodeVarint(payload, index: int) -> Tuple[int, int]:
+    """Value of the varint starting at `index` and the index after it"""
+    value = 0
+    shift = 0
+    while True:
+        octet = payload[index]
+        index += 1
+        value |= (octet & 0x7F) << shift
+        if octet & 0x80 == 0:
+            return value, index
+        shift += 7
+
+
+def encodeSamples(samples: List[Tuple[int, bytes]]) -> bytearray:
+    """Payload of samples given as (delta in time units, octets), see the format above"""
+    payload = bytearray()
+    for delta, sample in samples:
+        payload += encodeVarint(delta)
+        payload += sample
+    return payload
+
+
+def decodeSamples(payload, sampleOctetSize: int, referenceTimeSec: float,
+                  timeUnitSec: float) -> List[Tuple[float, bytes]]:
+    """
+    Samples of a data packet payload with their time.
+
+    Args:
+        payload: The payload of the data packet
+        sampleOctetSize (int): Size of each sample
+        referenceTimeSec (float): The packing time of the samples, e.g. the reception of the request by the node
+        timeUnitSec (float): The time unit of the ages
+
+    Returns:
+        List[Tuple[float, bytes]]: The (time, octets) of the samples, oldest first
+    """
+    samples = []
+    index = 0
+    timeSec = referenceTimeSec
+    while index < len(payload):
+        delta, index = decodeVarint(payload, index)
+        # the first age goes back from the packing time, the next ones forward from the previous sample
+        timeSec = timeSec - delta * timeUnitSec if len(samples) == 0 else timeSec + delta * timeUnitSec
+        samples.append((timeSec, bytes(payload[index:index + sampleOctetSize])))
+        index += sampleOctetSize
+    return samples
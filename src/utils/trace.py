@@ -0,0 +1,182 @@
+import mmap
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from typing import Iterator, Optional, TextIO
+from lib.ahoi.modem.packet import getBytes, HEADER_FORMAT
+
+# Binary packet trace, instead of the `RX@<ts> XX XX ...` hex text of the logs:
+# file header: 4 octets magic, 1 octet version, 3 octets padding
+# record: 8 octets timestamp in ns, 1 octet direction, 1 octet link id, 2 octets frame length (little endian),
+#         then the frame: the octets of the packet (header, payload and footer, without the DLE framing)
+# The records are stamped with the wall clock (time.time_ns()), as the hex text logs, so converted traces compare.
+MAGIC = b"AHTR"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sB3x")
+RECORD_HEADER = struct.Struct("<qBBH")
+
+HEADER_OCTET_SIZE = len(HEADER_FORMAT)  # the last octet of the packet header is the payload length
+
+RX = 0
+TX = 1
+DIRECTION_NAMES = {RX: "RX", TX: "TX"}
+
+TraceRecord = namedtuple('TraceRecord', ['timestampNs', 'direction', 'linkId', 'frame'])
+
+
+class TraceWriter:
+    """Streaming writer of a binary packet trace"""
+
+    def __init__(self, fileName: str):
+        self.file = open(fileName, "wb")
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+
+    def write(self, frame, direction: int = RX, linkId: int = 0, timestampNs: Optional[int] = None):
+        """Append the octets of a packet, stamped now if no timestamp is given"""
+        if timestampNs is None:
+            timestampNs = time.time_ns()
+        self.file.write(RECORD_HEADER.pack(timestampNs, direction, linkId, len(frame)))
+        self.file.write(frame)
+
+    def writePacket(self, pkt, direction: int = RX, linkId: int = 0, timestampNs: Optional[int] = None):
+        self.write(getBytes(pkt), direction, linkId, timestampNs)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader:
+    """Reader of a binary packet trace, mapped in memory
+
+    The records are indexed on opening: `reader[i]` reads any record, `find` looks up a timestamp.
+    The timestamp lookups assume the records are in time order, as written by `TraceWriter`.
+    """
+
+    def __init__(self, fileName: str):
+        with open(fileName, "rb") as f:
+            if f.seek(0, 2) < FILE_HEADER.size:
+                raise ValueError(f"{fileName} is not a packet trace")
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = FILE_HEADER.unpack_from(self.mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{fileName} is not a packet trace of version {VERSION}")
+
+        self.offsets = array('q')  # Offset of each record
+        self.timestampsNs = array('q')
+        offset = FILE_HEADER.size
+        size = len(self.mmap)
+        while offset + RECORD_HEADER.size <= size:
+            timestampNs, _, _, length = RECORD_HEADER.unpack_from(self.mmap, offset)
+            if offset + RECORD_HEADER.size + length > size:
+                break  # truncated last record, e.g. trace still being written
+            self.offsets.append(offset)
+            self.timestampsNs.append(timestampNs)
+            offset += RECORD_HEADER.size + length
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, index: int) -> TraceRecord:
+        offset = self.offsets[index]
+        timestampNs, direction, linkId, length = RECORD_HEADER.unpack_from(self.mmap, offset)
+        start = offset + RECORD_HEADER.size
+        return TraceRecord(timestampNs, direction, linkId, bytes(self.mmap[start:start + length]))
+
+    def __iter__(self) -> Iterator[TraceRecord]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def find(self, timestampNs: int) -> int:
+        """Index of the first record at or after the timestamp, len(self) if none"""
+        return bisect_left(self.timestampsNs, timestampNs)
+
+    def between(self, startNs: int, endNs: int) -> Iterator[TraceRecord]:
+        """Records with a timestamp in [startNs, endNs["""
+        for i in range(self.find(startNs), self.find(endNs)):
+            yield self[i]
+
+    def close(self):
+        self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parseHexLine(line: str, linkId: int = 0) -> Optional[TraceRecord]:
+    """Record of a hex text log line, None if the line holds no packet
+
+    Reads the lines of `Logger.logRX`/`logTX` and mosh (`RX@<ts> XX XX ... (ascii)`) and of the com log
+    (`<ts> XX XX ...`, received packets).
+    """
+    tokens = line.split()
+    if len(tokens) < 2:
+        return None
+    direction = RX
+    stamp = tokens[0]
+    if "@" in stamp:
+        name, _, stamp = stamp.partition("@")
+        if name not in ("RX", "TX"):
+            return None
+        direction = RX if name == "RX" else TX
+    seconds, _, fraction = stamp.partition(".")
+    if not seconds.isdigit() or (fraction and not fraction.isdigit()):
+        return None
+    timestampNs = int(seconds) * 10**9 + int(fraction[:9].ljust(9, "0"))
+
+    octets = []
+    for token in tokens[1:]:
+        if len(token) != 2:
+            break  # printable part of the payload
+        try:
+            octets.append(int(token, 16))
+        except ValueError:
+            break
+    if not octets:
+        return None
+    return TraceRecord(timestampNs, direction, linkId, bytes(octets))
+
+
+def formatHexLine(record: TraceRecord) -> str:
+    """Hex text log line of a record, as written by `Logger.logRX`/`logTX`"""
+    seconds, ns = divmod(record.timestampNs, 10**9)
+    line = f"{DIRECTION_NAMES[record.direction]}@{seconds}.{ns // 10**6:03d} "
+    line += "".join("%02X " % b for b in record.frame)
+    if record.direction == RX and len(record.frame) >= HEADER_OCTET_SIZE:
+        # printable characters of the payload
+        payload = record.frame[HEADER_OCTET_SIZE:HEADER_OCTET_SIZE + record.frame[HEADER_OCTET_SIZE - 1]]
+        line += "(" + "".join(chr(b) for b in payload if 0x21 <= b <= 0x7E) + ")"
+    return line
+
+
+def hexToTrace(text: TextIO, fileName: str, linkId: int = 0) -> int:
+    """Convert a hex text log to a binary trace, returns the number of packets"""
+    count = 0
+    with TraceWriter(fileName) as writer:
+        for line in text:
+            record = parseHexLine(line, linkId)
+            if record is not None:
+                writer.write(record.frame, record.direction, record.linkId, record.timestampNs)
+                count += 1
+    return count
+
+
+def traceToHex(fileName: str, text: TextIO) -> int:
+    """Convert a binary trace to a hex text log, returns the number of packets"""
+    with TraceReader(fileName) as reader:
+        for record in reader:
+            text.write(formatHexLine(record) + "\n")
+        return len(reader)
@@ -0,0 +1,11 @@
+import tempfile
+from src.utils.Logger import Logger
+
+
+def useTemporaryLogDir(testCase):
+    """Writes the packet logs of the test to a temporary directory, removed after the test"""
+    tmpDir = tempfile.TemporaryDirectory()
+    logDir = Logger.logDir
+    Logger.setLogDir(tmpDir.name)
+    testCase.addCleanup(tmpDir.cleanup)
+    testCase.addCleanup(Logger.setLogDir, logDir)
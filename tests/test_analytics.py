@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from lib.ahoi.modem.packet import makePacket, getBytes, packet2HexString, Footer
+from src.utils.analytics import readLog, computeLinkStats, analyzeLogs
+from src.utils.trace import TraceWriter, TX
+
+
+def makeLine(timestampSec: float, src: int, dst: int, dsn: int, rssi: int, direction: str = "RX") -> str:
+    pkt = makePacket(src=src, dst=dst, type=0x02, dsn=dsn, payload=bytearray(b"abc"))
+    pkt = pkt._replace(footer=Footer(power=10, rssi=rssi, biterrors=1, agcMean=2, agcMin=3, agcMax=4))
+    return f"{direction}@{timestampSec:.3f} {packet2HexString(pkt)}(abc)\n"
+
+
+class TestAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def writeLog(self, name: str, lines) -> str:
+        fileName = os.path.join(self.dir.name, name)
+        with open(fileName, "w") as f:
+            f.write("mosh@/dev/ttyUSB0 >> \n")
+            f.writelines(lines)
+        return fileName
+
+    def test_read_log(self):
+        fileName = self.writeLog("a.log", [makeLine(10.5, 1, 0, 7, 200), makeLine(11.0, 0, 1, 8, 0, "TX"),
+                                           "12.0 " + packet2HexString(makePacket(type=0x80)) + "\n"])
+        packets = readLog(fileName)
+        assert len(packets) == 3
+        assert packets[0]['timestamp'] == 10.5
+        assert (packets[0]['src'], packets[0]['dst'], packets[0]['type'], packets[0]['dsn'], packets[0]['len']) == \
+               (1, 0, 0x02, 7, 3)
+        assert packets[0]['hasFooter'] and packets[0]['rssi'] == 200 and packets[0]['agcMax'] == 4
+        assert packets[1]['direction'] == TX
+        assert packets[2]['type'] == 0x80 and not packets[2]['hasFooter']
+
+    def test_read_log_skips_other_lines(self):
+        octets = packet2HexString(makePacket(type=0x80))
+        fileName = self.writeLog("a.log", ["\n", "12.0 01 02\n", "1.2.3 " + octets + "\n", "13.0 " + octets + "0\n",
+                                           "14.0 " + octets.replace("80", "8G") + "\n", "15.0 " + octets + "\r\n",
+                                           "TX@16.0 " + octets.strip()])
+        packets = readLog(fileName)
+        # only the complete packet lines, with or without carriage return and newline at the end
+        assert packets['timestamp'].tolist() == [15.0, 16.0]
+        assert packets['direction'].tolist() == [0, TX]
+        assert packets['type'].tolist() == [0x80, 0x80]
+
+    def test_link_stats(self):
+        # link 1 -> 0: dsn 250..255 then 0..3 with 253 and 1 lost, 2 duplicated, one packet per second
+        dsns = [250, 251, 252, 254, 255, 0, 2, 2, 3]
+        lines = [makeLine(100.0 + i, 1, 0, dsn, 100 + i) for i, dsn in enumerate(dsns)]
+        # link 2 -> 0, interleaved, intervals of 1 and 3 s
+        lines += [makeLine(100.5 + t, 2, 0, i, 50) for i, t in enumerate([0, 1, 4, 5])]
+        stats = computeLinkStats(readLog(self.writeLog("a.log", lines)))
+
+        link = stats[(1, 0)]
+        assert (link.nbReceived, link.nbExpected, link.nbDuplicates) == (8, 10, 1)
+        assert link.getPrr() == 0.8
+        assert abs(link.getMeanIntervalSec() - 1.0) < 1e-6
+        assert link.getJitterSec() < 1e-6
+        assert link.getRssiPercentile(50) == 104
+        link = stats[(2, 0)]
+        assert link.getPrr() == 1.0
+        assert abs(link.getMeanIntervalSec() - 5 / 3) < 1e-6
+        assert abs(link.getJitterSec() - 2.0) < 1e-6
+        assert link.getRssiMean() == 50
+
+    def test_parallel_logs(self):
+        fileNames = [self.writeLog(f"{n}.log", [makeLine(i, 1, 0, (i * (n + 1)) % 256, i % 256) for i in range(300)])
+                     for n in range(3)]
+        # the same packets in a binary trace
+        traceName = os.path.join(self.dir.name, "3.trace")
+        with TraceWriter(traceName) as writer:
+            for i in range(300):
+                pkt = makePacket(src=1, dst=0, type=0x02, dsn=i % 256, payload=bytearray(b"abc"))
+                pkt = pkt._replace(footer=Footer(10, i % 256, 1, 2, 3, 4))
+                writer.write(getBytes(pkt), timestampNs=i * 10**9)
+        fileNames.append(traceName)
+
+        serial = analyzeLogs(fileNames, processes=1)[(1, 0)]
+        parallel = analyzeLogs(fileNames, processes=2)[(1, 0)]
+        assert serial.nbExpected == parallel.nbExpected == 300 + 599 + 898 + 300  # dsn steps of 1, 2, 3 and 1
+        assert serial.nbReceived == parallel.nbReceived == 4 * 300
+        assert (serial.rssiHistogram == parallel.rssiHistogram).all()
+        assert abs(serial.intervalSumSec - parallel.intervalSumSec) < 1e-6
+
+
+if __name__ == '__main__':
+    unittest.main()
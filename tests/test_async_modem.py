@@ -0,0 +1,139 @@
+import asyncio
+import unittest
+from ahoi.com.streamer import Streamer
+from ahoi.modem.aio import AsyncModem
+from ahoi.modem.commands import COMMANDS
+from ahoi.modem.modem import Modem
+from ahoi.modem.profile import makeProfile
+from ahoi.modem.packet import byteArrayToPacket, getBytes, isCmdType, makePacket
+from src.constantes import ID_PAQUET_DATA
+
+
+class ModemServerMock:
+    """TCP server standing for a modem behind sfwd: answers the commands and records the packets sent"""
+
+    def __init__(self):
+        self.received = []
+        self.writer = None
+
+    async def handle(self, reader, writer):
+        self.writer = writer
+        decoder = Streamer()
+        while True:
+            data = await reader.read(4096)
+            if not data:
+                return
+            for frame in filter(None, map(decoder.dec, data)):
+                pkt = byteArrayToPacket(frame)
+                self.received.append(pkt)
+                if isCmdType(pkt):
+                    # a data packet is received before the response
+                    self.transmit(makePacket(src=1, dst=0, type=ID_PAQUET_DATA, payload=b"rx"))
+                    self.transmit(makePacket(type=pkt.header.type, payload=bytearray([pkt.header.type])))
+
+    def transmit(self, pkt):
+        self.writer.write(Streamer().enc(getBytes(pkt)))
+
+
+class TestAsyncModem(unittest.TestCase):
+    def test_modems_on_one_loop(self):
+        asyncio.run(self.runModems())
+
+    async def runModems(self):
+        servers = [ModemServerMock(), ModemServerMock()]
+        tcpServers = [await asyncio.start_server(server.handle, "127.0.0.1", 0) for server in servers]
+        modems = []
+        for tcpServer in tcpServers:
+            modem = AsyncModem()
+            await modem.connect(f"tcp@127.0.0.1:{tcpServer.sockets[0].getsockname()[1]}")
+            modems.append(modem)
+
+        # the commands of both modems are awaited concurrently, each one gets the response of its type
+        versions = await asyncio.gather(*[modem.getVersion() for modem in modems], modems[0].txGain(10))
+        assert [pkt.payload for pkt in versions] == [bytearray([0x80]), bytearray([0x80]), bytearray([0x9A])]
+
+        # the other packets are received through the async iterator
+        await modems[1].send(src=0, dst=1, type=ID_PAQUET_DATA, payload=b"data")
+        async for pkt in modems[0]:
+            assert pkt.header.type == ID_PAQUET_DATA and pkt.payload == b"rx"
+            break
+        await asyncio.sleep(0.1)
+        assert servers[1].received[-1].payload == b"data"
+        assert servers[0].received[-1].header.type == 0x9A
+
+        # a command without response times out
+        modems[0].com.send = lambda pkt: asyncio.sleep(0)
+        with self.assertRaises(asyncio.TimeoutError):
+            await modems[0].command(0x80, timeout=0.1)
+        assert len(modems[0].pendingCommands[0x80]) == 0
+
+        # a profile is sent in one write, every command gets its response
+        profile = makeProfile(bitSpread=3, txGain=0, agc=True)
+        state = await modems[1].configure(profile)
+        assert list(state) == [name for name, _ in profile]
+        assert state["id"].payload == bytearray([0x84]) and state["clearSfdStat"].payload == bytearray([0xC5])
+        assert [pkt.header.type for pkt in servers[1].received[-len(profile):]] == \
+               [COMMANDS[name].type for name, _ in profile]
+        assert servers[1].received[-len(profile) + profile.index(("bitSpread", (3,)))].payload == bytearray([3])
+
+        for modem in modems:
+            modem.close()
+        for tcpServer in tcpServers:
+            tcpServer.close()
+
+    def test_commands(self):
+        # the async modem has every command of the modem
+        for name in COMMANDS:
+            assert callable(getattr(Modem, name)) and callable(getattr(AsyncModem, name))
+
+    def test_rx_queue_bound(self):
+        asyncio.run(self.fillRxQueue())
+
+    async def fillRxQueue(self):
+        modem = AsyncModem()
+        modem.RX_QUEUE_SIZE = 2
+        server = ModemServerMock()
+        tcpServer = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        await modem.connect(f"tcp@127.0.0.1:{tcpServer.sockets[0].getsockname()[1]}")
+        for dsn in range(3):
+            server.transmit(makePacket(src=1, dst=0, type=ID_PAQUET_DATA, dsn=dsn))
+        await modem.getVersion()
+        # the oldest packets are dropped, the data packet before the response included
+        assert modem.rxDropped == 2
+        assert [(await modem.receive()).header.dsn for _ in range(2)] == [2, 0]
+        modem.close()
+        tcpServer.close()
+
+    def test_connection_lost(self):
+        asyncio.run(self.loseConnection())
+
+    async def loseConnection(self):
+        modem = AsyncModem()
+        server = ModemServerMock()
+        tcpServer = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        await modem.connect(f"tcp@127.0.0.1:{tcpServer.sockets[0].getsockname()[1]}")
+        await modem.getVersion()
+        packets = []
+
+        async def iterate():
+            async for pkt in modem:
+                packets.append(pkt)
+
+        # the server goes away: the iteration ends instead of waiting forever
+        iteration = asyncio.create_task(iterate())
+        await asyncio.sleep(0.05)
+        server.writer.close()
+        await asyncio.wait_for(iteration, timeout=1)
+        assert [pkt.payload for pkt in packets] == [b"rx"]
+        with self.assertRaises(ConnectionError):
+            await modem.receive()
+        with self.assertRaises(ConnectionError):
+            await modem.getVersion()
+        with self.assertRaises(ConnectionError):
+            await modem.send(src=0, dst=1, type=ID_PAQUET_DATA)
+        modem.close()
+        tcpServer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
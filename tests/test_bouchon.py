@@ -10,10 +10,12 @@ from src.constantes import ID_PAQUET_TDI, BROCAST_ADDRESS
 from lib.ahoi.modem.packet import makePacket, printPacket
 from src.constantes import FLAG_R
 import time
+from tests import useTemporaryLogDir
 
 
 class TestModem(unittest.TestCase):
     def setUp(self):
+        useTemporaryLogDir(self)
         self.modemGateway = ModemMockGateway()
         self.mock = Mock()
 
@@ -196,6 +198,7 @@ class TestModem(unittest.TestCase):
         self.nodeModem.connect("COM1")
         self.nodeModem.receive()
         nodeTDAMAC = NodeTDAMAC(self.nodeModem, 1)
+        self.addCleanup(nodeTDAMAC.close)
 
         def AssertReceiveTDIPaquet():
             nodeTDAMAC.waitForTDIPacket()
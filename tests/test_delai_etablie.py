@@ -6,12 +6,14 @@ from src.Mock.modem_mock_gateway import ModemMockGateway
 from src.NodeTDAMAC import NodeTDAMAC
 from src.Mock.node_mock_gateway import NodeMockGateway
 from lib.ahoi.modem.packet import makePacket
-from src.constantes import ID_PAQUET_TDI, ID_PAQUET_DATA
+from src.constantes import ID_PAQUET_TDI, ID_PAQUET_DATA, INTER_PACKET_GAP_US, PERIOD_MODE_PIPELINED
 from src.GatewayTDAMAC import GatewayTDAMAC
+from tests import useTemporaryLogDir
 
 
 class TestDelaiEtablie(unittest.TestCase):
     def setUp(self):
+        useTemporaryLogDir(self)
         self.modemGateway = ModemMockGateway()
         self.modemGateway.connect("COM1")
         self.modemGateway.receive()
@@ -29,6 +31,7 @@ class TestDelaiEtablie(unittest.TestCase):
 
         # init node TDAMAC
         self.nodeTDAMAC = NodeTDAMAC(self.nodeModem, 1)
+        self.addCleanup(self.nodeTDAMAC.close)
 
         # init network
         self.nodeModem.connect("COM1")
@@ -66,8 +69,11 @@ class TestDelaiEtablie(unittest.TestCase):
 
         # init node TDAMAC
         self.nodeTDAMAC = NodeTDAMAC(self.nodeModem, 1)
+        self.addCleanup(self.nodeTDAMAC.close)
         self.nodeTDAMAC2 = NodeTDAMAC(self.nodeModem2, 2)
+        self.addCleanup(self.nodeTDAMAC2.close)
         self.nodeTDAMAC3 = NodeTDAMAC(self.nodeModem3, 3)
+        self.addCleanup(self.nodeTDAMAC3.close)
 
         # init network
         self.nodeModem.connect("COM1")
@@ -170,8 +176,11 @@ class TestDelaiEtablie(unittest.TestCase):
 
         # init node TDAMAC
         self.nodeTDAMAC = NodeTDAMAC(self.nodeModem, 1)
+        self.addCleanup(self.nodeTDAMAC.close)
         self.nodeTDAMAC2 = NodeTDAMAC(self.nodeModem2, 2)
+        self.addCleanup(self.nodeTDAMAC2.close)
         self.nodeTDAMAC3 = NodeTDAMAC(self.nodeModem3, 3)
+        self.addCleanup(self.nodeTDAMAC3.close)
 
         # init network
         self.nodeModem.connect("COM1")
@@ -225,8 +234,11 @@ class TestDelaiEtablie(unittest.TestCase):
 
         # init node TDAMAC
         self.nodeTDAMAC = NodeTDAMAC(self.nodeModem, 1)
+        self.addCleanup(self.nodeTDAMAC.close)
         self.nodeTDAMAC2 = NodeTDAMAC(self.nodeModem2, 2)
+        self.addCleanup(self.nodeTDAMAC2.close)
         self.nodeTDAMAC3 = NodeTDAMAC(self.nodeModem3, 3)
+        self.addCleanup(self.nodeTDAMAC3.close)
 
         # init network
         self.nodeModem.connect("COM1")
@@ -261,6 +273,185 @@ class TestDelaiEtablie(unittest.TestCase):
 
 
 
+    def initNodes(self, delays):
+        """Creates the nodes, delays is a list of (address, transmitDelay, receptionDelay)"""
+        self.nodes = {}
+        self.nodesTDAMAC = {}
+        for address, transmitDelay, receptionDelay in delays:
+            nodeModem = ModemMockNode(address, self.modemGateway)
+            node = NodeMockGateway(self.modemGateway, address, lambda node, pkt, m=nodeModem: m.simulateRx(pkt))
+            node.transmitDelay = transmitDelay
+            node.receptionDelay = receptionDelay
+            self.modemGateway.addNode(node)
+            nodeModem.connect("COM1")
+            nodeModem.receive()
+            self.nodes[address] = node
+            self.nodesTDAMAC[address] = NodeTDAMAC(nodeModem, address)
+            self.addCleanup(self.nodesTDAMAC[address].close)
+
+    def test_node_leave(self):
+        self.gateway.topology = [1, 2, 3]
+        self.gateway.guardIntervalUs = int(0.3 * 1e6)
+        self.gateway.periodeSec = 0
+        self.gateway.maxAttemps = 2
+        self.gateway.nbReqMax = 3
+        self.initNodes([(1, 0.1, 0.1), (2, 0.2, 0.2), (3, 0.3, 0.3)])
+        self.gateway.pingTopology()
+        self.gateway.calculateNodesDelay()
+        self.gateway.sendAssignedTransmitDelaysToNodes()
+        time.sleep(0.7)  # wait for the nodes to receive the tdi packet
+        initialDelaysUs = dict(self.gateway.assignedTransmitDelaysUs)
+        for node in self.nodes.values():
+            node.receivePackets.clear()
+
+        # node 2 leaves the network
+        self.nodes[2].looseReceivePacket = True
+        self.gateway.main()
+
+        # assert only the node after node 2 gets a new delay
+        assert self.gateway.topology == [1, 3]
+        assert all(pkt.header.type != ID_PAQUET_TDI for pkt in self.nodes[1].receivePackets)
+        assert any(pkt.header.type == ID_PAQUET_TDI for pkt in self.nodes[3].receivePackets)
+        assert self.gateway.assignedTransmitDelaysUs[1] == initialDelaysUs[1]
+        assert self.gateway.assignedTransmitDelaysUs[3] < initialDelaysUs[3]
+        assert self.nodesTDAMAC[3].assignedTransmitDelaysUs == self.gateway.assignedTransmitDelaysUs[3]
+
+    def test_node_join(self):
+        self.gateway.topology = [1, 3]
+        self.gateway.guardIntervalUs = int(0.3 * 1e6)
+        self.gateway.periodeSec = 0
+        self.gateway.nbReqMax = 3
+        self.initNodes([(1, 0.1, 0.1), (2, 0.2, 0.2), (3, 0.3, 0.3)])
+        self.gateway.pingTopology()
+        self.gateway.calculateNodesDelay()
+        self.gateway.sendAssignedTransmitDelaysToNodes()
+        time.sleep(0.7)  # wait for the nodes to receive the tdi packet
+        for node in self.nodes.values():
+            node.receivePackets.clear()
+
+        # node 2 joins the network while the gateway is running
+        gatewayThread = threading.Thread(target=self.gateway.main)
+        gatewayThread.start()
+        self.gateway.admitNode(2)
+        gatewayThread.join()
+        time.sleep(0.7)
+
+        # assert node 2 is inserted in the schedule, node 1 keeps its delay
+        assert self.gateway.topology == [1, 2, 3]
+        assert all(pkt.header.type != ID_PAQUET_TDI for pkt in self.nodes[1].receivePackets)
+        assert any(pkt.header.type == ID_PAQUET_TDI for pkt in self.nodes[2].receivePackets)
+        assert any(pkt.header.type == ID_PAQUET_TDI for pkt in self.nodes[3].receivePackets)
+        for address in [1, 2, 3]:
+            assert self.nodesTDAMAC[address].assignedTransmitDelaysUs == self.gateway.assignedTransmitDelaysUs[address]
+        assert any(pkt.header.src == 2 for pkt in self.gateway.receivedPaquets)
+
+    def test_selective_arq(self):
+        self.gateway.topology = [1, 2]
+        self.gateway.guardIntervalUs = int(0.3 * 1e6)
+        self.gateway.periodeSec = 0
+        self.gateway.nbReqMax = 3
+        self.gateway.selectiveArq = True
+        self.initNodes([(1, 0.1, 0.1), (2, 0.2, 0.2)])
+        self.gateway.pingTopology()
+        self.gateway.calculateNodesDelay()
+        self.gateway.sendAssignedTransmitDelaysToNodes()
+        time.sleep(0.7)  # wait for the nodes to receive the tdi packet
+
+        # the first data packet of node 2 is lost
+        self.nodes[2].looseNbTransmitPacket = 1
+        firstDsn = (self.gateway.dataPaquetSequenceNumber + 1) % 256
+        self.gateway.main()
+
+        # assert node 2 retransmitted its packet with the second request
+        assert self.gateway.nbRetransmittedPaquets == 1
+        assert len(self.gateway.receivedPaquets) == 6
+        assert [pkt.header.dsn for pkt in self.gateway.receivedPaquets if pkt.header.src == 2].count(firstDsn) == 1
+        assert self.gateway.topology == [1, 2]
+
+    def test_variable_slot_delays(self):
+        self.gateway.topology = [1, 2]
+        self.gateway.variableSlots = True
+        self.gateway.nodeTwoWayTimeOfFlightUs = {1: 200000, 2: 400000}
+        self.gateway.nodeSlotPacketCount = {1: 3}
+        self.gateway.calculateNodesDelay()
+
+        # assert the slot of node 1 holds 3 packets
+        slotUs = 3 * self.gateway.nodeDataPacketTransmitTimeUs + 2 * INTER_PACKET_GAP_US
+        assert self.gateway.getDataSlotTransmitTimeUs(1) == slotUs
+        assert self.gateway.assignedTransmitDelaysUs[2] == slotUs + self.gateway.guardIntervalUs - 200000
+
+    def test_variable_slots(self):
+        self.gateway.topology = [1, 2]
+        self.gateway.guardIntervalUs = int(0.3 * 1e6)
+        self.gateway.periodeSec = 0
+        self.gateway.nbReqMax = 4
+        self.gateway.variableSlots = True
+        self.initNodes([(1, 0.1, 0.1), (2, 0.2, 0.2)])
+        self.gateway.pingTopology()
+        self.gateway.calculateNodesDelay()
+        self.gateway.sendAssignedTransmitDelaysToNodes()
+        time.sleep(0.7)  # wait for the nodes to receive the tdi packet
+
+        # node 1 has a backlog of 6 payloads
+        payloads = [bytearray(f"sample {i}", 'utf-8') for i in range(6)]
+        for payload in payloads:
+            self.nodesTDAMAC[1].enqueuePayload(payload)
+        self.gateway.main()
+        time.sleep(0.7)
+
+        # assert the backlog is sent in multi-packet slots: 1 + 4 + 1 packets, then the response payload
+        node1Payloads = [pkt.payload for pkt in self.gateway.receivedPaquets if pkt.header.src == 1]
+        assert node1Payloads[:6] == payloads
+        assert len(node1Payloads) == 7
+        assert len([pkt for pkt in self.gateway.receivedPaquets if pkt.header.src == 2]) == 4
+        assert self.gateway.getSlotPacketCount(1) == 1
+        assert self.nodesTDAMAC[1].slotPacketCount == 1
+        for address in [1, 2]:
+            assert self.nodesTDAMAC[address].assignedTransmitDelaysUs == self.gateway.assignedTransmitDelaysUs[address]
+
+    def test_pipelined_period(self):
+        gateway = GatewayTDAMAC(self.modemGateway, [1, 2], periodMode=PERIOD_MODE_PIPELINED)
+        gateway.guardIntervalUs = int(0.3 * 1e6)
+
+        # far nodes: the next request fits between the request and the slots
+        gateway.nodeTwoWayTimeOfFlightUs = {1: int(4 * 1e6), 2: int(4.4 * 1e6)}
+        gateway.calculateNodesDelay()
+        assert gateway.calculatePipelinedPeriodUs() == gateway.calculateMinimalPeriodUs() // 2
+
+        # close nodes: the request would collide with the slots, the requests cannot overlap
+        gateway.nodeTwoWayTimeOfFlightUs = {1: int(2 * 1e6), 2: int(2.4 * 1e6)}
+        gateway.calculateNodesDelay()
+        assert gateway.calculatePipelinedPeriodUs() == gateway.calculateMinimalPeriodUs()
+
+        with self.assertRaises(ValueError):
+            GatewayTDAMAC(self.modemGateway, [1], periodMode=PERIOD_MODE_PIPELINED, selectiveArq=True)
+
+    def test_pipelined_throughput(self):
+        self.gateway.topology = [1, 2]
+        self.gateway.guardIntervalUs = int(0.3 * 1e6)
+        self.gateway.periodMode = PERIOD_MODE_PIPELINED
+        self.gateway.nbReqMax = 4
+        self.initNodes([(1, 2.0, 2.0), (2, 2.2, 2.2)])
+        self.gateway.pingTopology()
+        self.gateway.calculateNodesDelay()
+        self.gateway.sendAssignedTransmitDelaysToNodes()
+        time.sleep(2.5)  # wait for the nodes to receive the tdi packet
+
+        # test
+        startSec = time.time()
+        self.gateway.main()
+        elapsedSec = time.time() - startSec
+
+        # assert the requests overlapped: faster than serial requests, without lost packet
+        serialPeriodSec = self.gateway.calculateMinimalPeriodUs() * 1e-6
+        assert self.gateway.getPeriodSec() < 0.6 * serialPeriodSec
+        assert elapsedSec < 0.75 * 4 * serialPeriodSec
+        assert len(self.gateway.receivedPaquets) == 8
+        for address in [1, 2]:
+            assert len({pkt.header.dsn for pkt in self.gateway.receivedPaquets if pkt.header.src == address}) == 4
+            assert self.gateway.nodeMissedRequestCount[address] == 0
+        assert len(self.gateway.inFlightCycles) == 0
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from src.Mock.modem_mock_gateway import ModemMockGateway
+from src.Mock.node_mock_gateway import NodeMockGateway
+from src.GatewayTDAMAC import GatewayTDAMAC
+from src.GuardIntervalTuner import GuardIntervalTuner
+from tests import useTemporaryLogDir
+
+
+class TestGuardIntervalTuner(unittest.TestCase):
+    def setUp(self):
+        useTemporaryLogDir(self)
+
+    def fill(self, tuner, node, jitterUs, offsetUs=0):
+        for i in range(20):
+            tuner.addSample(node, offsetUs + (jitterUs if i % 2 == 0 else -jitterUs))
+
+    def test_not_enough_samples(self):
+        tuner = GuardIntervalTuner(minSamples=10)
+        tuner.addSample(1, 1000)
+        assert tuner.getJitterPercentileUs(1) is None
+        assert tuner.computeGuardIntervalsUs([1]) is None
+
+    def test_constant_offset_is_not_jitter(self):
+        tuner = GuardIntervalTuner(marginUs=0, minGuardIntervalUs=0)
+        self.fill(tuner, 1, 0, offsetUs=400000)
+        assert tuner.getJitterPercentileUs(1) == 0
+        assert tuner.computeGuardIntervalsUs([1]) == {1: 0}
+
+    def test_global_guard_interval(self):
+        tuner = GuardIntervalTuner(marginUs=1000, minGuardIntervalUs=0)
+        self.fill(tuner, 1, 10000)
+        self.fill(tuner, 2, 30000)
+        assert tuner.computeGuardIntervalsUs([1, 2]) == {1: 61000, 2: 61000}
+
+    def test_per_node_guard_interval(self):
+        tuner = GuardIntervalTuner(marginUs=1000, minGuardIntervalUs=0, perNode=True)
+        self.fill(tuner, 1, 10000)
+        self.fill(tuner, 2, 30000)
+        self.fill(tuner, 3, 5000)
+        assert tuner.computeGuardIntervalsUs([1, 2, 3]) == {1: 11000, 2: 41000, 3: 36000}
+
+    def test_clamp(self):
+        tuner = GuardIntervalTuner(minGuardIntervalUs=50000, maxGuardIntervalUs=100000)
+        self.fill(tuner, 1, 0)
+        assert tuner.computeGuardIntervalsUs([1]) == {1: 50000}
+        self.fill(tuner, 2, 1000000)
+        assert tuner.computeGuardIntervalsUs([1, 2]) == {1: 100000, 2: 100000}
+
+    def test_hysteresis(self):
+        tuner = GuardIntervalTuner(hysteresis=0.2)
+        assert not tuner.mustUpdate({1: 100000}, {1: 110000})
+        assert tuner.mustUpdate({1: 100000}, {1: 130000})
+        assert tuner.mustUpdate({1: 100000}, {1: 70000})
+
+    def test_gateway_shrinks_guard_interval(self):
+        modemGateway = ModemMockGateway()
+        modemGateway.connect("COM1")
+        modemGateway.receive()
+        for address in [1, 2, 3]:
+            modemGateway.addNode(NodeMockGateway(modemGateway, address))
+        tuner = GuardIntervalTuner(marginUs=0, minGuardIntervalUs=0)
+        gateway = GatewayTDAMAC(modemGateway, [1, 2, 3], guardIntervalTuner=tuner)
+        gateway.nodeTwoWayTimeOfFlightUs = {1: 100000, 2: 200000, 3: 300000}
+        gateway.calculateNodesDelay()
+        initialDelaysUs = dict(gateway.assignedTransmitDelaysUs)
+        for node in [1, 2, 3]:
+            self.fill(tuner, node, 10000)
+
+        # test
+        assert gateway.tuneGuardInterval()
+        changedNodes = gateway.rescheduleNodes()
+
+        # assert the slots are shorter, the first node keeps its delay
+        assert gateway.guardIntervalUs == 20000
+        assert changedNodes == [2, 3]
+        assert gateway.assignedTransmitDelaysUs[1] == initialDelaysUs[1]
+        assert gateway.assignedTransmitDelaysUs[3] == initialDelaysUs[3] - 2 * (2 * 1e6 - 20000)
+        assert not gateway.tuneGuardInterval()
+
+
+if __name__ == '__main__':
+    unittest.main()
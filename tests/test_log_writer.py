@@ -0,0 +1,97 @@
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from ahoi.com.base import ModemBaseCom
+from ahoi.com.logwriter import LogWriter
+from lib.ahoi.modem.packet import makePacket, packet2HexString
+
+
+class TestLogWriter(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.fileName = os.path.join(self.dir.name, "test.log")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_close_writes_all_lines(self):
+        writer = LogWriter(self.fileName, syncInterval=10)
+        lines = ["line %d\n" % i for i in range(1000)]
+        for line in lines:
+            writer.write(line)
+        writer.close()
+        with open(self.fileName) as f:
+            assert f.readlines() == lines
+        assert writer.dropped == 0
+
+    def test_sync_interval(self):
+        writer = LogWriter(self.fileName, syncInterval=0.05)
+        writer.write("line\n")
+        time.sleep(0.2)
+        # synced without closing the writer
+        with open(self.fileName) as f:
+            assert f.read() == "line\n"
+        writer.close()
+
+    def test_queue_overflow(self):
+        writer = LogWriter(self.fileName, queueSize=10)
+        # hold the writer thread: the lines pile up in the queue
+        written = threading.Event()
+        write = writer.file.write
+        writer.file.write = lambda data: (written.wait(), write(data))
+        for i in range(100):
+            writer.write("line %d\n" % i)
+        written.set()
+        writer.close()
+        with open(self.fileName) as f:
+            assert len(f.readlines()) == 100 - writer.dropped
+        assert writer.dropped >= 100 - 10 - 1
+
+    def test_drops_reported_periodically(self):
+        writer = LogWriter(self.fileName, syncInterval=0.05, queueSize=10)
+        written = threading.Event()
+        write = writer.file.write
+        writer.file.write = lambda data: (written.wait(), write(data))
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            for i in range(100):
+                writer.write("line %d\n" % i)
+            written.set()
+            time.sleep(0.2)
+            # reported without closing the writer
+            assert "WARNING: %d log lines dropped" % writer.dropped in stdout.getvalue()
+            writer.close()
+        assert stdout.getvalue().count("dropped") == 1
+
+    def test_dead_writer(self):
+        writer = LogWriter(self.fileName)
+        writer.file.write = lambda data: 1 / 0
+        with patch("threading.excepthook"):  # the traceback of the writer thread
+            writer.write("line\n")
+            writer.thread.join(timeout=1)
+        # the dead writer does not leak its file
+        assert writer.file.closed
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            writer.write("line\n")
+        assert "ERROR: log writer of %s stopped (division by zero)" % self.fileName in stdout.getvalue()
+        assert writer.closed
+        writer.close()
+
+    def test_com_log(self):
+        com = ModemBaseCom(cb=lambda pkt: None)
+        com.logOn(self.fileName)
+        pkts = [makePacket(src=1, dst=0, type=0x02, dsn=i, payload=bytearray([i])) for i in range(10)]
+        com.processRx(b"".join(com.processTx(pkt) for pkt in pkts))
+        com.logOff()
+        with open(self.fileName) as f:
+            assert [line.split(" ", 1)[1] for line in f] == [packet2HexString(pkt) + "\n" for pkt in pkts]
+
+
+if __name__ == '__main__':
+    unittest.main()
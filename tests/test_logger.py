@@ -0,0 +1,77 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from lib.ahoi.modem.packet import makePacket, packet2HexString
+from src.utils.Logger import Logger, LOGLEVELS, logQueue
+
+
+class Formatted:
+    """Argument counting how many times it is formatted"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __str__(self):
+        self.count += 1
+        return "formatted"
+
+
+class TestLogger(unittest.TestCase):
+    def setUp(self):
+        self.level = Logger.level
+        self.logger = Logger("TEST")
+
+    def tearDown(self):
+        Logger.setLevel(self.level)
+
+    def test_level_filtering(self):
+        Logger.setLevel(LOGLEVELS.INFO)
+        arg = Formatted()
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            self.logger.debug("debug %s", arg)
+            self.logger.warning("warning %s", arg)
+            Logger.flush()
+        # the debug message is not formatted at all
+        assert arg.count == 1
+        assert "debug" not in stdout.getvalue()
+        assert "[TEST] WARNING:" in stdout.getvalue()
+        assert stdout.getvalue().endswith(" warning formatted\n")
+
+    def test_packet_log(self):
+        with tempfile.TemporaryDirectory() as tmpDir:
+            cwd = os.getcwd()
+            os.chdir(tmpDir)
+            try:
+                pkts = [makePacket(src=1, type=0x02, dsn=i, payload=bytearray(b"ab")) for i in range(3)]
+                for pkt in pkts:
+                    self.logger.logRX(pkt, "gateway")
+                Logger.flush()
+                path = f"logs/gateway-{self.logger.logname}.log"
+                with open(path) as f:
+                    lines = f.readlines()
+                # the file stays open between the packets
+                assert not logQueue.files[path].closed
+                logQueue.files.pop(path).close()
+            finally:
+                os.chdir(cwd)
+        assert [line.split(" ", 1)[1] for line in lines] == [packet2HexString(pkt) + "(ab)\n" for pkt in pkts]
+
+    def test_log_dir(self):
+        logDir = Logger.logDir
+        with tempfile.TemporaryDirectory() as tmpDir:
+            try:
+                Logger.setLogDir(tmpDir)
+                self.logger.logTX(makePacket(src=1, type=0x02), "node1")
+                Logger.flush()
+                assert os.listdir(tmpDir) == [f"node1-{self.logger.logname}.log"]
+            finally:
+                Logger.setLogDir(logDir)
+            # the log is closed when the directory changes
+            assert all(not path.startswith(tmpDir) for path in logQueue.files)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,11 +5,14 @@ from src.GatewayTDAMAC import GatewayTDAMAC
 from src.NodeTDAMAC import NodeTDAMAC
 from src.Mock.modem_mock_node import ModemMockNode
 from src.Mock.node_mock_gateway import ResponseWithAckForDelay
+from src.constantes import PERIOD_MODE_BACK_TO_BACK
 import time
+from tests import useTemporaryLogDir
 
 
 class TestMiseEnPlaceDelai(unittest.TestCase):
     def setUp(self):
+        useTemporaryLogDir(self)
         self.modemGateway = ModemMockGateway()
         self.modemGateway.connect("COM1")
         self.modemGateway.receive()
@@ -116,6 +119,7 @@ class TestMiseEnPlaceDelai(unittest.TestCase):
 
         # init node TDAMAC
         nodeTDAMAC = NodeTDAMAC(self.nodeModem, 1)
+        self.addCleanup(nodeTDAMAC.close)
         assert nodeTDAMAC.assignedTransmitDelaysUs == -1
 
         # test
@@ -153,8 +157,11 @@ class TestMiseEnPlaceDelai(unittest.TestCase):
 
         # init node TDAMAC
         nodeTDAMAC = NodeTDAMAC(self.nodeModem, 1)
+        self.addCleanup(nodeTDAMAC.close)
         nodeTDAMAC2 = NodeTDAMAC(self.nodeModem2, 2)
+        self.addCleanup(nodeTDAMAC2.close)
         nodeTDAMAC3 = NodeTDAMAC(self.nodeModem3, 3)
+        self.addCleanup(nodeTDAMAC3.close)
 
         # init network
         self.nodeModem.connect("COM1")
@@ -203,8 +210,11 @@ class TestMiseEnPlaceDelai(unittest.TestCase):
 
         # init node TDAMAC
         self.nodeTDAMAC = NodeTDAMAC(self.nodeModem, 1)
+        self.addCleanup(self.nodeTDAMAC.close)
         self.nodeTDAMAC2 = NodeTDAMAC(self.nodeModem2, 2)
+        self.addCleanup(self.nodeTDAMAC2.close)
         self.nodeTDAMAC3 = NodeTDAMAC(self.nodeModem3, 3)
+        self.addCleanup(self.nodeTDAMAC3.close)
 
         # init network
         self.nodeModem.connect("COM1")
@@ -245,8 +255,11 @@ class TestMiseEnPlaceDelai(unittest.TestCase):
 
         # init node TDAMAC
         self.nodeTDAMAC = NodeTDAMAC(self.nodeModem, 1)
+        self.addCleanup(self.nodeTDAMAC.close)
         self.nodeTDAMAC2 = NodeTDAMAC(self.nodeModem2, 2)
+        self.addCleanup(self.nodeTDAMAC2.close)
         self.nodeTDAMAC3 = NodeTDAMAC(self.nodeModem3, 3)
+        self.addCleanup(self.nodeTDAMAC3.close)
 
         # init network
         self.nodeModem.connect("COM1")
@@ -283,7 +296,9 @@ class TestMiseEnPlaceDelai(unittest.TestCase):
 
         # init node TDAMAC
         self.nodeTDAMAC = NodeTDAMAC(self.nodeModem, 1)
+        self.addCleanup(self.nodeTDAMAC.close)
         self.nodeTDAMAC2 = NodeTDAMAC(self.nodeModem2, 2)
+        self.addCleanup(self.nodeTDAMAC2.close)
 
         # init network
         self.nodeModem.connect("COM1")
@@ -297,6 +312,96 @@ class TestMiseEnPlaceDelai(unittest.TestCase):
         #Assert
         assert self.gateway.topology == [1]
 
+    def test_broadcast_ping_topology(self):
+        # init mocks
+        # gateway
+        rangeSlotUs = int(0.2 * 1e6)
+        self.gateway.topology = [1, 2, 3]
+        self.gateway.broadcastRangingSlotUs = rangeSlotUs
+        nodes = []
+        nodesTDAMAC = []
+        for address in [1, 2, 3]:
+            nodeModem = ModemMockNode(address, self.modemGateway)
+            node = NodeMockGateway(self.modemGateway, address, lambda node, pkt, m=nodeModem: m.simulateRx(pkt))
+            node.transmitDelay = 0.5
+            node.receptionDelay = 0.5
+            self.modemGateway.addNode(node)
+            nodes.append(node)
+            nodeModem.connect("COM1")
+            nodeModem.receive()
+            # the node configures the ranging delay of its modem
+            nodesTDAMAC.append(NodeTDAMAC(nodeModem, address, rangeSlotUs=rangeSlotUs))
+            self.addCleanup(nodesTDAMAC[-1].close)
+
+        # test
+        start = time.time()
+        self.gateway.pingTopology()
+        elapsed = time.time() - start
+
+        # assert
+        for node in nodes:
+            assert node.rangeDelayUs == node.adress * rangeSlotUs
+            assert len(node.receivePackets) == 1  # one broadcast ping, no unicast retry
+            assert self.gateway.nodeTwoWayTimeOfFlightUs[node.adress] == 1e6
+        assert elapsed < 3 * 1
+        assert self.gateway.topology == [1, 2, 3]
+
+    def test_broadcast_ping_topology_retry_missing_node(self):
+        # init topology
+        self.gateway.topology = [1, 2, 3]
+        self.gateway.broadcastRangingSlotUs = int(0.2 * 1e6)
+        self.gateway.timeoutPingSec = 1.5
+        node = NodeMockGateway(self.modemGateway, 1)
+        node.transmitDelay = 0.5
+        node.receptionDelay = 0.5
+        self.modemGateway.addNode(node)
+        node2 = NodeMockGateway(self.modemGateway, 2)
+        node2.transmitDelay = 0.5
+        node2.receptionDelay = 0.7
+        node2.looseNbReceivePacket = 1  # lose the broadcast ping
+        self.modemGateway.addNode(node2)
+        node3 = NodeMockGateway(self.modemGateway, 3)
+        node3.looseReceivePacket = True
+        self.modemGateway.addNode(node3)
+        self.gateway.maxAttemps = 2
+
+        # test
+        self.gateway.pingTopology()
+
+        # assert only the missing nodes are pinged again
+        assert len(node.receivePackets) == 1
+        assert len(node2.receivePackets) == 1
+        assert self.gateway.nodeTwoWayTimeOfFlightUs[1] == 1e6
+        assert self.gateway.nodeTwoWayTimeOfFlightUs[2] == 1.2e6
+        assert self.gateway.topology == [1, 2]
+
+    def test_minimal_period(self):
+        self.gateway.topology = [1, 2, 3]
+        self.gateway.nodeTwoWayTimeOfFlightUs = {1: 100000, 2: 300000, 3: 200000}
+        self.gateway.calculateNodesDelay()
+
+        # the last packet to arrive is the one of the last node of the schedule
+        lastArrivalUs = self.gateway.assignedTransmitDelaysUs[2] + 300000
+        expectedPeriodUs = self.gateway.requestPacketTransmitTimeUs + lastArrivalUs + \
+            self.gateway.nodeDataPacketTransmitTimeUs + self.gateway.guardIntervalUs
+        assert self.gateway.calculateMinimalPeriodUs() == expectedPeriodUs
+
+        # fixed period
+        assert self.gateway.getPeriodSec() == self.gateway.periodeSec
+        self.assertAlmostEqual(self.gateway.getChannelUtilisation(),
+                               3 * self.gateway.nodeDataPacketTransmitTimeUs * 1e-6 / self.gateway.periodeSec)
+
+        # back-to-back period
+        self.gateway.periodMode = PERIOD_MODE_BACK_TO_BACK
+        self.assertAlmostEqual(self.gateway.getPeriodSec(), expectedPeriodUs * 1e-6)
+        self.assertAlmostEqual(self.gateway.getChannelUtilisation(),
+                               3 * self.gateway.nodeDataPacketTransmitTimeUs / expectedPeriodUs)
+        assert self.gateway.getTimeoutDataRequestSec() < self.gateway.periodeSec
+
+    def test_unknown_period_mode(self):
+        with self.assertRaises(ValueError):
+            GatewayTDAMAC(self.modemGateway, [], periodMode="unknown")
+
 
 if __name__ == '__main__':
     unittest.main()
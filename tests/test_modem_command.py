@@ -0,0 +1,94 @@
+import threading
+import time
+import unittest
+from concurrent.futures import Future, TimeoutError
+from ahoi.com.base import ModemBaseCom
+from lib.ahoi.modem.modem import Modem
+from lib.ahoi.modem.packet import makePacket, isCmdType
+from src.constantes import ID_PAQUET_DATA
+
+
+class ComCommandMock(ModemBaseCom):
+    """Connection answering the commands after a delay, a data packet is received before each answer"""
+
+    def __init__(self, delaySec: float = 0.05):
+        super().__init__()
+        self.delaySec = delaySec
+        self.answer = True
+        self.writeDelaySec = 0  # time the frame waits before being written
+
+    def send(self, pkt):
+        written = Future()
+
+        def respond():
+            time.sleep(self.writeDelaySec)
+            written.set_result(time.time_ns())
+            if not isCmdType(pkt) or not self.answer:
+                return
+            time.sleep(self.delaySec)
+            self.rxCallback(makePacket(src=1, dst=0, type=ID_PAQUET_DATA))
+            self.rxCallback(makePacket(type=pkt.header.type, payload=bytearray([pkt.header.type])))
+
+        threading.Thread(target=respond).start()
+        return written
+
+
+class TestModemCommand(unittest.TestCase):
+    def setUp(self):
+        self.com = ComCommandMock()
+        self.modem = Modem()
+        self.modem.connect(self.com)
+
+    def test_outstanding_commands(self):
+        # several commands are outstanding at once, each one is completed by the response of its type
+        versionFuture = self.modem.getVersion()
+        statFuture = self.modem.getPacketStat()
+        configFuture = self.modem.getConfig()
+        assert not versionFuture.done()
+        assert versionFuture.result(timeout=1).payload == bytearray([0x80])
+        assert statFuture.result(timeout=1).payload == bytearray([0xC0])
+        assert configFuture.result(timeout=1).payload == bytearray([0x83])
+
+    def test_blocking(self):
+        self.modem.setModeBlocking()
+        startSec = time.monotonic()
+        future = self.modem.getVersion()
+        # assert the blocking mode returns as soon as the response arrives, not on the data packet
+        assert future.done()
+        assert future.result().header.type == 0x80
+        assert time.monotonic() - startSec < 0.5
+
+    def test_timeout(self):
+        self.com.answer = False
+        self.modem.timeout = 0.1
+        self.modem.setModeBlocking()
+        future = self.modem.getVersion()
+        with self.assertRaises(TimeoutError):
+            future.result()
+
+        # assert the late command does not take the response of the next one
+        self.com.answer = True
+        future = self.modem.getVersion()
+        assert future.result().header.type == 0x80
+
+    def test_no_response(self):
+        # a command without response (e.g. reset) fails after the timeout, without a later response of its type
+        self.com.answer = False
+        self.modem.timeout = 0.1
+        future = self.modem.reset()
+        assert not future.done()
+        with self.assertRaises(TimeoutError):
+            future.result(timeout=1)
+        assert len(self.modem.pendingCommands[0x87]) == 0
+
+    def test_timeout_starts_on_the_wire(self):
+        # the frame waits longer than the timeout behind other frames, its response still arrives in time
+        self.com.writeDelaySec = 0.2
+        self.modem.timeout = 0.1
+        self.modem.setModeBlocking()
+        future = self.modem.getVersion()
+        assert future.result().header.type == 0x80
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import unittest
+from ahoi.com.base import ModemBaseCom
+from ahoi.com.streamer import Streamer
+from ahoi.modem.packet import byteArrayToPacket, isCmdType, makePacket
+from lib.ahoi.modem.modem import Modem
+from lib.ahoi.modem.profile import loadProfile, makeProfile
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "apps", "image", "config", "default.ini")
+
+
+class ComBatchMock(ModemBaseCom):
+    """Connection answering every command of a write, the last command is not answered if `dropLast`"""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+        self.dropLast = False
+
+    def sendBytes(self, tx):
+        self.writes.append(tx)
+        decoder = Streamer()
+        commands = [byteArrayToPacket(frame) for frame in map(decoder.dec, tx) if frame is not None]
+        if self.dropLast:
+            commands = commands[:-1]
+        for pkt in commands:
+            if isCmdType(pkt):
+                self.rxCallback(makePacket(type=pkt.header.type, payload=pkt.payload))
+
+
+class TestModemConfigure(unittest.TestCase):
+    def setUp(self):
+        self.com = ComBatchMock()
+        self.modem = Modem()
+        self.modem.connect(self.com)
+        self.modem.timeout = 0.2
+
+    def test_configure(self):
+        profile = loadProfile(CONFIG_PATH)
+        assert profile == makeProfile(bitSpread=3, txGain=0, agc=True, rxGain=0)
+        assert ("agc", (1,)) in profile and ("rxGain", ()) in profile
+
+        state = self.modem.configure(profile)
+
+        # assert the whole profile is written at once and every response is collected
+        assert len(self.com.writes) == 1
+        assert list(state) == [name for name, _ in profile]
+        assert state["bitSpread"].payload == bytearray([3])
+        assert all(pkt is not None for pkt in state.values())
+
+    def test_missing_response(self):
+        self.com.dropLast = True
+        state = self.modem.configure(makeProfile(txGain=10, transducer=5))
+        assert state["transducer"].payload == bytearray([5])
+        assert state["rxLevel"] is None
+
+        with self.assertRaises(ValueError):
+            self.modem.configure([("setTxEcho", (True,))])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from ahoi.com.base import ModemBaseCom
+from lib.ahoi.modem.modem import Modem
+from lib.ahoi.modem.packet import makePacket
+from src.constantes import ID_PAQUET_DATA
+
+
+class ComMock(ModemBaseCom):
+    """Connection recording the bytes written"""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def send(self, pkt):
+        self.sendBytes(self.processTx(pkt))
+
+    def sendBytes(self, tx):
+        self.writes.append(bytes(tx))
+
+
+class TestModemFrame(unittest.TestCase):
+    def setUp(self):
+        self.com = ComMock()
+        self.modem = Modem()
+        self.modem.connect(self.com)
+
+    def test_prepared_frame(self):
+        # the payload contains a DLE byte which must be stuffed
+        payload = bytearray(b"\x10data")
+        pkt = makePacket(src=1, dst=0, type=ID_PAQUET_DATA, ack=0x20, dsn=7, payload=payload)
+
+        frame = self.modem.prepareFrame(pkt)
+        assert self.com.writes == []
+        self.modem.sendFrame(frame)
+
+        # assert the prepared frame is written at once and matches the frame of a regular send
+        self.modem.send(src=1, dst=0, type=ID_PAQUET_DATA, payload=payload, status=0x20, dsn=7)
+        assert len(self.com.writes) == 2
+        assert self.com.writes[0] == self.com.writes[1]
+        assert self.modem.seqNumber == 2
+
+
+if __name__ == '__main__':
+    unittest.main()
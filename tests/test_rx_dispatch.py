@@ -0,0 +1,57 @@
+import unittest
+from ahoi.com.base import ModemBaseCom
+from lib.ahoi.modem.modem import Modem
+from lib.ahoi.modem.packet import makePacket
+from src.constantes import ID_PAQUET_DATA, ID_PAQUET_PING
+
+
+class TestRxDispatch(unittest.TestCase):
+    def setUp(self):
+        self.com = ModemBaseCom()
+        self.modem = Modem()
+        self.modem.connect(self.com)
+
+    def receive(self, type, src):
+        self.com.rxCallback(makePacket(src=src, dst=0, type=type))
+
+    def test_filters(self):
+        received = {"any": [], "data": [], "data1": [], "src2": []}
+        self.modem.addRxCallback(lambda pkt: received["any"].append(pkt))
+        self.modem.addRxCallback(lambda pkt: received["data"].append(pkt), type=ID_PAQUET_DATA)
+        self.modem.addRxCallback(lambda pkt: received["data1"].append(pkt), type=ID_PAQUET_DATA, src=1)
+        self.modem.addRxCallback(lambda pkt: received["src2"].append(pkt), src=2)
+
+        self.receive(ID_PAQUET_DATA, 1)
+        self.receive(ID_PAQUET_DATA, 2)
+        self.receive(ID_PAQUET_PING, 2)
+        self.receive(ID_PAQUET_PING, 3)
+
+        # assert every subscriber only receives the packets matching its type and source
+        assert len(received["any"]) == 4
+        assert [pkt.header.src for pkt in received["data"]] == [1, 2]
+        assert [pkt.header.src for pkt in received["data1"]] == [1]
+        assert [pkt.header.type for pkt in received["src2"]] == [ID_PAQUET_DATA, ID_PAQUET_PING]
+
+    def test_remove_during_dispatch(self):
+        received = []
+
+        def first(pkt):
+            received.append("first")
+            # removing a subscriber during the dispatch does not change the current dispatch
+            self.modem.removeRxCallback(first, type=ID_PAQUET_DATA)
+            self.modem.removeRxCallback(second, type=ID_PAQUET_DATA)
+
+        def second(pkt):
+            received.append("second")
+
+        self.modem.addRxCallback(first, type=ID_PAQUET_DATA)
+        self.modem.addRxCallback(second, type=ID_PAQUET_DATA)
+        self.receive(ID_PAQUET_DATA, 1)
+        self.receive(ID_PAQUET_DATA, 1)
+
+        assert received == ["first", "second"]
+        assert self.modem.rxSubscribers == {}
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import time
+import unittest
+from src.Mock.modem_mock_gateway import ModemMockGateway
+from src.Mock.modem_mock_node import ModemMockNode
+from src.Mock.node_mock_gateway import NodeMockGateway
+from src.GatewayTDAMAC import GatewayTDAMAC
+from src.NodeTDAMAC import NodeTDAMAC
+from src.SampleQueue import SampleQueue
+from src.utils.samples import decodeSamples
+from tests import useTemporaryLogDir
+
+
+class TestSampleQueue(unittest.TestCase):
+    def setUp(self):
+        useTemporaryLogDir(self)
+
+    def test_pack(self):
+        queue = SampleQueue(sampleOctetSize=2, maxSamples=4)
+        for i, timeSec in enumerate([100.0, 100.2, 100.3]):
+            queue.push(bytes([i, i]), timeSec)
+        with self.assertRaises(ValueError):
+            queue.push(bytes(3))
+
+        # assert the oldest samples which fit are packed with their time
+        payload = queue.pack(8, nowSec=101.0)
+        assert len(payload) == 6
+        samples = decodeSamples(payload, 2, 101.0, queue.timeUnitSec)
+        assert [sample for _, sample in samples] == [bytes([0, 0]), bytes([1, 1])]
+        assert abs(samples[0][0] - 100.0) < 1e-6
+        assert abs(samples[1][0] - 100.2) < 1e-6
+        assert len(queue) == 1
+
+        # assert the oldest samples are dropped when the queue is full
+        for i in range(4):
+            queue.push(bytes([9, i]), 102.0 + i)
+        assert len(queue) == 4
+        assert queue.nbDroppedSamples == 1
+        with self.assertRaises(ValueError):
+            queue.pack(2)
+
+    def test_node_batching(self):
+        modemGateway = ModemMockGateway()
+        modemGateway.connect("COM1")
+        modemGateway.receive()
+        gateway = GatewayTDAMAC(modemGateway, [1], nbReqMax=2)
+        gateway.guardIntervalUs = int(0.3 * 1e6)
+        gateway.periodeSec = 0
+        nodeModem = ModemMockNode(1, modemGateway)
+        node = NodeMockGateway(modemGateway, 1, lambda node, pkt: nodeModem.simulateRx(pkt))
+        node.transmitDelay = 0.1
+        node.receptionDelay = 0.1
+        modemGateway.addNode(node)
+        nodeModem.connect("COM1")
+        nodeModem.receive()
+        sampleQueue = SampleQueue(sampleOctetSize=3)
+        self.addCleanup(NodeTDAMAC(nodeModem, 1, sampleQueue=sampleQueue).close)
+        gateway.pingTopology()
+        gateway.calculateNodesDelay()
+        gateway.sendAssignedTransmitDelaysToNodes()
+        time.sleep(0.5)  # wait for the node to receive the tdi packet
+
+        # the node takes 5 readings before the first request
+        for i in range(5):
+            sampleQueue.push(bytes([i, i, i]))
+        gateway.main()
+
+        # assert the readings are delivered in order, two per packet, instead of being overwritten
+        samples = [sample for pkt in gateway.receivedPaquets
+                   for _, sample in decodeSamples(pkt.payload, 3, time.time(), sampleQueue.timeUnitSec)]
+        assert samples == [bytes([i, i, i]) for i in range(4)]
+        assert len(sampleQueue) == 1
+
+
+if __name__ == '__main__':
+    unittest.main()
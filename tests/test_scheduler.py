@@ -0,0 +1,147 @@
+import time
+import unittest
+from src.Mock.modem_mock_gateway import ModemMockGateway
+from src.Mock.modem_mock_node import ModemMockNode
+from src.Mock.node_mock_gateway import NodeMockGateway
+from src.GatewayTDAMAC import GatewayTDAMAC
+from src.GuardIntervalTuner import GuardIntervalTuner
+from src.NodeTDAMAC import NodeTDAMAC
+from src.PollingScheduler import PollingScheduler
+from src.TDMAScheduler import TDMAScheduler
+from src.constantes import ID_PAQUET_REQ_DATA, BROCAST_ADDRESS
+from tests import useTemporaryLogDir
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        useTemporaryLogDir(self)
+        self.modemGateway = ModemMockGateway()
+        self.modemGateway.connect("COM1")
+        self.modemGateway.receive()
+
+    def initNodes(self, gateway, delays):
+        """Creates the nodes, delays is a list of (address, transmitDelay, receptionDelay)"""
+        self.nodes = {}
+        for address, transmitDelay, receptionDelay in delays:
+            nodeModem = ModemMockNode(address, self.modemGateway)
+            node = NodeMockGateway(self.modemGateway, address, lambda node, pkt, m=nodeModem: m.simulateRx(pkt))
+            node.transmitDelay = transmitDelay
+            node.receptionDelay = receptionDelay
+            self.modemGateway.addNode(node)
+            nodeModem.connect("COM1")
+            nodeModem.receive()
+            self.addCleanup(NodeTDAMAC(nodeModem, address).close)
+            self.nodes[address] = node
+        gateway.pingTopology()
+        gateway.calculateNodesDelay()
+        gateway.sendAssignedTransmitDelaysToNodes()
+        time.sleep(0.7)  # wait for the nodes to receive the tdi packet
+        for node in self.nodes.values():
+            node.receivePackets.clear()
+
+    def test_tdamac_spread_nodes(self):
+        gateway = GatewayTDAMAC(self.modemGateway, [1, 2, 3])
+        gateway.nodeTwoWayTimeOfFlightUs = {1: 100000, 2: 2500000, 3: 2600000}
+        # guard interval shrunk to the minimum of the tuner
+        gateway.nodeGuardIntervalsUs = {node: GuardIntervalTuner().minGuardIntervalUs for node in [1, 2, 3]}
+        gateway.calculateNodesDelay()
+
+        # assert node 2 transmits as soon as it receives the request, node 3 is packed after its actual arrival
+        delaysUs = gateway.assignedTransmitDelaysUs
+        assert delaysUs[2] == 0
+        for node in [1, 2, 3]:
+            delaysUs[node].to_bytes(4, 'big')
+        arrivalsUs = [delaysUs[node] + gateway.nodeTwoWayTimeOfFlightUs[node] for node in [1, 2, 3]]
+        slotUs = gateway.nodeDataPacketTransmitTimeUs + gateway.nodeGuardIntervalsUs[3]
+        assert arrivalsUs[1] >= arrivalsUs[0] + slotUs
+        assert arrivalsUs[2] == arrivalsUs[1] + slotUs
+
+    def test_tdma_fixed_slots(self):
+        for address in [1, 2, 3]:
+            self.modemGateway.addNode(NodeMockGateway(self.modemGateway, address))
+        gateway = GatewayTDAMAC(self.modemGateway, [1, 2, 3], scheduler=TDMAScheduler())
+        gateway.guardIntervalUs = 100000
+        gateway.nodeTwoWayTimeOfFlightUs = {1: 200000, 2: 600000, 3: 400000}
+        gateway.calculateNodesDelay()
+
+        # assert the slots cover the largest time of flight, whatever the distance of the node
+        slotUs = gateway.nodeDataPacketTransmitTimeUs + 100000 + 600000
+        assert gateway.topology == [1, 3, 2]
+        assert gateway.assignedTransmitDelaysUs == {1: 0, 3: slotUs, 2: 2 * slotUs}
+
+        # assert the slots only grow when a node moves past the largest time of flight
+        assert not gateway.scheduler.handleToFEstimate(1, 500000)
+        assert gateway.scheduler.handleToFEstimate(2, 700000)
+        gateway.nodeTwoWayTimeOfFlightUs[2] = 700000
+        assert gateway.rescheduleNodes() == [3, 2]
+        assert gateway.assignedTransmitDelaysUs[2] == 2 * (slotUs + 100000)
+
+    def test_tdma_remove_node(self):
+        for address in [1, 2, 3]:
+            self.modemGateway.addNode(NodeMockGateway(self.modemGateway, address))
+        gateway = GatewayTDAMAC(self.modemGateway, [1, 2, 3], scheduler=TDMAScheduler())
+        gateway.guardIntervalUs = 100000
+        gateway.nodeTwoWayTimeOfFlightUs = {1: 200000, 2: 600000, 3: 400000}
+        gateway.calculateNodesDelay()
+
+        # the guard interval of the first node is retuned, then the last node leaves:
+        # the delay of the node before it changes too
+        gateway.nodeGuardIntervalsUs[1] = 300000
+        assert gateway.removeNode(2) == [3]
+        slotUs = gateway.nodeDataPacketTransmitTimeUs + 300000 + 600000
+        assert gateway.assignedTransmitDelaysUs == {1: 0, 3: slotUs}
+
+    def test_polling(self):
+        gateway = GatewayTDAMAC(self.modemGateway, [1, 2], nbReqMax=2, scheduler=PollingScheduler())
+        gateway.guardIntervalUs = int(0.3 * 1e6)
+        gateway.periodeSec = 0
+        self.initNodes(gateway, [(1, 0.1, 0.1), (2, 0.2, 0.2)])
+
+        # test
+        gateway.main()
+
+        # assert every node is polled with a unicast request and answers immediately
+        assert gateway.assignedTransmitDelaysUs == {1: 0, 2: 0}
+        for address, node in self.nodes.items():
+            requests = [pkt for pkt in node.receivePackets if pkt.header.type == ID_PAQUET_REQ_DATA]
+            assert len(requests) == 2
+            assert all(pkt.header.dst == address for pkt in requests)
+        assert len(gateway.receivedPaquets) == 4
+        assert len(gateway.dataPacketLatenciesUs) == 4
+
+    def test_polling_retry(self):
+        gateway = GatewayTDAMAC(self.modemGateway, [1, 2], nbReqMax=1, scheduler=PollingScheduler(maxRetries=1))
+        gateway.guardIntervalUs = int(0.3 * 1e6)
+        gateway.periodeSec = 0
+        gateway.timeoutDataRequestSec = 1
+        self.initNodes(gateway, [(1, 0.1, 0.1), (2, 0.2, 0.2)])
+
+        # the first data packet of node 1 is lost
+        self.nodes[1].looseNbTransmitPacket = 1
+        gateway.main()
+
+        # assert node 1 is polled again in the same cycle
+        requests = [pkt for pkt in self.nodes[1].receivePackets if pkt.header.type == ID_PAQUET_REQ_DATA]
+        assert len(requests) == 2
+        assert len(gateway.receivedPaquets) == 2
+        assert gateway.nodeMissedRequestCount[1] == 0
+
+    def test_tdma_broadcast(self):
+        gateway = GatewayTDAMAC(self.modemGateway, [1, 2], nbReqMax=2, scheduler=TDMAScheduler())
+        gateway.guardIntervalUs = int(0.3 * 1e6)
+        gateway.periodeSec = 0
+        self.initNodes(gateway, [(1, 0.1, 0.1), (2, 0.2, 0.2)])
+
+        # test
+        gateway.main()
+
+        # assert the requests are broadcast and every node answers in its slot
+        for node in self.nodes.values():
+            requests = [pkt for pkt in node.receivePackets if pkt.header.type == ID_PAQUET_REQ_DATA]
+            assert all(pkt.header.dst == BROCAST_ADDRESS for pkt in requests)
+        assert len(gateway.receivedPaquets) == 4
+        assert all(count == 0 for count in gateway.nodeMissedRequestCount.values())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import threading
+import time
+import unittest
+from unittest import mock
+from ahoi.com.serial import ModemSerialCom
+from lib.ahoi.modem.packet import makePacket
+
+
+class SerialPortMock:
+    """Serial port recording the written frames, the first write blocks until released"""
+
+    def __init__(self):
+        self.is_open = True
+        self.frames = []
+        self.release = threading.Event()
+
+    def write(self, tx):
+        self.release.wait()
+        self.frames.append(bytes(tx))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+class TestSerialCom(unittest.TestCase):
+    def setUp(self):
+        self.com = ModemSerialCom()
+        self.port = SerialPortMock()
+        self.com.com = self.port
+
+    def tearDown(self):
+        self.port.release.set()
+        self.com.close()
+
+    def test_send_does_not_block(self):
+        startSec = time.monotonic()
+        future = self.com.send(makePacket(type=0x02, payload=bytearray(8)))
+        assert time.monotonic() - startSec < 0.05
+        assert not future.done()
+        releaseNs = time.time_ns()
+        self.port.release.set()
+        # completed with the time the frame was written
+        assert future.result(timeout=1) >= releaseNs
+        assert len(self.port.frames) == 1
+
+    def test_priority(self):
+        self.com.airBitrate = None
+        first = self.com.send(makePacket(type=0x02, payload=bytearray([1])))
+        while self.com.txQueue.qsize() > 0:  # the writer holds the first frame
+            time.sleep(0.001)
+        data = [self.com.send(makePacket(type=0x02, payload=bytearray([2 + i]))) for i in range(3)]
+        request = self.com.send(makePacket(type=0x7C))
+        cmd = self.com.send(makePacket(type=0x80))
+        self.port.release.set()
+        for future in [first, request, cmd] + data:
+            future.result(timeout=1)
+
+        # the command goes ahead, the packets keep their order even without payload
+        expected = [makePacket(type=0x02, payload=bytearray([1])), makePacket(type=0x80)] + \
+                   [makePacket(type=0x02, payload=bytearray([2 + i])) for i in range(3)] + [makePacket(type=0x7C)]
+        assert self.port.frames == [bytes(self.com.processTx(pkt)) for pkt in expected]
+
+    def test_airtime_pacing(self):
+        self.port.release.set()
+        self.com.airBitrate = 48 / 0.1  # 100 ms per packet without payload
+        startSec = time.monotonic()
+        futures = [self.com.send(makePacket(type=0x02)) for _ in range(3)]
+        futures[-1].result(timeout=1)
+        # the last frame is written after the airtime of the two first ones
+        assert 0.2 <= time.monotonic() - startSec < 0.3
+
+    def test_send_bytes_airtime_pacing(self):
+        self.port.release.set()
+        self.com.airBitrate = 48 / 0.1
+        startSec = time.monotonic()
+        frames = [self.com.processTx(makePacket(type=0x02)) for _ in range(2)]
+        self.com.sendBytes(b"".join(frames))  # two packets in one write
+        self.com.sendBytes(self.com.processTx(makePacket(type=0x80)))  # command, no airtime
+        self.com.sendBytes(frames[0]).result(timeout=1)
+        # written after the command and the airtime of the two first packets
+        assert 0.2 <= time.monotonic() - startSec < 0.3
+
+    def test_prepared_frame_airtime_pacing(self):
+        self.port.release.set()
+        self.com.airBitrate = 48 / 0.1
+        frames = [self.com.prepareFrame(makePacket(type=0x02)) for _ in range(3)]
+        startSec = time.monotonic()
+        # the priority and airtime come with the frame, it is not decoded again
+        with mock.patch("ahoi.com.serial.Streamer", side_effect=AssertionError("decoded at send time")):
+            futures = [self.com.sendFrame(frame) for frame in frames]
+        futures[-1].result(timeout=1)
+        assert 0.2 <= time.monotonic() - startSec < 0.3
+        assert self.port.frames == [bytes(frame.tx) for frame in frames]
+
+
+if __name__ == '__main__':
+    unittest.main()
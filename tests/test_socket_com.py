@@ -0,0 +1,35 @@
+import socket
+import threading
+import unittest
+from ahoi.com.socket import ModemSocketCom
+from ahoi.modem.packet import makePacket
+
+
+class TestSocketCom(unittest.TestCase):
+    def test_buffered_receive(self):
+        received = []
+        com = ModemSocketCom(cb=received.append)
+        com.conn, peer = socket.socketpair()
+        com.conn.settimeout(ModemSocketCom.SERVER_TIMEOUT)
+        pkts = [makePacket(src=1, dst=2, type=0x20 + i % 4, payload=bytearray([0x10] * i), dsn=i)
+                for i in range(50)]
+        stream = b"".join(com.processTx(pkt) for pkt in pkts)
+
+        def sendTraffic():
+            # odd-sized writes, so the packets straddle the reads
+            for i in range(0, len(stream), 37):
+                peer.sendall(stream[i:i + 37])
+            peer.close()
+
+        sender = threading.Thread(target=sendTraffic)
+        sender.start()
+        com.receive()  # returns when the peer disconnects
+        sender.join()
+        com.conn.close()
+
+        assert [(pkt.header.type, pkt.header.dsn, bytes(pkt.payload)) for pkt in received] == \
+               [(pkt.header.type, pkt.header.dsn, bytes(pkt.payload)) for pkt in pkts]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import random
+import unittest
+from ahoi.com.streamer import Streamer
+
+
+def decodeBytewise(rx):
+    streamer = Streamer()
+    frames = []
+    for b in rx:
+        r = streamer.dec(b)
+        if r is not None:
+            frames.append(r)
+    return frames
+
+
+def decodeChunks(rx, chunkSizes):
+    streamer = Streamer()
+    frames = []
+    pos = 0
+    for size in chunkSizes:
+        frames.extend(streamer.decode(rx[pos:pos + size]))
+        pos += size
+    frames.extend(streamer.decode(rx[pos:]))
+    return frames
+
+
+class TestStreamer(unittest.TestCase):
+    def test_encoded_packets(self):
+        streamer = Streamer()
+        payloads = [bytes(), bytes([0x10]), bytes([0x10, 0x10, 0x03]), bytes(range(256))]
+        rx = b"".join(streamer.enc(payload) for payload in payloads)
+
+        assert streamer.decode(rx) == payloads
+        assert decodeChunks(rx, [1] * len(rx)) == payloads
+
+    def test_same_frames_as_bytewise_decoder(self):
+        rng = random.Random(0)
+        # biased to the control octets, to hit the stuffing, aborts and noise between packets
+        alphabet = [0x10, 0x02, 0x03, 0x00, 0xff]
+        for _ in range(500):
+            parts = []
+            for _ in range(rng.randint(0, 10)):
+                if rng.random() < 0.5:
+                    parts.append(Streamer().enc(bytes(rng.randrange(256) for _ in range(rng.randint(0, 20)))))
+                else:
+                    parts.append(bytes(rng.choice(alphabet) for _ in range(rng.randint(0, 10))))
+            rx = b"".join(parts)
+            chunkSizes = [rng.randint(1, 8) for _ in range(len(rx) // 4)]
+
+            expected = decodeBytewise(rx)
+            assert Streamer().decode(rx) == expected
+            assert decodeChunks(rx, chunkSizes) == expected
+
+
+if __name__ == '__main__':
+    unittest.main()
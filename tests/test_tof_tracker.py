@@ -0,0 +1,121 @@
+import unittest
+from src.Mock.modem_mock_gateway import ModemMockGateway
+from src.Mock.modem_mock_node import ModemMockNode
+from src.Mock.node_mock_gateway import NodeMockGateway
+from src.GatewayTDAMAC import GatewayTDAMAC
+from src.NodeTDAMAC import NodeTDAMAC
+from src.ToFTracker import ToFTracker
+from src.constantes import ID_PAQUET_TDI
+import time
+from tests import useTemporaryLogDir
+
+
+class TestToFTracker(unittest.TestCase):
+    def setUp(self):
+        useTemporaryLogDir(self)
+
+    def test_exponential_filter(self):
+        tracker = ToFTracker(alpha=0.5, driftThresholdUs=100)
+        tracker.reset({1: 1000, 2: 2000})
+
+        assert tracker.update(1, 1100) == 1050
+        assert tracker.update(1, 1100) == 1075
+        assert tracker.getDriftedNodes() == []
+        assert tracker.update(1, 1400) == 1237.5
+        assert tracker.getDriftedNodes() == [1]
+
+        tracker.markScheduled([1])
+        assert tracker.getDriftedNodes() == []
+        assert tracker.getEstimateUs(1) == 1238
+
+    def test_unknown_node(self):
+        tracker = ToFTracker()
+        tracker.update(3, 500)
+        assert tracker.getEstimateUs(3) == 500
+        assert tracker.getDriftUs(3) == 0
+        tracker.remove(3)
+        assert tracker.getDriftedNodes() == []
+
+    def test_invalid_alpha(self):
+        with self.assertRaises(ValueError):
+            ToFTracker(alpha=0)
+
+    def test_gateway_follows_moving_node(self):
+        # init mocks
+        modemGateway = ModemMockGateway()
+        modemGateway.connect("COM1")
+        modemGateway.receive()
+        gateway = GatewayTDAMAC(modemGateway, [1, 2], nbReqMax=4,
+                                tofTracker=ToFTracker(alpha=0.5, driftThresholdUs=50 * 1e3))
+        gateway.guardIntervalUs = int(0.3 * 1e6)
+        gateway.periodeSec = 0
+        nodes = {}
+        for address, delay in [(1, 0.1), (2, 0.2)]:
+            nodeModem = ModemMockNode(address, modemGateway)
+            node = NodeMockGateway(modemGateway, address, lambda node, pkt, m=nodeModem: m.simulateRx(pkt))
+            node.transmitDelay = delay
+            node.receptionDelay = delay
+            node.transmitTimeCalc = gateway.transmitTimeCalc  # the arrivals include the airtime
+            modemGateway.addNode(node)
+            nodeModem.connect("COM1")
+            nodeModem.receive()
+            self.addCleanup(NodeTDAMAC(nodeModem, address).close)
+            nodes[address] = node
+
+        gateway.pingTopology()
+        gateway.calculateNodesDelay()
+        gateway.sendAssignedTransmitDelaysToNodes()
+        time.sleep(0.5)  # wait for the nodes to receive the tdi packet
+        initialDelaysUs = dict(gateway.assignedTransmitDelaysUs)
+        for node in nodes.values():
+            node.receivePackets.clear()
+
+        # node 2 drifts away from the gateway
+        nodes[2].transmitDelay = 0.3
+        nodes[2].receptionDelay = 0.3
+
+        # test
+        gateway.main()
+
+        # assert only node 2 receives a new delay
+        assert all(pkt.header.type != ID_PAQUET_TDI for pkt in nodes[1].receivePackets)
+        assert any(pkt.header.type == ID_PAQUET_TDI for pkt in nodes[2].receivePackets)
+        assert gateway.assignedTransmitDelaysUs[1] == initialDelaysUs[1]
+        assert gateway.assignedTransmitDelaysUs[2] < initialDelaysUs[2]
+        assert gateway.nodeTwoWayTimeOfFlightUs[2] > 0.45 * 1e6
+        assert len(gateway.receivedPaquets) == 8
+
+    def test_airtime_is_not_time_of_flight(self):
+        modemGateway = ModemMockGateway()
+        modemGateway.connect("COM1")
+        modemGateway.receive()
+        tracker = ToFTracker(alpha=1, driftThresholdUs=50 * 1e3)
+        gateway = GatewayTDAMAC(modemGateway, [1, 2], nbReqMax=2, tofTracker=tracker)
+        gateway.guardIntervalUs = int(0.3 * 1e6)
+        gateway.periodeSec = 0
+        for address, delay in [(1, 0.1), (2, 0.2)]:
+            nodeModem = ModemMockNode(address, modemGateway)
+            node = NodeMockGateway(modemGateway, address, lambda node, pkt, m=nodeModem: m.simulateRx(pkt))
+            node.transmitDelay = delay
+            node.receptionDelay = delay
+            node.transmitTimeCalc = gateway.transmitTimeCalc
+            modemGateway.addNode(node)
+            nodeModem.connect("COM1")
+            nodeModem.receive()
+            self.addCleanup(NodeTDAMAC(nodeModem, address).close)
+
+        gateway.pingTopology()
+        gateway.calculateNodesDelay()
+        gateway.sendAssignedTransmitDelaysToNodes()
+        time.sleep(1)  # wait for the nodes to receive the tdi packet
+
+        gateway.main()
+
+        # assert the airtime of the request and of the data packets (about 0.6 s) is not taken as time of flight
+        assert len(gateway.receivedPaquets) == 4
+        assert tracker.getDriftedNodes() == []
+        assert abs(tracker.getEstimateUs(2) - 400000) < 50 * 1e3
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import tempfile
+import time
+import unittest
+from src.Mock.modem_mock_gateway import ModemMockGateway
+from src.Mock.modem_mock_node import ModemMockNode
+from src.Mock.node_mock_gateway import NodeMockGateway
+from src.GatewayTDAMAC import GatewayTDAMAC
+from src.NodeTDAMAC import NodeTDAMAC
+from src.TopologyCache import TopologyCache
+from src.constantes import ID_PAQUET_DATA, ID_PAQUET_PING, ID_PAQUET_TDI
+from tests import useTemporaryLogDir
+
+
+class TestTopologyCache(unittest.TestCase):
+    def setUp(self):
+        useTemporaryLogDir(self)
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.cachePath = os.path.join(self.tmpDir.name, "topology.json")
+        self.modemGateway = ModemMockGateway()
+        self.modemGateway.connect("COM1")
+        self.modemGateway.receive()
+        self.gateway = GatewayTDAMAC(self.modemGateway, [], topologyCache=TopologyCache(self.cachePath))
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def initNodes(self, delays):
+        """Creates the nodes, delays is a list of (address, transmitDelay, receptionDelay)"""
+        self.nodes = {}
+        self.nodesTDAMAC = {}
+        for address, transmitDelay, receptionDelay in delays:
+            nodeModem = ModemMockNode(address, self.modemGateway)
+            node = NodeMockGateway(self.modemGateway, address, lambda node, pkt, m=nodeModem: m.simulateRx(pkt))
+            node.transmitDelay = transmitDelay
+            node.receptionDelay = receptionDelay
+            node.transmitTimeCalc = self.gateway.transmitTimeCalc  # the arrivals include the airtime
+            self.modemGateway.addNode(node)
+            nodeModem.connect("COM1")
+            nodeModem.receive()
+            self.nodes[address] = node
+            self.nodesTDAMAC[address] = NodeTDAMAC(nodeModem, address)
+            self.addCleanup(self.nodesTDAMAC[address].close)
+
+    def restoreNodesDelay(self, tofs):
+        """Simulates nodes which received their delays before the restart of the gateway"""
+        self.gateway.topology = list(tofs.keys())
+        self.gateway.nodeTwoWayTimeOfFlightUs = dict(tofs)
+        self.gateway.calculateNodesDelay()
+        for node, delay in self.gateway.assignedTransmitDelaysUs.items():
+            self.nodesTDAMAC[node].assignedTransmitDelaysUs = delay
+        self.gateway.saveTopologyCache()
+
+    def test_save_load(self):
+        cache = TopologyCache(self.cachePath)
+        cache.save([2, 1], {1: 100, 2: 200}, {2: 0, 1: 50})
+
+        content = cache.load()
+
+        assert content["topology"] == [2, 1]
+        assert content["nodeTwoWayTimeOfFlightUs"] == {1: 100, 2: 200}
+        assert content["assignedTransmitDelaysUs"] == {1: 50, 2: 0}
+
+    def test_load_expired_or_missing(self):
+        cache = TopologyCache(self.cachePath, maxAgeSec=-1)
+        assert cache.load() is None
+        cache.save([1], {1: 100}, {1: 0})
+        assert cache.load() is None
+
+    def test_load_corrupted(self):
+        with open(self.cachePath, "w") as f:
+            f.write("{not json")
+        assert TopologyCache(self.cachePath).load() is None
+
+    def test_warm_start_valid_cache(self):
+        self.initNodes([(1, 0.1, 0.1), (2, 0.2, 0.2)])
+        self.restoreNodesDelay({1: 200000, 2: 400000})
+        expectedDelays = dict(self.gateway.assignedTransmitDelaysUs)
+
+        # restart of the gateway
+        self.gateway = GatewayTDAMAC(self.modemGateway, [1, 2], topologyCache=TopologyCache(self.cachePath))
+        start = time.time()
+        assert self.gateway.warmStart()
+        elapsed = time.time() - start
+
+        # assert one data request cycle and no ping
+        assert self.gateway.assignedTransmitDelaysUs == expectedDelays
+        for node in self.nodes.values():
+            assert all(pkt.header.type not in (ID_PAQUET_PING, ID_PAQUET_TDI) for pkt in node.receivePackets)
+        assert elapsed < self.gateway.getTimeoutDataRequestSec()
+
+    def test_warm_start_arrival_error(self):
+        self.initNodes([(1, 0.1, 0.1), (2, 0.2, 0.2)])
+        self.restoreNodesDelay({1: 200000, 2: 400000})
+        self.gateway = GatewayTDAMAC(self.modemGateway, [1, 2], topologyCache=TopologyCache(self.cachePath))
+        assert self.gateway.warmStart()
+
+        # assert the error compared with the jitter threshold leaves out the airtime of the packets
+        self.modemGateway.addRxCallback(self.gateway.packetCallback, type=ID_PAQUET_DATA)
+        cycle = self.gateway.requestDataCycle()
+        for node in [1, 2]:
+            assert abs(self.gateway.getArrivalErrorUs(node, cycle)) < self.gateway.jitterThresholdUs / 2
+
+    def test_warm_start_moved_node(self):
+        self.initNodes([(1, 0.1, 0.1), (2, 0.5, 0.5)])
+        # node 2 moved since the cache was saved
+        self.restoreNodesDelay({1: 200000, 2: 400000})
+
+        # restart of the gateway
+        self.gateway = GatewayTDAMAC(self.modemGateway, [1, 2], topologyCache=TopologyCache(self.cachePath))
+        assert self.gateway.warmStart()
+        time.sleep(1.1)  # wait for the node to receive the tdi packet
+
+        # assert only node 2 is pinged again
+        assert all(pkt.header.type != ID_PAQUET_PING for pkt in self.nodes[1].receivePackets)
+        assert any(pkt.header.type == ID_PAQUET_PING for pkt in self.nodes[2].receivePackets)
+        assert self.gateway.nodeTwoWayTimeOfFlightUs[2] == 1e6
+        assert self.nodesTDAMAC[2].assignedTransmitDelaysUs == self.gateway.assignedTransmitDelaysUs[2]
+        assert TopologyCache(self.cachePath).load()["nodeTwoWayTimeOfFlightUs"][2] == 1e6
+
+    def test_cold_start_without_cache(self):
+        self.gateway.topology = [1]
+        assert not self.gateway.warmStart()
+
+
+if __name__ == '__main__':
+    unittest.main()
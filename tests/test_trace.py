@@ -0,0 +1,71 @@
+import io
+import os
+import tempfile
+import time
+import unittest
+from lib.ahoi.modem.packet import makePacket, getBytes, packet2HexString
+from src.utils.trace import TraceWriter, TraceReader, RX, TX, hexToTrace, traceToHex, parseHexLine, formatHexLine
+
+
+class TestTrace(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.fileName = os.path.join(self.dir.name, "test.trace")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_write_read(self):
+        pkts = [makePacket(src=i % 3, dst=0, type=0x02, dsn=i, payload=bytearray([0x10] * i)) for i in range(100)]
+        with TraceWriter(self.fileName) as writer:
+            for i, pkt in enumerate(pkts):
+                writer.writePacket(pkt, TX if i % 2 else RX, linkId=i % 3, timestampNs=1000 * i)
+            # truncated record, as left by an interrupted writer
+            writer.file.write(b"\x00" * 5)
+
+        with TraceReader(self.fileName) as reader:
+            assert len(reader) == len(pkts)
+            assert [record.frame for record in reader] == [bytes(getBytes(pkt)) for pkt in pkts]
+            assert reader[51] == (51000, TX, 0, bytes(getBytes(pkts[51])))
+            assert reader.find(42500) == 43
+            assert reader.find(10**9) == len(pkts)
+            assert [record.timestampNs for record in reader.between(2000, 5000)] == [2000, 3000, 4000]
+
+    def test_wall_clock(self):
+        # stamped on the clock of the hex text logs
+        startNs = time.time_ns()
+        with TraceWriter(self.fileName) as writer:
+            writer.writePacket(makePacket(type=0x02))
+        with TraceReader(self.fileName) as reader:
+            assert startNs <= reader[0].timestampNs <= time.time_ns()
+
+    def test_not_a_trace(self):
+        with open(self.fileName, "w") as f:
+            f.write("RX@1736847567.121 3E FF 00 00 00 06\n")
+        with self.assertRaises(ValueError):
+            TraceReader(self.fileName)
+
+    def test_hex_lines(self):
+        pkt = makePacket(src=0x3E, dst=0xFF, type=0x00, dsn=1, payload=bytearray(b"ab cd"))
+        line = "RX@1736847567.121 " + packet2HexString(pkt) + "(abcd)"
+        record = parseHexLine(line, linkId=2)
+        assert record == (1736847567121000000, RX, 2, bytes(getBytes(pkt)))
+        assert formatHexLine(record) == line
+        # com log line, without direction
+        assert parseHexLine("1736847567.5 01 02") == (1736847567500000000, RX, 0, b"\x01\x02")
+        assert parseHexLine("mosh@/dev/ttyUSB0 >> ") is None
+        assert parseHexLine("") is None
+
+    def test_hex_conversion(self):
+        text = "mosh@/dev/ttyUSB0 >> \n" \
+               "RX@1736847567.121 3E FF 00 00 00 02 6C 6F 00 00 00 00 00 00 (lo)\n" \
+               "\n" \
+               "TX@1736847569.243 00 3E 00 00 01 00 \n"
+        assert hexToTrace(io.StringIO(text), self.fileName) == 2
+        out = io.StringIO()
+        assert traceToHex(self.fileName, out) == 2
+        assert out.getvalue().splitlines() == [line for line in text.splitlines() if "@17" in line]
+
+
+if __name__ == '__main__':
+    unittest.main()
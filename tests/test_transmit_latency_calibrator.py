@@ -0,0 +1,67 @@
+import time
+import unittest
+from src.Mock.modem_mock_gateway import ModemMockGateway
+from src.Mock.node_mock_gateway import NodeMockGateway
+from src.GatewayTDAMAC import GatewayTDAMAC
+from src.ModemTransmissionCalculator import ModemTransmissionCalculator
+from src.TransmitLatencyCalibrator import TransmitLatencyCalibrator
+from tests import useTemporaryLogDir
+
+INTERCEPT_US = 20000
+PER_OCTET_US = 500
+# short symbols, so the airtime stays small but larger than the latency per octet (1.2 ms per octet)
+TRANSMIT_TIME_CALC = ModemTransmissionCalculator(t=0.0001)
+
+
+class ModemLatencyMock(ModemMockGateway):
+    """Mock modem emitting the frames after a latency growing with their length, and their acoustic airtime"""
+
+    def sendFrame(self, frame):
+        time.sleep((INTERCEPT_US + PER_OCTET_US * TransmitLatencyCalibrator.getFrameOctetSize(len(frame.payload))) * 1e-6)
+        time.sleep(TRANSMIT_TIME_CALC.calculate_transmission_time(len(frame.payload) * 8) * 1e-6)
+        super().sendFrame(frame)
+
+    def simulateRx(self, packet):
+        time.sleep(TRANSMIT_TIME_CALC.calculate_transmission_time(len(packet.payload) * 8) * 1e-6)
+        super().simulateRx(packet)
+
+
+class TestTransmitLatencyCalibrator(unittest.TestCase):
+    def setUp(self):
+        useTemporaryLogDir(self)
+
+    def test_fit(self):
+        calibrator = TransmitLatencyCalibrator()
+        assert calibrator.getLatencyUs(10) == 0
+        calibrator.addSample(6, 1000)
+        assert not calibrator.fit()
+        calibrator.addSample(16, 2000)
+        calibrator.addSample(26, 3000)
+
+        # assert the latency line goes through the samples
+        assert calibrator.fit()
+        assert abs(calibrator.perOctetUs - 100) < 1e-6
+        assert abs(calibrator.interceptUs - 400) < 1e-6
+        assert abs(calibrator.getLatencyUs(36) - 4000) < 1e-6
+
+    def test_calibrate(self):
+        modemGateway = ModemLatencyMock()
+        modemGateway.connect("COM1")
+        modemGateway.receive()
+        node = NodeMockGateway(modemGateway, 1)
+        node.transmitDelay = 0.05
+        node.receptionDelay = 0.05
+        modemGateway.addNode(node)
+        calibrator = TransmitLatencyCalibrator(payloadOctetSizes=(0, 40, 80), nbPingsPerSize=2,
+                                               transmitTimeCalc=TRANSMIT_TIME_CALC)
+        gateway = GatewayTDAMAC(modemGateway, [1], latencyCalibrator=calibrator)
+
+        # assert the measured latency is the latency of the mock modem
+        assert gateway.calibrateTransmitLatency()
+        assert abs(calibrator.perOctetUs - PER_OCTET_US) < 50
+        assert abs(calibrator.interceptUs - INTERCEPT_US) < 5000
+        assert abs(gateway.getTransmitLatencyUs(0) - (INTERCEPT_US + 6 * PER_OCTET_US)) < 5000
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import threading
+import time
+import unittest
+from src.TransmitScheduler import TransmitScheduler
+
+
+class TestTransmitScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = TransmitScheduler()
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_deadline_order(self):
+        sent = []
+        done = threading.Event()
+        nowSec = time.monotonic()
+        self.scheduler.schedule(nowSec + 0.2, sent.append, 2)
+        self.scheduler.schedule(nowSec + 0.1, sent.append, 1)
+        self.scheduler.schedule(nowSec + 0.3, done.set)
+
+        assert done.wait(1)
+        assert sent == [1, 2]
+
+    def test_wake_up_error(self):
+        assert self.scheduler.getWakeUpErrorStatsUs() == {}
+        startTimesSec = []
+        nowSec = time.monotonic()
+        for i in range(10):
+            self.scheduler.schedule(nowSec + 0.05 * (i + 1), lambda: startTimesSec.append(time.monotonic()))
+        time.sleep(0.7)
+
+        # assert the transmissions start at their deadline, within the spin precision
+        assert len(startTimesSec) == 10
+        for i, startTimeSec in enumerate(startTimesSec):
+            assert 0 <= startTimeSec - (nowSec + 0.05 * (i + 1)) < 5e-3
+        stats = self.scheduler.getWakeUpErrorStatsUs()
+        assert 0 <= stats["mean"] <= stats["max"] < 5e3
+
+    def test_failed_transmission(self):
+        done = threading.Event()
+
+        def fail():
+            raise OSError("connection closed")
+
+        nowSec = time.monotonic()
+        self.scheduler.schedule(nowSec + 0.05, fail)
+        self.scheduler.schedule(nowSec + 0.1, done.set)
+        # assert the thread survives the failed transmission
+        assert done.wait(1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import argparse
+import time
+from src.utils.analytics import listLogs, analyzeLogs
+
+# Per-link packet reception ratio, inter-arrival timing and RSSI of RX/TX logs
+# (hex text logs such as sendrep-test*.txt and logs/*.log, or binary traces).
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Packet statistics of RX/TX logs")
+    parser.add_argument("paths", nargs="+", help="log files or directories")
+    parser.add_argument("--processes", type=int, default=None, help="number of processes, all the cores by default")
+    args = parser.parse_args()
+
+    fileNames = listLogs(args.paths)
+    startSec = time.perf_counter()
+    stats = analyzeLogs(fileNames, args.processes)
+    elapsedSec = time.perf_counter() - startSec
+
+    print(f"{'link':>9} {'received':>8} {'expected':>8} {'dup':>5} {'PRR':>6} {'interval (s)':>12} "
+          f"{'std (s)':>8} {'jitter (s)':>10} {'RSSI mean':>9} {'RSSI 5/50/95 %':>15}")
+    for (src, dst), link in sorted(stats.items()):
+        rssi = "/".join(f"{link.getRssiPercentile(p):.0f}" for p in (5, 50, 95))
+        print(f"{src:>4}->{dst:<4} {link.nbReceived:>8} {link.nbExpected:>8} {link.nbDuplicates:>5} "
+              f"{link.getPrr():>6.3f} {link.getMeanIntervalSec():>12.3f} {link.getIntervalStdSec():>8.3f} "
+              f"{link.getJitterSec():>10.3f} {link.getRssiMean():>9.1f} {rssi:>15}")
+    print(f"{len(fileNames)} logs analysed in {elapsedSec:.2f} s")
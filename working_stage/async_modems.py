@@ -0,0 +1,28 @@
+import asyncio
+import sys
+from lib.ahoi.modem.aio import AsyncModem
+from lib.ahoi.modem.packet import printPacket
+
+
+# Drive several modems on a single event loop, without a receive thread per connection:
+# prints the version of every modem, then every packet they receive.
+
+async def listen(dev: str):
+    modem = AsyncModem()
+    await modem.connect(dev)
+    version = await modem.getVersion()
+    print(f"{dev}: {bytes(version.payload)}")
+    async for pkt in modem:
+        print(f"{dev}:")
+        printPacket(pkt)
+
+
+async def main(devs):
+    await asyncio.gather(*[listen(dev) for dev in devs])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(f"Usage: python3 {sys.argv[0]} <serialport|tcp@host[:port]>...")
+        sys.exit(1)
+    asyncio.run(main(sys.argv[1:]))
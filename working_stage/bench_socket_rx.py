@@ -0,0 +1,67 @@
+import argparse
+import random
+import socket
+import threading
+import time
+from lib.ahoi.com.socket import ModemSocketCom
+from lib.ahoi.modem.packet import makePacket, byteArrayToPacket
+
+# Push recorded modem traffic through a local socket pair into ModemSocketCom.receive,
+# and compare the receive throughput of one octet per recv with the buffered reads.
+# The traffic is read from packet logs (one "timestamp octets..." line per packet, as
+# written by logOn), or generated if no log is given.
+
+
+def loadTraffic(fileNames):
+    pkts = []
+    for fileName in fileNames:
+        with open(fileName) as f:
+            for line in f:
+                octets = line.split()[1:]
+                if len(octets) > 0:
+                    pkts.append(byteArrayToPacket(bytearray.fromhex(''.join(octets))))
+    return pkts
+
+
+def makeTraffic(nbPackets: int):
+    rng = random.Random(0)
+    return [makePacket(src=rng.randrange(256), dst=rng.randrange(256), type=rng.randrange(256), dsn=i % 256,
+                       payload=bytearray(rng.randrange(256) for _ in range(rng.randint(0, 64))))
+            for i in range(nbPackets)]
+
+
+def runReceive(stream: bytes, rxBufSize: int):
+    nbReceived = [0]
+
+    def count(pkt):
+        nbReceived[0] += 1
+
+    com = ModemSocketCom(cb=count)
+    com.RX_BUFSIZE = rxBufSize
+    com.conn, peer = socket.socketpair()
+    com.conn.settimeout(ModemSocketCom.SERVER_TIMEOUT)
+    sender = threading.Thread(target=lambda: (peer.sendall(stream), peer.close()))
+
+    startSec = time.perf_counter()
+    sender.start()
+    com.receive()  # returns when the sender disconnects
+    elapsedSec = time.perf_counter() - startSec
+    sender.join()
+    com.conn.close()
+    return nbReceived[0], elapsedSec
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the TCP receive path of the modem connection")
+    parser.add_argument("logs", nargs="*", help="packet logs to replay, generated traffic if none")
+    parser.add_argument("--packets", type=int, default=20000, help="number of generated packets")
+    args = parser.parse_args()
+
+    pkts = loadTraffic(args.logs) if args.logs else makeTraffic(args.packets)
+    streamer = ModemSocketCom()
+    stream = b"".join(streamer.processTx(pkt) for pkt in pkts)
+
+    print(f"{'recv size':>10} {'packets':>8} {'elapsed (s)':>12} {'throughput (MB/s)':>18}")
+    for rxBufSize in (1, ModemSocketCom.RX_BUFSIZE):
+        nbPackets, elapsedSec = runReceive(stream, rxBufSize)
+        print(f"{rxBufSize:>10} {nbPackets:>8} {elapsedSec:>12.3f} {len(stream) / elapsedSec * 1e-6:>18.2f}")
@@ -0,0 +1,90 @@
+import argparse
+import time
+from src.Mock.modem_mock_gateway import ModemMockGateway
+from src.Mock.modem_mock_node import ModemMockNode
+from src.Mock.node_mock_gateway import NodeMockGateway
+from src.GatewayTDAMAC import GatewayTDAMAC
+from src.NodeTDAMAC import NodeTDAMAC
+from src.TDAMACScheduler import TDAMACScheduler
+from src.PollingScheduler import PollingScheduler
+from src.TDMAScheduler import TDMAScheduler
+from src.constantes import PERIOD_MODE_BACK_TO_BACK
+
+# Compare the MAC scheduling policies on the same simulated network:
+# every policy runs through GatewayTDAMAC and NodeTDAMAC with the mock modems,
+# and reports its throughput (data packets per second) and latency (request to data packet).
+# The mock modems do not simulate the airtime of the packets, the schedules still reserve it.
+
+SCHEDULERS = {
+    "tda-mac": TDAMACScheduler,
+    "polling": PollingScheduler,
+    "tdma": TDMAScheduler,
+}
+
+
+def parseNodes(arg: str):
+    """Nodes as address:one-way delay in seconds, separated by commas"""
+    nodes = []
+    for item in arg.split(","):
+        address, delay = item.split(":")
+        nodes.append((int(address), float(delay)))
+    return nodes
+
+
+def runScheduler(scheduler, nodes, nbReq: int, guardIntervalSec: float):
+    modemGateway = ModemMockGateway()
+    modemGateway.connect("COM1")
+    modemGateway.receive()
+    gateway = GatewayTDAMAC(modemGateway, [address for address, _ in nodes], nbReqMax=nbReq,
+                            periodMode=PERIOD_MODE_BACK_TO_BACK, scheduler=scheduler)
+    gateway.guardIntervalUs = int(guardIntervalSec * 1e6)
+    nodesTDAMAC = []
+    for address, delay in nodes:
+        nodeModem = ModemMockNode(address, modemGateway)
+        node = NodeMockGateway(modemGateway, address, lambda node, pkt, m=nodeModem: m.simulateRx(pkt))
+        node.transmitDelay = delay
+        node.receptionDelay = delay
+        modemGateway.addNode(node)
+        nodeModem.connect("COM1")
+        nodeModem.receive()
+        nodesTDAMAC.append(NodeTDAMAC(nodeModem, address))
+
+    gateway.pingTopology()
+    gateway.calculateNodesDelay()
+    gateway.sendAssignedTransmitDelaysToNodes()
+    time.sleep(2 * max(delay for _, delay in nodes) + 0.5)  # wait for the nodes to receive the tdi packet
+
+    startSec = time.time()
+    gateway.main()
+    elapsedSec = time.time() - startSec
+    for nodeTDAMAC in nodesTDAMAC:
+        nodeTDAMAC.close()
+
+    latenciesSec = sorted(latency * 1e-6 for latency in gateway.dataPacketLatenciesUs)
+    return {
+        "packets": len(gateway.receivedPaquets),
+        "elapsed": elapsedSec,
+        "throughput": len(gateway.receivedPaquets) / elapsedSec,
+        "latency": sum(latenciesSec) / len(latenciesSec) if latenciesSec else float("nan"),
+        "latencyMax": latenciesSec[-1] if latenciesSec else float("nan"),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the MAC scheduling policies in simulation")
+    parser.add_argument("--nodes", type=parseNodes, default=parseNodes("1:0.5,2:0.6,3:0.7"),
+                        help="nodes as address:one-way delay in seconds, separated by commas")
+    parser.add_argument("--requests", type=int, default=5, help="number of request cycles per policy")
+    parser.add_argument("--guard", type=float, default=0.3, help="guard interval in seconds")
+    parser.add_argument("--schedulers", nargs="+", default=list(SCHEDULERS), choices=list(SCHEDULERS))
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.schedulers:
+        results[name] = runScheduler(SCHEDULERS[name](), args.nodes, args.requests, args.guard)
+
+    print(f"{'scheduler':<10} {'packets':>8} {'elapsed (s)':>12} {'throughput (pkt/s)':>19} "
+          f"{'latency (s)':>12} {'max latency (s)':>16}")
+    for name, result in results.items():
+        print(f"{name:<10} {result['packets']:>8} {result['elapsed']:>12.2f} {result['throughput']:>19.3f} "
+              f"{result['latency']:>12.3f} {result['latencyMax']:>16.3f}")
@@ -0,0 +1,25 @@
+import argparse
+import sys
+from src.utils.trace import hexToTrace, traceToHex
+
+# Convert the hex text packet logs (`RX@<ts> XX XX ...`) to the binary packet trace and back.
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert packet logs between hex text and binary trace")
+    parser.add_argument("direction", choices=["to-trace", "to-hex"])
+    parser.add_argument("input", help="hex text log (to-trace) or binary trace (to-hex)")
+    parser.add_argument("output", nargs="?", help="binary trace (to-trace) or hex text log, stdout if omitted (to-hex)")
+    parser.add_argument("--link", type=int, default=0, help="link id of the converted packets (to-trace)")
+    args = parser.parse_args()
+
+    if args.direction == "to-trace":
+        if args.output is None:
+            parser.error("to-trace needs an output file")
+        with open(args.input) as text:
+            count = hexToTrace(text, args.output, args.link)
+    elif args.output is None:
+        count = traceToHex(args.input, sys.stdout)
+    else:
+        with open(args.output, "w") as text:
+            count = traceToHex(args.input, text)
+    print(f"{count} packets converted", file=sys.stderr)
@@ -1,9 +1,12 @@
 from lib.ahoi.modem.modem import Modem
 from src.NodeTDAMAC import NodeTDAMAC
 import sys
+from src.utils.Logger import Logger, LOGLEVELS
 
 
 if __name__ == '__main__':
+    # no debug messages on the packet paths
+    Logger.setLevel(LOGLEVELS.INFO)
     if len(sys.argv) != 4:
         print(f"Usage: python3 {sys.argv[0]} <serialport> <modem_id> <gateway_id>")
         sys.exit(1)
@@ -33,3 +36,4 @@ if __name__ == '__main__':
         except Exception as e:
             print(f"Error: {e}")
 
+    node.close()
@@ -1,5 +1,6 @@
 from lib.ahoi.modem.modem import Modem
 from src.NodeTDAMAC import NodeTDAMAC
+from src.SampleQueue import SampleQueue
 import sys
 from datetime import datetime
 import time
@@ -16,11 +17,12 @@ if __name__ == '__main__':
     modem.connect(sys.argv[1])
     modem.receive(True)
 
-    # run tdamac
-    node = NodeTDAMAC(modem, int(sys.argv[2]), int(sys.argv[3]))
+    # run tdamac, the readings taken between two requests are queued instead of overwritten
+    sampleQueue = SampleQueue(sampleOctetSize=len("HH:MM"))
+    node = NodeTDAMAC(modem, int(sys.argv[2]), int(sys.argv[3]), sampleQueue=sampleQueue)
 
     while True:
         # Récupération de l'heure actuelle au format HH:MM
         new_time = datetime.now().strftime("%H:%M")
-        node.setReponsePayload(bytearray(new_time, 'utf-8'))
+        sampleQueue.push(bytearray(new_time, 'utf-8'))
         time.sleep(1)
\ No newline at end of file